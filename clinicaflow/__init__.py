@@ -1,6 +1,30 @@
 """ClinicaFlow: Agentic multimodal triage copilot scaffold."""
 
-from .models import PatientIntake, TriageResult
-from .pipeline import ClinicaFlowPipeline
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .models import PatientIntake, TriageResult
+    from .pipeline import ClinicaFlowPipeline
 
 __all__ = ["PatientIntake", "TriageResult", "ClinicaFlowPipeline"]
+
+_LAZY_EXPORTS = {
+    "PatientIntake": "clinicaflow.models",
+    "TriageResult": "clinicaflow.models",
+    "ClinicaFlowPipeline": "clinicaflow.pipeline",
+}
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved on first access so `import clinicaflow.<submodule>` (e.g. the CLI entry
+    # point) does not pull in the whole pipeline graph.
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
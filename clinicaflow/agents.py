@@ -5,7 +5,7 @@ import os
 import re
 
 from clinicaflow.models import PatientIntake, StructuredIntake, Vitals
-from clinicaflow.policy_pack import PolicySnippet, load_policy_pack, match_policies, policy_pack_sha256
+from clinicaflow.policy_pack import PolicySnippet, load_policy_pack_with_sha256, match_policies
 from clinicaflow.privacy import detect_phi_hits, external_calls_allowed
 from clinicaflow.quality import intake_quality_warnings
 from clinicaflow.rules import (
@@ -593,13 +593,11 @@ def _default_policies() -> list[PolicySnippet]:
 
         if settings.policy_pack_path:
             source = settings.policy_pack_path
-            _CACHED_POLICIES = load_policy_pack(source)
-            _CACHED_POLICY_SHA256 = policy_pack_sha256(source)
+            _CACHED_POLICIES, _CACHED_POLICY_SHA256 = load_policy_pack_with_sha256(source)
             _CACHED_POLICY_SOURCE = str(source)
         else:
             policy_path = files("clinicaflow.resources").joinpath("policy_pack.json")
-            _CACHED_POLICIES = load_policy_pack(policy_path)
-            _CACHED_POLICY_SHA256 = policy_pack_sha256(policy_path)
+            _CACHED_POLICIES, _CACHED_POLICY_SHA256 = load_policy_pack_with_sha256(policy_path)
             _CACHED_POLICY_SOURCE = "package:clinicaflow.resources/policy_pack.json"
     except Exception:  # noqa: BLE001
         _CACHED_POLICIES = []
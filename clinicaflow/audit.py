@@ -2,23 +2,65 @@ from __future__ import annotations
 
 import base64
 import hashlib
-import html
+import io
 import json
-from dataclasses import asdict
-from datetime import datetime, timezone
+import os
+import zipfile
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields, is_dataclass
 from pathlib import Path
 from typing import Any
 
 from clinicaflow.diagnostics import collect_diagnostics
-from clinicaflow.models import PatientIntake, TriageResult
+from clinicaflow.models import PatientIntake, TriageResult, utc_now_iso
 from clinicaflow.privacy import detect_phi_hits, scrub_phi_in_obj
 
 
+# Single-pass equivalent of `html.escape(s, quote=True)`.
+_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+
+# Risk tier / trigger severity -> CSS class; anything else renders as routine.
+_RISK_CLASS: dict[str, str] = {"critical": "risk-critical", "urgent": "risk-urgent"}
+
+
+def _esc(value: str) -> str:
+    return value.translate(_ESCAPE_TABLE)
+
+
+# Reused across calls: `json.dumps(**kwargs)` builds a fresh encoder each time.
+_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
 def _json_bytes(payload: Any) -> bytes:
-    return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+    return _JSON_ENCODER.encode(payload).encode("utf-8")
+
+
+_CACHED_DIAGNOSTICS: tuple[dict[str, Any], bytes] | None = None
+
+
+def _diagnostics_bytes() -> bytes:
+    """Serialized `collect_diagnostics()`, re-encoded only when the live payload changes."""
+    global _CACHED_DIAGNOSTICS  # noqa: PLW0603
+    payload = collect_diagnostics()
+    cached = _CACHED_DIAGNOSTICS
+    if cached is not None and cached[0] == payload:
+        return cached[1]
+    data = _json_bytes(payload)
+    _CACHED_DIAGNOSTICS = (payload, data)
+    return data
 
 
 def _normalize_checklist(checklist: Any, *, fallback: list[str]) -> list[dict[str, Any]]:
+    """Return `[{"text": str, "checked": bool}, ...]`; the renderers rely on both keys."""
+    if (
+        isinstance(checklist, list)
+        and checklist
+        and all(isinstance(raw, dict) and isinstance(raw.get("text"), str) and raw["text"].strip() for raw in checklist)
+    ):
+        # Fast path: already-normalized checklist (e.g. from the UI/API).
+        return [{"text": raw["text"].strip(), "checked": bool(raw.get("checked"))} for raw in checklist]
+
     items: list[dict[str, Any]] = []
     if isinstance(checklist, list):
         for raw in checklist:
@@ -40,6 +82,28 @@ def _normalize_checklist(checklist: Any, *, fallback: list[str]) -> list[dict[st
     return [{"text": str(x).strip(), "checked": False} for x in (fallback or []) if str(x).strip()]
 
 
+def _sha256_hex(data: bytes) -> str:
+    # Integrity hashes, not security primitives; lets FIPS-mode OpenSSL builds use SHA-256 too.
+    return hashlib.sha256(data, usedforsecurity=False).hexdigest()
+
+
+# Below this total size, thread start-up costs more than hashing serially.
+_PARALLEL_HASH_MIN_BYTES = 1 << 20
+
+
+def _hash_files(files: dict[str, bytes]) -> dict[str, str]:
+    names = list(files)
+    blobs = [files[name] for name in names]
+    if len(blobs) < 2 or sum(len(b) for b in blobs) < _PARALLEL_HASH_MIN_BYTES:
+        return {name: _sha256_hex(data) for name, data in zip(names, blobs)}
+
+    # hashlib releases the GIL for large buffers, so big bundles (e.g. with
+    # inline images) hash concurrently.
+    with ThreadPoolExecutor(max_workers=min(len(blobs), os.cpu_count() or 2)) as pool:
+        digests = pool.map(_sha256_hex, blobs)
+        return dict(zip(names, digests))
+
+
 def build_audit_bundle_files(
     *,
     intake: PatientIntake,
@@ -54,45 +118,121 @@ def build_audit_bundle_files(
     in terms of this function to keep outputs consistent.
     """
 
-    created_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    manifest: dict[str, Any] = {}
+    files = dict(
+        _iter_bundle_members(
+            intake=intake,
+            result=result,
+            redact=redact,
+            checklist=checklist,
+            case_meta=case_meta,
+            manifest=manifest,
+        )
+    )
+    manifest["file_hashes_sha256"] = _hash_files(files)
+    files["manifest.json"] = _json_bytes(manifest)
+    return files
+
+
+def build_audit_bundle_zip(
+    *,
+    intake: PatientIntake,
+    result: TriageResult,
+    redact: bool = False,
+    checklist: list[dict[str, Any]] | list[str] | None = None,
+    case_meta: dict[str, Any] | None = None,
+) -> bytes:
+    """Build the audit bundle as a deflated ZIP archive.
+
+    Same members as `build_audit_bundle_files()`, but each file is compressed and
+    hashed as soon as it is produced, so only one uncompressed file is held at a time.
+    """
+
+    manifest: dict[str, Any] = {}
+    file_hashes: dict[str, str] = {}
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in _iter_bundle_members(
+            intake=intake,
+            result=result,
+            redact=redact,
+            checklist=checklist,
+            case_meta=case_meta,
+            manifest=manifest,
+        ):
+            zf.writestr(name, data)
+            file_hashes[name] = _sha256_hex(data)
+        manifest["file_hashes_sha256"] = file_hashes
+        zf.writestr("manifest.json", _json_bytes(manifest))
+    return buf.getvalue()
+
+
+def _iter_bundle_members(
+    *,
+    intake: PatientIntake,
+    result: TriageResult,
+    redact: bool,
+    checklist: list[dict[str, Any]] | list[str] | None,
+    case_meta: dict[str, Any] | None,
+    manifest: dict[str, Any],
+) -> Iterator[tuple[str, bytes]]:
+    """Yield `(name, data)` for every bundle file except `manifest.json`.
+
+    `manifest` is populated up front with everything except `file_hashes_sha256`
+    (left as an empty placeholder to keep key order stable); callers fill in the
+    hashes of the yielded files and serialize it last.
+    """
+
+    created_at = utc_now_iso()
 
-    intake_payload = asdict(intake)
     image_files: dict[str, bytes] = {}
     phi_hits = detect_phi_hits(intake.combined_text())
     result_payload = result.to_dict()
     if redact:
-        intake_payload["demographics"] = {}
-        intake_payload["prior_notes"] = []
-        intake_payload["image_descriptions"] = []
-        intake_payload["image_data_urls"] = []
-        intake_payload = scrub_phi_in_obj(intake_payload)
+        intake_payload = _redacted_intake_payload(intake)
         result_payload = scrub_phi_in_obj(result_payload)
     else:
-        intake_payload, image_files = _extract_inline_images(intake_payload)
+        intake_payload, image_files = _extract_inline_images(asdict(intake))
+
+    manifest.update(
+        {
+            "created_at": created_at,
+            "run_id": result.run_id,
+            "request_id": result.request_id,
+            "pipeline_version": result.pipeline_version,
+            "redacted": redact,
+            "phi_scrubbed_patterns": phi_hits if redact else [],
+            "file_hashes_sha256": {},
+            **_extract_trace_meta(_trace_outputs(result_payload)),
+        }
+    )
 
-    intake_bytes = _json_bytes(intake_payload)
-    result_bytes = _json_bytes(result_payload)
-    diagnostics_bytes = _json_bytes(collect_diagnostics())
+    yield "intake.json", _json_bytes(intake_payload)
+    yield "triage_result.json", _json_bytes(result_payload)
+    yield "doctor.json", _diagnostics_bytes()
 
     checklist_payload = _normalize_checklist(checklist, fallback=result.recommended_next_actions)
-    checklist_bytes = _json_bytes(checklist_payload)
+    yield "actions_checklist.json", _json_bytes(checklist_payload)
+
     case_meta_payload = dict(case_meta or {})
     if redact and case_meta_payload:
         case_meta_payload = scrub_phi_in_obj(case_meta_payload)
-    case_meta_bytes = _json_bytes(case_meta_payload) if case_meta_payload else b""
 
-    note_bytes = _note_markdown_bytes(
+    yield "note.md", _note_markdown_bytes(
         intake_payload=intake_payload,
         result_payload=result_payload,
         checklist=checklist_payload,
         case_meta=case_meta_payload or None,
     )
-    report_bytes = _report_html_bytes(
+    yield "report.html", _report_html_bytes(
         intake_payload=intake_payload,
         result_payload=result_payload,
         checklist=checklist_payload,
         case_meta=case_meta_payload or None,
     )
+    if case_meta_payload:
+        yield "case_meta.json", _json_bytes(case_meta_payload)
+
     try:
         from clinicaflow.fhir_export import build_fhir_bundle
 
@@ -101,40 +241,10 @@ def build_audit_bundle_files(
     except Exception:  # noqa: BLE001
         # Keep audit bundle generation robust even if optional exports fail.
         fhir_bytes = b""
+    if fhir_bytes:
+        yield "fhir_bundle.json", fhir_bytes
 
-    files: dict[str, bytes] = {
-        "intake.json": intake_bytes,
-        "triage_result.json": result_bytes,
-        "doctor.json": diagnostics_bytes,
-        "actions_checklist.json": checklist_bytes,
-        "note.md": note_bytes,
-        "report.html": report_bytes,
-        **({"case_meta.json": case_meta_bytes} if case_meta_bytes else {}),
-        **({"fhir_bundle.json": fhir_bytes} if fhir_bytes else {}),
-        **image_files,
-    }
-
-    file_hashes = {name: hashlib.sha256(data).hexdigest() for name, data in files.items()}
-
-    manifest = {
-        "created_at": created_at,
-        "run_id": result.run_id,
-        "request_id": result.request_id,
-        "pipeline_version": result.pipeline_version,
-        "redacted": redact,
-        "phi_scrubbed_patterns": phi_hits if redact else [],
-        "file_hashes_sha256": file_hashes,
-        "policy_pack_sha256": _extract_policy_pack_sha256(result_payload),
-        "policy_pack_source": _extract_policy_pack_source(result_payload),
-        "safety_rules_version": _extract_safety_rules_version(result_payload),
-        "evidence": _extract_evidence_meta(result_payload),
-        "reasoning": _extract_reasoning_meta(result_payload),
-        "communication": _extract_communication_meta(result_payload),
-    }
-    manifest_bytes = _json_bytes(manifest)
-
-    files["manifest.json"] = manifest_bytes
-    return files
+    yield from image_files.items()
 
 
 def write_audit_bundle(
@@ -154,14 +264,51 @@ def write_audit_bundle(
     out_path.mkdir(parents=True, exist_ok=True)
 
     files = build_audit_bundle_files(intake=intake, result=result, redact=redact)
+    prefix = os.path.join(out_path, "")
+    made_dirs = {""}
     for name, data in files.items():
-        path = out_path / name
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_bytes(data)
+        subdir = os.path.dirname(name)
+        if subdir not in made_dirs:
+            os.makedirs(prefix + subdir, exist_ok=True)
+            made_dirs.add(subdir)
+        _write_file(prefix + name, data)
 
     return out_path
 
 
+def _write_file(path: str, data: bytes) -> None:
+    """Write `data` straight to a raw fd (no buffered-writer copy)."""
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+# Intake fields emptied in redacted bundles.
+_REDACTED_INTAKE_FIELDS = frozenset({"demographics", "prior_notes", "image_descriptions", "image_data_urls"})
+
+
+def _redacted_intake_payload(intake: PatientIntake) -> dict[str, Any]:
+    """`asdict(intake)` with identifying fields emptied and PHI patterns scrubbed.
+
+    Emptied fields are never copied, and `scrub_phi_in_obj()` rebuilds every
+    container it walks, so the kept fields need no deep copy beforehand.
+    """
+
+    payload: dict[str, Any] = {}
+    for f in fields(intake):
+        value = getattr(intake, f.name)
+        if f.name in _REDACTED_INTAKE_FIELDS:
+            payload[f.name] = {} if isinstance(value, dict) else []
+        else:
+            payload[f.name] = asdict(value) if is_dataclass(value) else value
+    return scrub_phi_in_obj(payload)
+
+
 def _extract_inline_images(intake_payload: dict[str, Any]) -> tuple[dict[str, Any], dict[str, bytes]]:
     """Extract `image_data_urls` into separate files for audit bundles.
 
@@ -209,105 +356,77 @@ def _extract_inline_images(intake_payload: dict[str, Any]) -> tuple[dict[str, An
 def _write_json(path: Path, payload: Any) -> str:
     data = _json_bytes(payload)
     path.write_bytes(data)
-    return hashlib.sha256(data).hexdigest()
-
-
-def _extract_policy_pack_sha256(result_payload: dict) -> str:
-    try:
-        for step in result_payload.get("trace", []):
-            if step.get("agent") == "evidence_policy":
-                output = step.get("output") or {}
-                value = output.get("policy_pack_sha256")
-                return str(value or "")
-    except Exception:  # noqa: BLE001
-        return ""
-    return ""
-
-
-def _extract_policy_pack_source(result_payload: dict) -> str:
-    try:
-        for step in result_payload.get("trace", []):
-            if step.get("agent") == "evidence_policy":
-                output = step.get("output") or {}
-                value = output.get("policy_pack_source")
-                return str(value or "")
-    except Exception:  # noqa: BLE001
-        return ""
-    return ""
+    return _sha256_hex(data)
 
 
-def _extract_safety_rules_version(result_payload: dict) -> str:
-    try:
-        for step in result_payload.get("trace", []):
-            if step.get("agent") == "safety_escalation":
-                output = step.get("output") or {}
-                value = output.get("safety_rules_version")
-                return str(value or "")
-    except Exception:  # noqa: BLE001
-        return ""
-    return ""
-
-
-def _extract_evidence_meta(result_payload: dict) -> dict[str, Any]:
-    try:
-        for step in result_payload.get("trace", []):
-            if step.get("agent") == "evidence_policy":
-                output = step.get("output") or {}
-                return {
-                    "backend": str(output.get("evidence_backend") or ""),
-                    "ok": output.get("evidence_backend_ok"),
-                    "latency_ms": output.get("evidence_latency_ms"),
-                    "error": str(output.get("evidence_backend_error") or ""),
-                    "skipped_reason": str(output.get("evidence_backend_skipped_reason") or ""),
-                    "queries": output.get("evidence_queries") or {},
-                }
-    except Exception:  # noqa: BLE001
-        return {}
-    return {}
+def _trace_outputs(result_payload: dict) -> dict[str, dict[str, Any]]:
+    """Map each agent to the output of its first trace step, in one pass over the trace."""
 
-
-def _extract_reasoning_meta(result_payload: dict) -> dict[str, Any]:
-    try:
-        for step in result_payload.get("trace", []):
-            if step.get("agent") == "multimodal_reasoning":
-                output = step.get("output") or {}
-                return {
-                    "backend": str(output.get("reasoning_backend") or ""),
-                    "model": str(output.get("reasoning_backend_model") or ""),
-                    "base_url": str(output.get("reasoning_backend_base_url") or ""),
-                    "prompt_version": str(output.get("reasoning_prompt_version") or ""),
-                    "error": str(output.get("reasoning_backend_error") or ""),
-                }
-    except Exception:  # noqa: BLE001
-        return {}
-    return {}
+    outputs: dict[str, dict[str, Any]] = {}
+    trace = result_payload.get("trace")
+    if not isinstance(trace, list):
+        return outputs
+    for step in trace:
+        if not isinstance(step, dict):
+            continue
+        agent = step.get("agent")
+        if not isinstance(agent, str) or agent in outputs:
+            continue
+        output = step.get("output") or {}
+        outputs[agent] = dict(output) if isinstance(output, dict) else {}
+    return outputs
 
 
-def _extract_communication_meta(result_payload: dict) -> dict[str, Any]:
-    try:
-        for step in result_payload.get("trace", []):
-            if step.get("agent") == "communication":
-                output = step.get("output") or {}
-                return {
-                    "backend": str(output.get("communication_backend") or ""),
-                    "model": str(output.get("communication_backend_model") or ""),
-                    "base_url": str(output.get("communication_backend_base_url") or ""),
-                    "prompt_version": str(output.get("communication_prompt_version") or ""),
-                    "error": str(output.get("communication_backend_error") or ""),
-                }
-    except Exception:  # noqa: BLE001
-        return {}
-    return {}
+def _extract_trace_meta(outputs: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Manifest fields derived from agent trace outputs."""
 
+    meta: dict[str, Any] = {
+        "policy_pack_sha256": "",
+        "policy_pack_source": "",
+        "safety_rules_version": "",
+        "evidence": {},
+        "reasoning": {},
+        "communication": {},
+    }
 
-def _trace_output(result_payload: dict, agent: str) -> dict[str, Any]:
-    try:
-        for step in result_payload.get("trace", []):
-            if step.get("agent") == agent:
-                return dict(step.get("output") or {})
-    except Exception:  # noqa: BLE001
-        return {}
-    return {}
+    evidence = outputs.get("evidence_policy")
+    if evidence is not None:
+        meta["policy_pack_sha256"] = str(evidence.get("policy_pack_sha256") or "")
+        meta["policy_pack_source"] = str(evidence.get("policy_pack_source") or "")
+        meta["evidence"] = {
+            "backend": str(evidence.get("evidence_backend") or ""),
+            "ok": evidence.get("evidence_backend_ok"),
+            "latency_ms": evidence.get("evidence_latency_ms"),
+            "error": str(evidence.get("evidence_backend_error") or ""),
+            "skipped_reason": str(evidence.get("evidence_backend_skipped_reason") or ""),
+            "queries": evidence.get("evidence_queries") or {},
+        }
+
+    safety = outputs.get("safety_escalation")
+    if safety is not None:
+        meta["safety_rules_version"] = str(safety.get("safety_rules_version") or "")
+
+    reasoning = outputs.get("multimodal_reasoning")
+    if reasoning is not None:
+        meta["reasoning"] = {
+            "backend": str(reasoning.get("reasoning_backend") or ""),
+            "model": str(reasoning.get("reasoning_backend_model") or ""),
+            "base_url": str(reasoning.get("reasoning_backend_base_url") or ""),
+            "prompt_version": str(reasoning.get("reasoning_prompt_version") or ""),
+            "error": str(reasoning.get("reasoning_backend_error") or ""),
+        }
+
+    communication = outputs.get("communication")
+    if communication is not None:
+        meta["communication"] = {
+            "backend": str(communication.get("communication_backend") or ""),
+            "model": str(communication.get("communication_backend_model") or ""),
+            "base_url": str(communication.get("communication_backend_base_url") or ""),
+            "prompt_version": str(communication.get("communication_prompt_version") or ""),
+            "error": str(communication.get("communication_backend_error") or ""),
+        }
+
+    return meta
 
 
 def _format_risk_scores(payload: dict[str, Any]) -> str:
@@ -331,27 +450,30 @@ def _note_markdown_bytes(
     checklist: list[dict[str, Any]],
     case_meta: dict[str, Any] | None = None,
 ) -> bytes:
-    request_id = str(result_payload.get("request_id") or "").strip()
-    run_id = str(result_payload.get("run_id") or "").strip()
-    created_at = str(result_payload.get("created_at") or "").strip()
-    pipeline_version = str(result_payload.get("pipeline_version") or "").strip()
-    tier = str(result_payload.get("risk_tier") or "").strip()
-    escalation = bool(result_payload.get("escalation_required"))
-    confidence = result_payload.get("confidence")
-    red_flags = result_payload.get("red_flags") or []
-    differential = result_payload.get("differential_considerations") or []
-    uncertainty = result_payload.get("uncertainty_reasons") or []
-    handoff = str(result_payload.get("clinician_handoff") or "").strip()
-    patient = str(result_payload.get("patient_summary") or "").strip()
-
-    done = sum(1 for x in checklist if x.get("checked"))
+    get_r = result_payload.get
+    get_i = intake_payload.get
+    request_id = str(get_r("request_id") or "").strip()
+    run_id = str(get_r("run_id") or "").strip()
+    created_at = str(get_r("created_at") or "").strip()
+    pipeline_version = str(get_r("pipeline_version") or "").strip()
+    tier = str(get_r("risk_tier") or "").strip()
+    escalation = bool(get_r("escalation_required"))
+    confidence = get_r("confidence")
+    red_flags = get_r("red_flags") or []
+    differential = get_r("differential_considerations") or []
+    uncertainty = get_r("uncertainty_reasons") or []
+    handoff = str(get_r("clinician_handoff") or "").strip()
+    patient = str(get_r("patient_summary") or "").strip()
+
+    done = sum(x["checked"] for x in checklist)
     total = len(checklist)
 
-    safety = _trace_output(result_payload, "safety_escalation")
-    evidence = _trace_output(result_payload, "evidence_policy")
-    reasoning = _trace_output(result_payload, "multimodal_reasoning")
-    structured = _trace_output(result_payload, "intake_structuring")
-    communication = _trace_output(result_payload, "communication")
+    outputs = _trace_outputs(result_payload)
+    safety = outputs.get("safety_escalation", {})
+    evidence = outputs.get("evidence_policy", {})
+    reasoning = outputs.get("multimodal_reasoning", {})
+    structured = outputs.get("intake_structuring", {})
+    communication = outputs.get("communication", {})
 
     lines: list[str] = []
     lines.append("# ClinicaFlow triage note (demo)")
@@ -366,45 +488,46 @@ def _note_markdown_bytes(
         lines.append(f"- created_at: `{created_at}`")
     if pipeline_version:
         lines.append(f"- pipeline_version: `{pipeline_version}`")
-    if safety.get("safety_rules_version"):
-        lines.append(f"- safety_rules_version: `{str(safety.get('safety_rules_version'))}`")
-    if reasoning.get("reasoning_backend"):
-        lines.append(f"- reasoning_backend: `{str(reasoning.get('reasoning_backend'))}`")
-    if reasoning.get("reasoning_backend_model"):
-        lines.append(f"- reasoning_model: `{str(reasoning.get('reasoning_backend_model'))}`")
-    if reasoning.get("reasoning_prompt_version"):
-        lines.append(f"- reasoning_prompt_version: `{str(reasoning.get('reasoning_prompt_version'))}`")
-    if reasoning.get("reasoning_backend_skipped_reason"):
-        lines.append(f"- reasoning_backend_skipped_reason: `{str(reasoning.get('reasoning_backend_skipped_reason'))}`")
-    if reasoning.get("reasoning_backend_error"):
-        lines.append(f"- reasoning_backend_error: `{str(reasoning.get('reasoning_backend_error'))}`")
-    if evidence.get("policy_pack_sha256"):
-        lines.append(f"- policy_pack_sha256: `{str(evidence.get('policy_pack_sha256'))}`")
-    if evidence.get("evidence_backend"):
-        lines.append(f"- evidence_backend: `{str(evidence.get('evidence_backend'))}`")
+    reasoning_get = reasoning.get
+    evidence_get = evidence.get
+    communication_get = communication.get
+    for label, value in (
+        ("safety_rules_version", safety.get("safety_rules_version")),
+        ("reasoning_backend", reasoning_get("reasoning_backend")),
+        ("reasoning_model", reasoning_get("reasoning_backend_model")),
+        ("reasoning_prompt_version", reasoning_get("reasoning_prompt_version")),
+        ("reasoning_backend_skipped_reason", reasoning_get("reasoning_backend_skipped_reason")),
+        ("reasoning_backend_error", reasoning_get("reasoning_backend_error")),
+        ("policy_pack_sha256", evidence_get("policy_pack_sha256")),
+        ("evidence_backend", evidence_get("evidence_backend")),
+    ):
+        if value:
+            lines.append(f"- {label}: `{value}`")
     if "evidence_backend_ok" in evidence:
-        lines.append(f"- evidence_backend_ok: `{str(evidence.get('evidence_backend_ok'))}`")
-    if evidence.get("evidence_latency_ms") is not None:
-        lines.append(f"- evidence_latency_ms: `{str(evidence.get('evidence_latency_ms'))}`")
-    if evidence.get("evidence_backend_skipped_reason"):
-        lines.append(f"- evidence_backend_skipped_reason: `{str(evidence.get('evidence_backend_skipped_reason'))}`")
-    if evidence.get("evidence_backend_error"):
-        lines.append(f"- evidence_backend_error: `{str(evidence.get('evidence_backend_error'))}`")
-    if communication.get("communication_backend"):
-        lines.append(f"- communication_backend: `{str(communication.get('communication_backend'))}`")
-    if communication.get("communication_backend_model"):
-        lines.append(f"- communication_model: `{str(communication.get('communication_backend_model'))}`")
-    if communication.get("communication_prompt_version"):
-        lines.append(f"- communication_prompt_version: `{str(communication.get('communication_prompt_version'))}`")
-    if communication.get("communication_backend_skipped_reason"):
-        lines.append(f"- communication_backend_skipped_reason: `{str(communication.get('communication_backend_skipped_reason'))}`")
-    if communication.get("communication_backend_error"):
-        lines.append(f"- communication_backend_error: `{str(communication.get('communication_backend_error'))}`")
+        lines.append(f"- evidence_backend_ok: `{evidence_get('evidence_backend_ok')}`")
+    latency_ms = evidence_get("evidence_latency_ms")
+    if latency_ms is not None:
+        lines.append(f"- evidence_latency_ms: `{latency_ms}`")
+    for label, value in (
+        ("evidence_backend_skipped_reason", evidence_get("evidence_backend_skipped_reason")),
+        ("evidence_backend_error", evidence_get("evidence_backend_error")),
+        ("communication_backend", communication_get("communication_backend")),
+        ("communication_model", communication_get("communication_backend_model")),
+        ("communication_prompt_version", communication_get("communication_prompt_version")),
+        ("communication_backend_skipped_reason", communication_get("communication_backend_skipped_reason")),
+        ("communication_backend_error", communication_get("communication_backend_error")),
+    ):
+        if value:
+            lines.append(f"- {label}: `{value}`")
     lines.append("")
 
     if case_meta:
-        vignette = case_meta.get("vignette") if isinstance(case_meta.get("vignette"), dict) else {}
-        source = case_meta.get("source") if isinstance(case_meta.get("source"), dict) else {}
+        vignette = case_meta.get("vignette")
+        if not isinstance(vignette, dict):
+            vignette = {}
+        source = case_meta.get("source")
+        if not isinstance(source, dict):
+            source = {}
         vid = str(vignette.get("id") or "").strip()
         vset = str(vignette.get("set") or "").strip()
         stitle = str(source.get("title") or "").strip()
@@ -433,25 +556,27 @@ def _note_markdown_bytes(
         lines.append("")
 
     lines.append("## Intake (as provided)")
-    lines.append(f"- chief_complaint: {str(intake_payload.get('chief_complaint') or '').strip()}")
-    history = str(intake_payload.get("history") or "").strip()
+    lines.append(f"- chief_complaint: {str(get_i('chief_complaint') or '').strip()}")
+    history = str(get_i("history") or "").strip()
     if history:
         lines.append(f"- history: {history}")
 
-    vitals = dict(intake_payload.get("vitals") or {})
+    vitals = dict(get_i("vitals") or {})
     if vitals:
         vitals_bits = [f"{k}={v}" for k, v in vitals.items() if v not in (None, "")]
         if vitals_bits:
             lines.append(f"- vitals: {', '.join(vitals_bits)}")
 
-    if intake_payload.get("image_descriptions"):
+    image_descriptions = get_i("image_descriptions")
+    if image_descriptions:
         lines.append("- image_descriptions:")
-        for item in intake_payload.get("image_descriptions") or []:
+        for item in image_descriptions:
             lines.append(f"  - {item}")
 
-    if intake_payload.get("images"):
+    images = get_i("images")
+    if images:
         lines.append("- images:")
-        for item in intake_payload.get("images") or []:
+        for item in images:
             if isinstance(item, dict):
                 name = str(item.get("filename") or "").strip()
                 mime = str(item.get("mime_type") or "").strip()
@@ -459,40 +584,21 @@ def _note_markdown_bytes(
                 if label.strip():
                     lines.append(f"  - {label}")
 
-    if intake_payload.get("prior_notes"):
+    prior_notes = get_i("prior_notes")
+    if prior_notes:
         lines.append("- prior_notes:")
-        for item in intake_payload.get("prior_notes") or []:
+        for item in prior_notes:
             lines.append(f"  - {item}")
-    symptoms = structured.get("symptoms") or []
-    risk_factors = structured.get("risk_factors") or []
-    if isinstance(symptoms, list) and symptoms:
-        lines.append("- extracted_symptoms:")
-        for item in symptoms:
-            s = str(item).strip()
-            if s:
-                lines.append(f"  - {s}")
-    if isinstance(risk_factors, list) and risk_factors:
-        lines.append("- extracted_risk_factors:")
-        for item in risk_factors:
-            s = str(item).strip()
-            if s:
-                lines.append(f"  - {s}")
-
-    phi_hits = structured.get("phi_hits") or []
-    if isinstance(phi_hits, list) and phi_hits:
-        lines.append("- phi_hits (heuristic; do not include actual identifiers):")
-        for item in phi_hits:
-            s = str(item).strip()
-            if s:
-                lines.append(f"  - {s}")
-
-    quality = structured.get("data_quality_warnings") or []
-    if isinstance(quality, list) and quality:
-        lines.append("- data_quality_warnings:")
-        for item in quality:
-            s = str(item).strip()
-            if s:
-                lines.append(f"  - {s}")
+    for heading, key in (
+        ("- extracted_symptoms:", "symptoms"),
+        ("- extracted_risk_factors:", "risk_factors"),
+        ("- phi_hits (heuristic; do not include actual identifiers):", "phi_hits"),
+        ("- data_quality_warnings:", "data_quality_warnings"),
+    ):
+        values = structured.get(key) or []
+        if isinstance(values, list) and values:
+            lines.append(heading)
+            lines.extend(f"  - {s.strip()}" for s in _nonempty_strs(values))
 
     lines.append("")
     lines.append("## Triage")
@@ -540,8 +646,7 @@ def _note_markdown_bytes(
 
     lines.append("## Recommended next actions (checklist)")
     lines.append(f"- progress: {done}/{total}")
-    safety_actions = [str(x) for x in (safety.get("actions_added_by_safety") or []) if str(x).strip()]
-    safety_set = set(safety_actions)
+    safety_set = set(_nonempty_strs(safety.get("actions_added_by_safety")))
     if safety_set:
         lines.append("- tags: SAFETY=rules, POLICY=policy pack")
     for item in checklist:
@@ -598,6 +703,94 @@ def _note_markdown_bytes(
     return ("\n".join(lines).strip() + "\n").encode("utf-8")
 
 
+# Constant prefix of report.html (everything up to the dynamic <title> and the
+# full stylesheet), pre-encoded once and shared by every render.
+_REPORT_DOC_OPEN = """<!doctype html>
+<html lang="en">
+  <head>
+    <meta charset="utf-8" />
+    <meta name="viewport" content="width=device-width,initial-scale=1" />
+    <title>ClinicaFlow — Triage Report (""".encode("utf-8")
+
+_REPORT_STYLE = """    <style>
+      :root {
+        color-scheme: light;
+        --bg: #f6f7f9;
+        --panel: #ffffff;
+        --text: #111827;
+        --muted: #6b7280;
+        --border: #e5e7eb;
+        --shadow: 0 1px 2px rgba(16, 24, 40, 0.08), 0 8px 28px rgba(16, 24, 40, 0.06);
+        --radius: 14px;
+        --green-bg: #ecfdf5;
+        --green: #065f46;
+        --amber-bg: #fffbeb;
+        --amber: #92400e;
+        --red-bg: #fef2f2;
+        --red: #991b1b;
+        --blue-bg: #eef2ff;
+        --blue: #3730a3;
+      }
+      * { box-sizing: border-box; }
+      body { margin: 0; background: var(--bg); color: var(--text); font-family: ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, Inter, Arial, sans-serif; }
+      code, .mono { font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", monospace; }
+      header { display: flex; justify-content: space-between; align-items: center; gap: 12px; padding: 16px 18px; border-bottom: 1px solid var(--border); background: rgba(255,255,255,0.7); backdrop-filter: blur(8px); position: sticky; top: 0; z-index: 5; }
+      .brand-title { font-size: 18px; font-weight: 950; }
+      .brand-subtitle { font-size: 12px; color: var(--muted); margin-top: 2px; }
+      .container { max-width: 1200px; margin: 0 auto; padding: 18px; }
+      .grid { display: grid; grid-template-columns: 1fr 1fr; gap: 14px; align-items: start; }
+      @media (max-width: 980px) { .grid { grid-template-columns: 1fr; } }
+      .card { background: var(--panel); border: 1px solid var(--border); border-radius: var(--radius); padding: 14px; box-shadow: var(--shadow); }
+      .k { font-size: 12px; font-weight: 900; color: #374151; margin-bottom: 6px; }
+      .small { font-size: 12px; color: var(--muted); }
+      ul, ol { margin: 0; padding-left: 18px; }
+      li { margin: 6px 0; }
+      .done { opacity: 0.75; text-decoration: line-through; }
+      .pill { display: inline-block; padding: 4px 10px; border-radius: 999px; border: 1px solid var(--border); font-weight: 950; font-size: 12px; background: #fff; color: #374151; }
+      .risk-critical { background: var(--red-bg); border-color: rgba(153, 27, 27, 0.25); color: var(--red); }
+      .risk-urgent { background: var(--amber-bg); border-color: rgba(146, 64, 14, 0.25); color: var(--amber); }
+      .risk-routine { background: var(--green-bg); border-color: rgba(6, 95, 70, 0.25); color: var(--green); }
+      .banner { border: 1px solid var(--border); border-radius: var(--radius); padding: 12px; background: #fff; margin-bottom: 14px; box-shadow: var(--shadow); }
+      .banner-title { font-weight: 950; letter-spacing: 0.2px; }
+      .banner-subtitle { margin-top: 4px; font-size: 12px; opacity: 0.92; }
+      .banner-meta { margin-top: 8px; font-size: 12px; color: rgba(17, 24, 39, 0.72); }
+      .banner.routine { background: var(--green-bg); color: var(--green); border-color: rgba(6, 95, 70, 0.25); }
+      .banner.urgent { background: var(--amber-bg); color: var(--amber); border-color: rgba(146, 64, 14, 0.25); }
+      .banner.critical { background: var(--red-bg); color: var(--red); border-color: rgba(153, 27, 27, 0.25); }
+      .tag { display: inline-flex; align-items: center; padding: 2px 8px; border-radius: 999px; border: 1px solid var(--border); background: #f3f4f6; color: #374151; font-size: 11px; font-weight: 950; letter-spacing: 0.2px; }
+      .tag.safety { background: var(--red-bg); color: var(--red); border-color: rgba(153, 27, 27, 0.25); }
+      .tag.policy { background: var(--blue-bg); color: var(--blue); border-color: rgba(55, 48, 163, 0.2); }
+      table { width: 100%; border-collapse: collapse; font-size: 12px; }
+      th, td { padding: 10px; border-bottom: 1px solid var(--border); text-align: left; vertical-align: top; }
+      th { background: #f9fafb; font-weight: 950; }
+      pre { white-space: pre-wrap; background: #0b1020; color: #e5e7eb; padding: 10px; border-radius: 12px; overflow: auto; }
+      @media print {
+        header { position: static; }
+        body { margin: 0; }
+        .container { padding: 12mm; }
+      }
+    </style>
+""".encode("utf-8")
+
+
+def _nonempty_strs(values: Any) -> list[str]:
+    """String forms of the items that are not blank (unstripped, as rendered)."""
+    return [s for s in map(str, values or ()) if s.strip()]
+
+
+def _nonempty_list_strs(values: Any) -> list[str]:
+    """Like `_nonempty_strs`, but only for lists ([] for anything else)."""
+    return _nonempty_strs(values) if isinstance(values, list) else []
+
+
+def _li_item(value: str) -> str:
+    return f"<li>{_esc(value)}</li>"
+
+
+def _emit_li(parts: list[str], items: list[str]) -> None:
+    parts.append("".join(map(_li_item, items)) or "<li>(none)</li>")
+
+
 def _report_html_bytes(
     *,
     intake_payload: dict[str, Any],
@@ -605,129 +798,34 @@ def _report_html_bytes(
     checklist: list[dict[str, Any]],
     case_meta: dict[str, Any] | None = None,
 ) -> bytes:
-    request_id = str(result_payload.get("request_id") or "").strip() or "run"
-    created_at = str(result_payload.get("created_at") or "").strip()
-    tier = str(result_payload.get("risk_tier") or "").strip()
-    escalation = bool(result_payload.get("escalation_required"))
-    confidence = result_payload.get("confidence")
-
-    vitals = dict(intake_payload.get("vitals") or {})
+    get_r = result_payload.get
+    get_i = intake_payload.get
+    request_id = str(get_r("request_id") or "").strip() or "run"
+    created_at = str(get_r("created_at") or "").strip()
+    tier = str(get_r("risk_tier") or "").strip()
+    escalation = bool(get_r("escalation_required"))
+    confidence = get_r("confidence")
+
+    vitals = dict(get_i("vitals") or {})
     vitals_bits = [f"{k}={v}" for k, v in vitals.items() if v not in (None, "")]
-    red_flags = [str(x) for x in (result_payload.get("red_flags") or []) if str(x).strip()]
-    differential = [str(x) for x in (result_payload.get("differential_considerations") or []) if str(x).strip()]
-    uncertainty = [str(x) for x in (result_payload.get("uncertainty_reasons") or []) if str(x).strip()]
-
-    safety = _trace_output(result_payload, "safety_escalation")
-    evidence = _trace_output(result_payload, "evidence_policy")
-    reasoning = _trace_output(result_payload, "multimodal_reasoning")
-    communication = _trace_output(result_payload, "communication")
+    red_flags = _nonempty_strs(get_r("red_flags"))
+    differential = _nonempty_strs(get_r("differential_considerations"))
+    uncertainty = _nonempty_strs(get_r("uncertainty_reasons"))
+
+    outputs = _trace_outputs(result_payload)
+    safety = outputs.get("safety_escalation", {})
+    evidence = outputs.get("evidence_policy", {})
+    reasoning = outputs.get("multimodal_reasoning", {})
+    communication = outputs.get("communication", {})
     risk_scores = _format_risk_scores(safety)
-    structured = _trace_output(result_payload, "intake_structuring")
+    structured = outputs.get("intake_structuring", {})
 
-    done = sum(1 for x in checklist if x.get("checked"))
+    done = sum(x["checked"] for x in checklist)
     total = len(checklist)
 
-    safety_actions = [str(x) for x in (safety.get("actions_added_by_safety") or []) if str(x).strip()]
-    safety_set = set(safety_actions)
-
-    triggers_raw = safety.get("safety_triggers") or []
-    trigger_li = "<li>(none)</li>"
-    if isinstance(triggers_raw, list) and triggers_raw:
-        items: list[str] = []
-        for t in triggers_raw:
-            if not isinstance(t, dict):
-                continue
-            label = str(t.get("label") or t.get("id") or "").strip()
-            detail = str(t.get("detail") or "").strip()
-            sev = str(t.get("severity") or "").strip().lower()
-            if not label:
-                continue
-            klass = "risk-routine"
-            if sev == "critical":
-                klass = "risk-critical"
-            elif sev == "urgent":
-                klass = "risk-urgent"
-            items.append(
-                f"<li><span class=\"pill {klass}\">{html.escape(label)}</span>"
-                f"{(' ' + html.escape(detail)) if detail else ''}</li>"
-            )
-        if items:
-            trigger_li = "".join(items)
-
-    symptoms = structured.get("symptoms") or []
-    if not isinstance(symptoms, list):
-        symptoms = []
-    risk_factors = structured.get("risk_factors") or []
-    if not isinstance(risk_factors, list):
-        risk_factors = []
-    quality_warnings = structured.get("data_quality_warnings") or []
-    if not isinstance(quality_warnings, list):
-        quality_warnings = []
-    phi_hits = structured.get("phi_hits") or []
-    if not isinstance(phi_hits, list):
-        phi_hits = []
-
-    case_provenance_html = ""
-    if case_meta:
-        vignette = case_meta.get("vignette") if isinstance(case_meta.get("vignette"), dict) else {}
-        source = case_meta.get("source") if isinstance(case_meta.get("source"), dict) else {}
-        vid = str(vignette.get("id") or "").strip()
-        vset = str(vignette.get("set") or "").strip()
-        stitle = str(source.get("title") or "").strip()
-        surl = str(source.get("url") or "").strip()
-        snote = str(source.get("note") or "").strip()
-        rationale = str(case_meta.get("rationale") or "").strip()
-        edited = bool(case_meta.get("user_edited"))
-
-        if vset and vid:
-            slug = f"{vset}:{vid}"
-        else:
-            slug = vid or vset
-
-        parts: list[str] = []
-        if slug:
-            parts.append(f"<li>vignette: <span class=\"mono\">{html.escape(slug)}</span></li>")
-        if surl.startswith(("http://", "https://")):
-            title_cell = html.escape(stitle or surl)
-            parts.append(
-                "<li>source: "
-                f"<a href=\"{html.escape(surl)}\" target=\"_blank\" rel=\"noreferrer\">{title_cell}</a>"
-                f"{f' <span class=\"small\">({html.escape(snote)})</span>' if snote else ''}"
-                "</li>"
-            )
-        if rationale:
-            parts.append(f"<li>labeling rationale: <span class=\"small\">{html.escape(rationale)}</span></li>")
-        if edited:
-            parts.append("<li><span class=\"pill risk-urgent\">edited</span> intake modified after loading vignette.</li>")
-        if parts:
-            case_provenance_html = "".join(parts)
-
-    def li(items: list[str]) -> str:
-        if not items:
-            return "<li>(none)</li>"
-        return "".join(f"<li>{html.escape(x)}</li>" for x in items)
-
-    action_li = "".join(
-        (
-            f"<li class=\"{'done' if x.get('checked') else ''}\">"
-            f"{'☑' if x.get('checked') else '☐'} "
-            + (
-                f"<span class=\"tag {'safety' if str(x.get('text') or '').strip() in safety_set else 'policy'}\">"
-                f"{'SAFETY' if str(x.get('text') or '').strip() in safety_set else 'POLICY'}</span> "
-                if safety_set
-                else ""
-            )
-            + f"{html.escape(str(x.get('text') or ''))}</li>"
-        )
-        for x in checklist
-        if str(x.get("text") or "").strip()
-    ) or "<li>(none)</li>"
+    safety_set = set(_nonempty_strs(safety.get("actions_added_by_safety")))
 
-    risk_class = "risk-routine"
-    if tier == "critical":
-        risk_class = "risk-critical"
-    elif tier == "urgent":
-        risk_class = "risk-urgent"
+    risk_class = _RISK_CLASS.get(tier, "risk-routine")
 
     banner_title = f"Triage: {tier.upper()}" if tier else "Triage"
     banner_subtitle = "Decision support only — clinician confirmation required."
@@ -743,7 +841,7 @@ def _report_html_bytes(
 
     top_action = ""
     try:
-        top_action = str((result_payload.get("recommended_next_actions") or [])[0] or "").strip()
+        top_action = str((get_r("recommended_next_actions") or [])[0] or "").strip()
     except Exception:  # noqa: BLE001
         top_action = ""
 
@@ -758,180 +856,87 @@ def _report_html_bytes(
         meta_bits.append(f"Top action: {top_action}")
     banner_meta = "  |  ".join(meta_bits) if meta_bits else "—"
 
-    trace_rows = result_payload.get("trace") or []
-    workflow_rows = ""
-    if isinstance(trace_rows, list):
-        for step in trace_rows:
-            if not isinstance(step, dict):
-                continue
-            agent = str(step.get("agent") or "").strip() or "agent"
-            latency = step.get("latency_ms")
-            err = str(step.get("error") or "").strip()
-            if not err:
-                out = step.get("output") or {}
-                if isinstance(out, dict) and agent == "multimodal_reasoning":
-                    derived = str(out.get("reasoning_backend_error") or "").strip()
-                    skipped = str(out.get("reasoning_backend_skipped_reason") or "").strip()
-                    if derived:
-                        err = f"fallback: {derived}"
-                    elif skipped:
-                        err = f"skipped: {skipped}"
-                elif isinstance(out, dict) and agent == "communication":
-                    derived = str(out.get("communication_backend_error") or "").strip()
-                    skipped = str(out.get("communication_backend_skipped_reason") or "").strip()
-                    if derived:
-                        err = f"fallback: {derived}"
-                    elif skipped:
-                        err = f"skipped: {skipped}"
-                if err:
-                    err = err[:160]
-            latency_str = ""
-            if isinstance(latency, (int, float)):
-                latency_str = f"{float(latency):.2f} ms"
-            workflow_rows += (
-                "<tr>"
-                f"<td class=\"mono\">{html.escape(agent)}</td>"
-                f"<td class=\"mono\">{html.escape(latency_str)}</td>"
-                f"<td>{html.escape(err) if err else ''}</td>"
-                "</tr>"
-            )
+    # Build the document as a flat list of fragments and join once at the end;
+    # repeated string concatenation copies the accumulated prefix every time.
+    parts: list[str] = []
+    app = parts.append
 
-    citations = evidence.get("protocol_citations") or []
-    citation_rows = ""
-    if isinstance(citations, list):
-        for c in citations:
-            if not isinstance(c, dict):
-                continue
-            pid = str(c.get("policy_id") or "").strip()
-            title = str(c.get("title") or "").strip()
-            url = str(c.get("url") or "").strip()
-            title_cell = html.escape(title)
-            if url.startswith(("http://", "https://")) and title_cell:
-                title_cell = (
-                    f'<a href="{html.escape(url)}" target="_blank" rel="noreferrer">'
-                    f"{title_cell}"
-                    "</a>"
-                )
-            cite = str(c.get("citation") or "").strip()
-            acts = c.get("recommended_actions") or []
-            acts_str = "; ".join(str(x) for x in acts if str(x).strip()) if isinstance(acts, list) else ""
-            citation_rows += (
-                "<tr>"
-                f"<td class=\"mono\">{html.escape(pid)}</td>"
-                f"<td>{title_cell}</td>"
-                f"<td class=\"mono\">{html.escape(cite)}</td>"
-                f"<td>{html.escape(acts_str)}</td>"
-                "</tr>"
-            )
-
-    html_doc = f"""<!doctype html>
-<html lang="en">
-  <head>
-    <meta charset="utf-8" />
-    <meta name="viewport" content="width=device-width,initial-scale=1" />
-    <title>ClinicaFlow — Triage Report ({html.escape(request_id)})</title>
-    <style>
-      :root {{
-        color-scheme: light;
-        --bg: #f6f7f9;
-        --panel: #ffffff;
-        --text: #111827;
-        --muted: #6b7280;
-        --border: #e5e7eb;
-        --shadow: 0 1px 2px rgba(16, 24, 40, 0.08), 0 8px 28px rgba(16, 24, 40, 0.06);
-        --radius: 14px;
-        --green-bg: #ecfdf5;
-        --green: #065f46;
-        --amber-bg: #fffbeb;
-        --amber: #92400e;
-        --red-bg: #fef2f2;
-        --red: #991b1b;
-        --blue-bg: #eef2ff;
-        --blue: #3730a3;
-      }}
-      * {{ box-sizing: border-box; }}
-      body {{ margin: 0; background: var(--bg); color: var(--text); font-family: ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, Inter, Arial, sans-serif; }}
-      code, .mono {{ font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", monospace; }}
-      header {{ display: flex; justify-content: space-between; align-items: center; gap: 12px; padding: 16px 18px; border-bottom: 1px solid var(--border); background: rgba(255,255,255,0.7); backdrop-filter: blur(8px); position: sticky; top: 0; z-index: 5; }}
-      .brand-title {{ font-size: 18px; font-weight: 950; }}
-      .brand-subtitle {{ font-size: 12px; color: var(--muted); margin-top: 2px; }}
-      .container {{ max-width: 1200px; margin: 0 auto; padding: 18px; }}
-      .grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 14px; align-items: start; }}
-      @media (max-width: 980px) {{ .grid {{ grid-template-columns: 1fr; }} }}
-      .card {{ background: var(--panel); border: 1px solid var(--border); border-radius: var(--radius); padding: 14px; box-shadow: var(--shadow); }}
-      .k {{ font-size: 12px; font-weight: 900; color: #374151; margin-bottom: 6px; }}
-      .small {{ font-size: 12px; color: var(--muted); }}
-      ul, ol {{ margin: 0; padding-left: 18px; }}
-      li {{ margin: 6px 0; }}
-      .done {{ opacity: 0.75; text-decoration: line-through; }}
-      .pill {{ display: inline-block; padding: 4px 10px; border-radius: 999px; border: 1px solid var(--border); font-weight: 950; font-size: 12px; background: #fff; color: #374151; }}
-      .risk-critical {{ background: var(--red-bg); border-color: rgba(153, 27, 27, 0.25); color: var(--red); }}
-      .risk-urgent {{ background: var(--amber-bg); border-color: rgba(146, 64, 14, 0.25); color: var(--amber); }}
-      .risk-routine {{ background: var(--green-bg); border-color: rgba(6, 95, 70, 0.25); color: var(--green); }}
-      .banner {{ border: 1px solid var(--border); border-radius: var(--radius); padding: 12px; background: #fff; margin-bottom: 14px; box-shadow: var(--shadow); }}
-      .banner-title {{ font-weight: 950; letter-spacing: 0.2px; }}
-      .banner-subtitle {{ margin-top: 4px; font-size: 12px; opacity: 0.92; }}
-      .banner-meta {{ margin-top: 8px; font-size: 12px; color: rgba(17, 24, 39, 0.72); }}
-      .banner.routine {{ background: var(--green-bg); color: var(--green); border-color: rgba(6, 95, 70, 0.25); }}
-      .banner.urgent {{ background: var(--amber-bg); color: var(--amber); border-color: rgba(146, 64, 14, 0.25); }}
-      .banner.critical {{ background: var(--red-bg); color: var(--red); border-color: rgba(153, 27, 27, 0.25); }}
-      .tag {{ display: inline-flex; align-items: center; padding: 2px 8px; border-radius: 999px; border: 1px solid var(--border); background: #f3f4f6; color: #374151; font-size: 11px; font-weight: 950; letter-spacing: 0.2px; }}
-      .tag.safety {{ background: var(--red-bg); color: var(--red); border-color: rgba(153, 27, 27, 0.25); }}
-      .tag.policy {{ background: var(--blue-bg); color: var(--blue); border-color: rgba(55, 48, 163, 0.2); }}
-      table {{ width: 100%; border-collapse: collapse; font-size: 12px; }}
-      th, td {{ padding: 10px; border-bottom: 1px solid var(--border); text-align: left; vertical-align: top; }}
-      th {{ background: #f9fafb; font-weight: 950; }}
-      pre {{ white-space: pre-wrap; background: #0b1020; color: #e5e7eb; padding: 10px; border-radius: 12px; overflow: auto; }}
-      @media print {{
-        header {{ position: static; }}
-        body {{ margin: 0; }}
-        .container {{ padding: 12mm; }}
-      }}
-    </style>
-  </head>
+    app(
+        """  </head>
   <body>
     <header>
       <div>
         <div class="brand-title">ClinicaFlow — Triage Report</div>
-        <div class="brand-subtitle"><span class="mono">{html.escape(request_id)}</span> • {html.escape(created_at)}</div>
+        <div class="brand-subtitle"><span class="mono">"""
+    )
+    app(_esc(request_id))
+    app("</span> • ")
+    app(_esc(created_at))
+    app(
+        """</div>
       </div>
       <div>
-        <span class="pill {risk_class}">risk_tier: {html.escape(tier)}</span>
+        <span class="pill """
+    )
+    app(risk_class)
+    app('">risk_tier: ')
+    app(_esc(tier))
+    app(
+        """</span>
       </div>
     </header>
 
     <main class="container">
-      <div class="banner {html.escape(tier.lower() if tier else '')}">
-        <div class="banner-title">{html.escape(banner_title)}</div>
-        <div class="banner-subtitle">{html.escape(banner_subtitle)}</div>
-        <div class="banner-meta">{html.escape(banner_meta)}</div>
+      <div class="banner """
+    )
+    app(_esc(tier.lower() if tier else ""))
+    app('">\n        <div class="banner-title">')
+    app(_esc(banner_title))
+    app('</div>\n        <div class="banner-subtitle">')
+    app(_esc(banner_subtitle))
+    app('</div>\n        <div class="banner-meta">')
+    app(_esc(banner_meta))
+    app(
+        """</div>
       </div>
 
       <div class="grid">
         <div class="card">
           <div class="k">Metadata</div>
           <ul>
-            <li><span class="mono">request_id</span>: <span class="mono">{html.escape(request_id)}</span></li>
-            <li>created_at: <span class="mono">{html.escape(created_at)}</span></li>
-            <li>pipeline_version: <span class="mono">{html.escape(str(result_payload.get('pipeline_version') or ''))}</span></li>
-            <li>reasoning_backend: <span class="mono">{html.escape(str(reasoning.get('reasoning_backend') or ''))}</span></li>
-            <li>reasoning_model: <span class="mono">{html.escape(str(reasoning.get('reasoning_backend_model') or ''))}</span></li>
-            <li>reasoning_prompt_version: <span class="mono">{html.escape(str(reasoning.get('reasoning_prompt_version') or ''))}</span></li>
-            <li>reasoning_skipped: <span class="mono">{html.escape(str(reasoning.get('reasoning_backend_skipped_reason') or ''))}</span></li>
-            <li>reasoning_error: <span class="mono">{html.escape(str(reasoning.get('reasoning_backend_error') or ''))}</span></li>
-            <li>policy_pack_sha256: <span class="mono">{html.escape(str(evidence.get('policy_pack_sha256') or ''))}</span></li>
-            <li>policy_pack_source: <span class="mono">{html.escape(str(evidence.get('policy_pack_source') or ''))}</span></li>
-            <li>evidence_backend: <span class="mono">{html.escape(str(evidence.get('evidence_backend') or ''))}</span></li>
-            <li>evidence_backend_ok: <span class="mono">{html.escape(str(evidence.get('evidence_backend_ok')))}</span></li>
-            <li>evidence_latency_ms: <span class="mono">{html.escape(str(evidence.get('evidence_latency_ms') or ''))}</span></li>
-            <li>evidence_skipped: <span class="mono">{html.escape(str(evidence.get('evidence_backend_skipped_reason') or ''))}</span></li>
-            <li>evidence_error: <span class="mono">{html.escape(str(evidence.get('evidence_backend_error') or ''))}</span></li>
-            <li>safety_rules_version: <span class="mono">{html.escape(str(safety.get('safety_rules_version') or ''))}</span></li>
-            <li>communication_backend: <span class="mono">{html.escape(str(communication.get('communication_backend') or ''))}</span></li>
-            <li>communication_model: <span class="mono">{html.escape(str(communication.get('communication_backend_model') or ''))}</span></li>
-            <li>communication_prompt_version: <span class="mono">{html.escape(str(communication.get('communication_prompt_version') or ''))}</span></li>
-            <li>communication_skipped: <span class="mono">{html.escape(str(communication.get('communication_backend_skipped_reason') or ''))}</span></li>
-            <li>communication_error: <span class="mono">{html.escape(str(communication.get('communication_backend_error') or ''))}</span></li>
+            <li><span class="mono">request_id</span>: <span class="mono">"""
+    )
+    app(_esc(request_id))
+    app("</span></li>")
+    for label, value in (
+        ("created_at", created_at),
+        ("pipeline_version", str(get_r("pipeline_version") or "")),
+        ("reasoning_backend", str(reasoning.get("reasoning_backend") or "")),
+        ("reasoning_model", str(reasoning.get("reasoning_backend_model") or "")),
+        ("reasoning_prompt_version", str(reasoning.get("reasoning_prompt_version") or "")),
+        ("reasoning_skipped", str(reasoning.get("reasoning_backend_skipped_reason") or "")),
+        ("reasoning_error", str(reasoning.get("reasoning_backend_error") or "")),
+        ("policy_pack_sha256", str(evidence.get("policy_pack_sha256") or "")),
+        ("policy_pack_source", str(evidence.get("policy_pack_source") or "")),
+        ("evidence_backend", str(evidence.get("evidence_backend") or "")),
+        ("evidence_backend_ok", str(evidence.get("evidence_backend_ok"))),
+        ("evidence_latency_ms", str(evidence.get("evidence_latency_ms") or "")),
+        ("evidence_skipped", str(evidence.get("evidence_backend_skipped_reason") or "")),
+        ("evidence_error", str(evidence.get("evidence_backend_error") or "")),
+        ("safety_rules_version", str(safety.get("safety_rules_version") or "")),
+        ("communication_backend", str(communication.get("communication_backend") or "")),
+        ("communication_model", str(communication.get("communication_backend_model") or "")),
+        ("communication_prompt_version", str(communication.get("communication_prompt_version") or "")),
+        ("communication_skipped", str(communication.get("communication_backend_skipped_reason") or "")),
+        ("communication_error", str(communication.get("communication_backend_error") or "")),
+    ):
+        app("\n            <li>")
+        app(label)
+        app(': <span class="mono">')
+        app(_esc(value))
+        app("</span></li>")
+    app(
+        """
           </ul>
           <div class="small" style="margin-top: 8px;">
             DISCLAIMER: Decision support only. Not a diagnosis. Clinician confirmation required.
@@ -940,14 +945,51 @@ def _report_html_bytes(
         <div class="card">
           <div class="k">Triage</div>
           <ul>
-            <li>risk_tier: <b>{html.escape(tier)}</b></li>
-            <li>escalation_required: <b>{html.escape(str(escalation))}</b></li>
-            <li>rationale: {html.escape(str(safety.get('risk_tier_rationale') or ''))}</li>
-            {f'<li>risk_scores: <span class="mono">{html.escape(risk_scores)}</span></li>' if risk_scores else ''}
-            <li>confidence (proxy): <span class="mono">{html.escape(str(confidence))}</span></li>
+            <li>risk_tier: <b>"""
+    )
+    app(_esc(tier))
+    app("</b></li>\n            <li>escalation_required: <b>")
+    app(_esc(str(escalation)))
+    app("</b></li>\n            <li>rationale: ")
+    app(_esc(str(safety.get("risk_tier_rationale") or "")))
+    app("</li>\n            ")
+    if risk_scores:
+        app('<li>risk_scores: <span class="mono">')
+        app(_esc(risk_scores))
+        app("</span></li>")
+    app('\n            <li>confidence (proxy): <span class="mono">')
+    app(_esc(str(confidence)))
+    app(
+        """</span></li>
           </ul>
           <div class="k" style="margin-top: 10px;">Safety triggers (deterministic)</div>
-          <ul>{trigger_li}</ul>
+          <ul>"""
+    )
+    triggers_raw = safety.get("safety_triggers") or []
+    n_triggers = 0
+    if isinstance(triggers_raw, list):
+        for t in triggers_raw:
+            if not isinstance(t, dict):
+                continue
+            label = str(t.get("label") or t.get("id") or "").strip()
+            detail = str(t.get("detail") or "").strip()
+            sev = str(t.get("severity") or "").strip().lower()
+            if not label:
+                continue
+            app('<li><span class="pill ')
+            app(_RISK_CLASS.get(sev, "risk-routine"))
+            app('">')
+            app(_esc(label))
+            app("</span>")
+            if detail:
+                app(" ")
+                app(_esc(detail))
+            app("</li>")
+            n_triggers += 1
+    if not n_triggers:
+        app("<li>(none)</li>")
+    app(
+        """</ul>
         </div>
       </div>
 
@@ -957,35 +999,103 @@ def _report_html_bytes(
         <div class="card">
           <div class="k">Intake (demo)</div>
           <ul>
-            <li>chief_complaint: {html.escape(str(intake_payload.get('chief_complaint') or ''))}</li>
-            <li>history: {html.escape(str(intake_payload.get('history') or ''))}</li>
-            <li>vitals: <span class="mono">{html.escape(', '.join(vitals_bits))}</span></li>
-            {case_provenance_html}
-            {f"<li>images: <span class='mono'>{html.escape(str(len(intake_payload.get('images') or [])))}</span></li>" if intake_payload.get("images") else ""}
+            <li>chief_complaint: """
+    )
+    app(_esc(str(get_i("chief_complaint") or "")))
+    app("</li>\n            <li>history: ")
+    app(_esc(str(get_i("history") or "")))
+    app('</li>\n            <li>vitals: <span class="mono">')
+    app(_esc(", ".join(vitals_bits)))
+    app("</span></li>\n            ")
+    if case_meta:
+        vignette = case_meta.get("vignette")
+        if not isinstance(vignette, dict):
+            vignette = {}
+        source = case_meta.get("source")
+        if not isinstance(source, dict):
+            source = {}
+        vid = str(vignette.get("id") or "").strip()
+        vset = str(vignette.get("set") or "").strip()
+        stitle = str(source.get("title") or "").strip()
+        surl = str(source.get("url") or "").strip()
+        snote = str(source.get("note") or "").strip()
+        rationale = str(case_meta.get("rationale") or "").strip()
+        edited = bool(case_meta.get("user_edited"))
+
+        if vset and vid:
+            slug = f"{vset}:{vid}"
+        else:
+            slug = vid or vset
+
+        if slug:
+            app('<li>vignette: <span class="mono">')
+            app(_esc(slug))
+            app("</span></li>")
+        if surl.startswith(("http://", "https://")):
+            app('<li>source: <a href="')
+            app(_esc(surl))
+            app('" target="_blank" rel="noreferrer">')
+            app(_esc(stitle or surl))
+            app("</a>")
+            if snote:
+                app(' <span class="small">(')
+                app(_esc(snote))
+                app(")</span>")
+            app("</li>")
+        if rationale:
+            app('<li>labeling rationale: <span class="small">')
+            app(_esc(rationale))
+            app("</span></li>")
+        if edited:
+            app('<li><span class="pill risk-urgent">edited</span> intake modified after loading vignette.</li>')
+    app("\n            ")
+    images = get_i("images")
+    if images:
+        app("<li>images: <span class='mono'>")
+        app(str(len(images)))
+        app("</span></li>")
+    app(
+        """
           </ul>
         </div>
         <div class="card">
           <div class="k">Extracted signals</div>
           <div class="small">Symptoms</div>
-          <ul>{li([str(x) for x in symptoms if str(x).strip()])}</ul>
-          <div class="small" style="margin-top: 8px;">Risk factors</div>
-          <ul>{li([str(x) for x in risk_factors if str(x).strip()])}</ul>
-          <div class="small" style="margin-top: 8px;">Data quality warnings</div>
-          <ul>{li([str(x) for x in quality_warnings if str(x).strip()])}</ul>
-          <div class="small" style="margin-top: 8px;">PHI patterns (heuristic)</div>
-          <ul>{li([str(x) for x in phi_hits if str(x).strip()])}</ul>
+          <ul>"""
+    )
+    _emit_li(parts, _nonempty_list_strs(structured.get("symptoms")))
+    app('</ul>\n          <div class="small" style="margin-top: 8px;">Risk factors</div>\n          <ul>')
+    _emit_li(parts, _nonempty_list_strs(structured.get("risk_factors")))
+    app('</ul>\n          <div class="small" style="margin-top: 8px;">Data quality warnings</div>\n          <ul>')
+    _emit_li(parts, _nonempty_list_strs(structured.get("data_quality_warnings")))
+    app('</ul>\n          <div class="small" style="margin-top: 8px;">PHI patterns (heuristic)</div>\n          <ul>')
+    _emit_li(parts, _nonempty_list_strs(structured.get("phi_hits")))
+    app(
+        """</ul>
         </div>
         <div class="card">
           <div class="k">Red flags</div>
-          <ul>{li(red_flags)}</ul>
+          <ul>"""
+    )
+    _emit_li(parts, red_flags)
+    app(
+        """</ul>
         </div>
         <div class="card">
           <div class="k">Differential (top)</div>
-          <ul>{li(differential)}</ul>
+          <ul>"""
+    )
+    _emit_li(parts, differential)
+    app(
+        """</ul>
         </div>
         <div class="card">
           <div class="k">Uncertainty</div>
-          <ul>{li(uncertainty)}</ul>
+          <ul>"""
+    )
+    _emit_li(parts, uncertainty)
+    app(
+        """</ul>
         </div>
       </div>
 
@@ -993,9 +1103,31 @@ def _report_html_bytes(
 
       <div class="card">
         <div class="k">Next actions (checklist)</div>
-        <div class="small">progress: <span class="mono">{done}/{total}</span></div>
-        {('<div class="small" style="margin-top: 6px;">Tags: <span class="tag safety">SAFETY</span> = deterministic rules; <span class="tag policy">POLICY</span> = policy pack / evidence agent</div>' if safety_set else '')}
-        <ul style="margin-top: 8px;">{action_li}</ul>
+        <div class="small">progress: <span class="mono">"""
+    )
+    app(f"{done}/{total}")
+    app("</span></div>\n        ")
+    if safety_set:
+        app(
+            '<div class="small" style="margin-top: 6px;">Tags: <span class="tag safety">SAFETY</span> = deterministic'
+            ' rules; <span class="tag policy">POLICY</span> = policy pack / evidence agent</div>'
+        )
+    app('\n        <ul style="margin-top: 8px;">')
+    n_actions = 0
+    for x in checklist:
+        text = str(x.get("text") or "")
+        if not text.strip():
+            continue
+        app('<li class="done">☑ ' if x.get("checked") else '<li class="">☐ ')
+        if safety_set:
+            app('<span class="tag safety">SAFETY</span> ' if text.strip() in safety_set else '<span class="tag policy">POLICY</span> ')
+        app(_esc(text))
+        app("</li>")
+        n_actions += 1
+    if not n_actions:
+        app("<li>(none)</li>")
+    app(
+        """</ul>
       </div>
 
       <div style="height:14px"></div>
@@ -1006,17 +1138,98 @@ def _report_html_bytes(
           <div class="tablewrap" style="overflow:auto; border: 1px solid var(--border); border-radius: 12px;">
             <table>
               <thead><tr><th>Agent</th><th>Latency</th><th>Error</th></tr></thead>
-              <tbody>{workflow_rows or '<tr><td colspan=\"3\">(none)</td></tr>'}</tbody>
+              <tbody>"""
+    )
+    trace_rows = get_r("trace") or []
+    n_rows = 0
+    if isinstance(trace_rows, list):
+        for step in trace_rows:
+            if not isinstance(step, dict):
+                continue
+            agent = str(step.get("agent") or "").strip() or "agent"
+            latency = step.get("latency_ms")
+            err = str(step.get("error") or "").strip()
+            if not err:
+                out = step.get("output") or {}
+                if isinstance(out, dict) and agent == "multimodal_reasoning":
+                    derived = str(out.get("reasoning_backend_error") or "").strip()
+                    skipped = str(out.get("reasoning_backend_skipped_reason") or "").strip()
+                    if derived:
+                        err = f"fallback: {derived}"
+                    elif skipped:
+                        err = f"skipped: {skipped}"
+                elif isinstance(out, dict) and agent == "communication":
+                    derived = str(out.get("communication_backend_error") or "").strip()
+                    skipped = str(out.get("communication_backend_skipped_reason") or "").strip()
+                    if derived:
+                        err = f"fallback: {derived}"
+                    elif skipped:
+                        err = f"skipped: {skipped}"
+                if err:
+                    err = err[:160]
+            latency_str = ""
+            if isinstance(latency, (int, float)):
+                latency_str = f"{float(latency):.2f} ms"
+            app('<tr><td class="mono">')
+            app(_esc(agent))
+            app('</td><td class="mono">')
+            app(_esc(latency_str))
+            app("</td><td>")
+            if err:
+                app(_esc(err))
+            app("</td></tr>")
+            n_rows += 1
+    if not n_rows:
+        app('<tr><td colspan="3">(none)</td></tr>')
+    app(
+        """</tbody>
             </table>
           </div>
         </div>
         <div class="card">
           <div class="k">Protocol citations (demo policy pack)</div>
-          <div class="small">policy_pack_sha256: <span class="mono">{html.escape(str(evidence.get('policy_pack_sha256') or ''))}</span></div>
+          <div class="small">policy_pack_sha256: <span class="mono">"""
+    )
+    app(_esc(str(evidence.get("policy_pack_sha256") or "")))
+    app(
+        """</span></div>
           <div class="tablewrap" style="overflow:auto; border: 1px solid var(--border); border-radius: 12px; margin-top: 8px;">
             <table>
               <thead><tr><th>Policy</th><th>Title</th><th>Citation</th><th>Recommended actions</th></tr></thead>
-              <tbody>{citation_rows or '<tr><td colspan=\"4\">(none)</td></tr>'}</tbody>
+              <tbody>"""
+    )
+    citations = evidence.get("protocol_citations") or []
+    n_rows = 0
+    if isinstance(citations, list):
+        for c in citations:
+            if not isinstance(c, dict):
+                continue
+            pid = str(c.get("policy_id") or "").strip()
+            title = str(c.get("title") or "").strip()
+            url = str(c.get("url") or "").strip()
+            cite = str(c.get("citation") or "").strip()
+            acts_str = "; ".join(_nonempty_list_strs(c.get("recommended_actions")))
+            app('<tr><td class="mono">')
+            app(_esc(pid))
+            app("</td><td>")
+            if url.startswith(("http://", "https://")) and title:
+                app('<a href="')
+                app(_esc(url))
+                app('" target="_blank" rel="noreferrer">')
+                app(_esc(title))
+                app("</a>")
+            else:
+                app(_esc(title))
+            app('</td><td class="mono">')
+            app(_esc(cite))
+            app("</td><td>")
+            app(_esc(acts_str))
+            app("</td></tr>")
+            n_rows += 1
+    if not n_rows:
+        app('<tr><td colspan="4">(none)</td></tr>')
+    app(
+        """</tbody>
             </table>
           </div>
         </div>
@@ -1026,18 +1239,28 @@ def _report_html_bytes(
 
       <div class="card">
         <div class="k">Clinician handoff</div>
-        <pre>{html.escape(str(result_payload.get('clinician_handoff') or ''))}</pre>
+        <pre>"""
+    )
+    app(_esc(str(get_r("clinician_handoff") or "")))
+    app(
+        """</pre>
       </div>
 
       <div style="height:14px"></div>
 
       <div class="card">
         <div class="k">Patient return precautions</div>
-        <pre>{html.escape(str(result_payload.get('patient_summary') or ''))}</pre>
+        <pre>"""
+    )
+    app(_esc(str(get_r("patient_summary") or "")))
+    app(
+        """</pre>
       </div>
     </main>
   </body>
 </html>
 """
+    )
 
-    return html_doc.encode("utf-8")
+    title = f"{_esc(request_id)})</title>\n"
+    return b"".join((_REPORT_DOC_OPEN, title.encode("utf-8"), _REPORT_STYLE, "".join(parts).encode("utf-8")))
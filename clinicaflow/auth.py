@@ -1,30 +1,58 @@
 from __future__ import annotations
 
+import hmac
 from typing import Mapping
 
 
-def is_authorized(*, headers: Mapping[str, str], expected_api_key: str) -> bool:
+class ApiKeyAuthenticator:
     """Simple optional API key auth (no deps).
 
-    If `expected_api_key` is empty, auth is disabled and all requests are allowed.
+    The expected key is encoded once at construction so per-request checks only
+    encode the presented token. If the key is empty, auth is disabled and all
+    requests are allowed.
 
     Accepted headers:
     - Authorization: Bearer <token>
     - X-API-Key: <token>
     """
 
-    if not expected_api_key:
-        return True
+    __slots__ = ("_enabled", "_expected_bytes")
+
+    def __init__(self, expected_api_key: str) -> None:
+        self._enabled = bool(expected_api_key)
+        self._expected_bytes = (expected_api_key or "").encode("utf-8")
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def check(self, headers: Mapping[str, str]) -> bool:
+        if not self._enabled:
+            return True
+
+        expected = self._expected_bytes
+        # Header names are case-insensitive; plain dicts (tests, WSGI-style
+        # callers) are not, so fold once and probe each header a single time.
+        # The first occurrence of a repeated header wins, like `Message.get`.
+        hdr: dict[str, str] = {}
+        for k, v in headers.items():
+            hdr.setdefault(str(k).lower(), v)
+
+        bearer = _extract_bearer(hdr.get("authorization") or "")
+        if bearer and hmac.compare_digest(bearer.encode("utf-8"), expected):
+            return True
+
+        x_api_key = (hdr.get("x-api-key") or "").strip()
+        if x_api_key and hmac.compare_digest(x_api_key.encode("utf-8"), expected):
+            return True
+
+        return False
 
-    bearer = _extract_bearer(headers.get("Authorization", ""))
-    if bearer and _constant_time_eq(bearer, expected_api_key):
-        return True
 
-    x_api_key = (headers.get("X-API-Key") or headers.get("X-Api-Key") or "").strip()
-    if x_api_key and _constant_time_eq(x_api_key, expected_api_key):
-        return True
+def is_authorized(*, headers: Mapping[str, str], expected_api_key: str) -> bool:
+    """Backward-compatible wrapper around `ApiKeyAuthenticator.check`."""
 
-    return False
+    return ApiKeyAuthenticator(expected_api_key).check(headers)
 
 
 def _extract_bearer(value: str) -> str:
@@ -38,14 +66,3 @@ def _extract_bearer(value: str) -> str:
     if scheme.lower() != "bearer":
         return ""
     return token.strip()
-
-
-def _constant_time_eq(a: str, b: str) -> bool:
-    # Constant-time compare for small secrets.
-    if len(a) != len(b):
-        return False
-    result = 0
-    for ca, cb in zip(a.encode("utf-8"), b.encode("utf-8"), strict=False):
-        result |= ca ^ cb
-    return result == 0
-
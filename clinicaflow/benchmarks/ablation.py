@@ -19,7 +19,17 @@ from clinicaflow.benchmarks.vignettes import (
     load_vignettes,
 )
 from clinicaflow.models import PatientIntake, StructuredIntake
-from clinicaflow.pipeline import ClinicaFlowPipeline
+from clinicaflow.pipeline import get_pipeline
+
+
+def _pct(v: float) -> str:
+    return f"{v:.1f}%"
+
+
+def _num(v: float) -> str:
+    if abs(v) >= 10:
+        return f"{v:.1f}"
+    return f"{v:.2f}"
 
 
 @dataclass(frozen=True, slots=True)
@@ -49,14 +59,6 @@ class AblationSummary:
         return payload
 
     def to_markdown_table(self) -> str:
-        def pct(v: float) -> str:
-            return f"{v:.1f}%"
-
-        def num(v: float) -> str:
-            if abs(v) >= 10:
-                return f"{v:.1f}"
-            return f"{v:.2f}"
-
         lines = [
             f"Set: `{self.set_name}` (n={self.n_cases})",
             "",
@@ -69,12 +71,12 @@ class AblationSummary:
                 + " | ".join(
                     [
                         f"`{v.variant}`",
-                        f"`{pct(v.red_flag_recall)}`",
-                        f"`{pct(v.under_triage_rate)}`",
-                        f"`{pct(v.over_triage_rate)}`",
-                        f"`{num(v.avg_actions)}`",
-                        f"`{num(v.avg_citations)}`",
-                        f"`{num(v.avg_completeness)}`",
+                        f"`{_pct(v.red_flag_recall)}`",
+                        f"`{_pct(v.under_triage_rate)}`",
+                        f"`{_pct(v.over_triage_rate)}`",
+                        f"`{_num(v.avg_actions)}`",
+                        f"`{_num(v.avg_citations)}`",
+                        f"`{_num(v.avg_completeness)}`",
                     ]
                 )
                 + " |"
@@ -161,7 +163,7 @@ def _trace_output(result: Any, agent: str) -> dict[str, Any]:
 
 
 def run_ablation_rows(rows: list[dict[str, Any]], *, set_name: str) -> tuple[AblationSummary, list[dict[str, Any]]]:
-    pipeline = ClinicaFlowPipeline()
+    pipeline = get_pipeline()
     structuring = IntakeStructuringAgent()
     reasoning_agent = MultimodalClinicalReasoningAgent()
     safety_agent = SafetyEscalationAgent()
@@ -289,17 +291,17 @@ def run_ablation_rows(rows: list[dict[str, Any]], *, set_name: str) -> tuple[Abl
             # Red-flag recall (category-level).
             if gold_cats:
                 agg[variant]["gold_has_flags"] += 1
-                agg[variant]["flag_hit"] += int(bool(pred_cats & gold_cats))
+                agg[variant]["flag_hit"] += not pred_cats.isdisjoint(gold_cats)
 
             # Under-triage.
             if gold_tier in {"urgent", "critical"}:
                 agg[variant]["gold_urgent_critical"] += 1
-                agg[variant]["under"] += int(pred_tier == "routine")
+                agg[variant]["under"] += pred_tier == "routine"
 
             # Over-triage.
             if gold_tier == "routine":
                 agg[variant]["gold_routine"] += 1
-                agg[variant]["over"] += int(pred_tier != "routine")
+                agg[variant]["over"] += pred_tier != "routine"
 
             agg[variant]["actions"].append(len(out["actions"] or []))
             agg[variant]["citations"].append(len(out["citations"] or []))
@@ -362,8 +364,8 @@ def run_ablation_rows(rows: list[dict[str, Any]], *, set_name: str) -> tuple[Abl
     return summary, per_case
 
 
-def main() -> None:
-    args = build_parser().parse_args()
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
     rows: list[dict[str, Any]] = []
     for p in load_default_vignette_paths(args.set):
         rows.extend(load_vignettes(p))
@@ -376,7 +378,9 @@ def main() -> None:
 
     if args.cases_out:
         args.cases_out.parent.mkdir(parents=True, exist_ok=True)
-        args.cases_out.write_text(json.dumps(per_case, indent=2, ensure_ascii=False), encoding="utf-8")
+        # per_case scales with the vignette set; stream it instead of building the whole string first.
+        with args.cases_out.open("w", encoding="utf-8") as fh:
+            json.dump(per_case, fh, indent=2, ensure_ascii=False)
 
     if args.print_markdown:
         print(summary.to_markdown_table())
@@ -1,20 +1,33 @@
 from __future__ import annotations
 
 import argparse
+import heapq
+import io
 import json
 import math
+import re
 import statistics
-from dataclasses import asdict, dataclass
-from datetime import datetime, timezone
+from collections import Counter, defaultdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 from clinicaflow.benchmarks.vignettes import (
     VignetteBenchmarkSummary,
+    dumps_vignette_json,
     load_default_vignette_paths,
     load_vignettes,
     run_benchmark_rows,
 )
+from clinicaflow.models import utc_now_iso
+
+_URGENT_OR_CRITICAL = frozenset({"urgent", "critical"})
+# Tuples (not sets) so membership tests tolerate unhashable payload values.
+_RISK_TIERS = ("routine", "urgent", "critical")
+_ACTION_SOURCES = ("SAFETY", "POLICY")
+
+# Shared stand-in for rows without ClinicaFlow output; per-case payloads are only read, never mutated.
+_EMPTY: dict[str, Any] = {}
 
 
 @dataclass(frozen=True, slots=True)
@@ -26,7 +39,13 @@ class GovernanceGate:
     min_red_flag_recall: float
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "ok": self.ok,
+            "under_triage_rate": self.under_triage_rate,
+            "over_triage_rate": self.over_triage_rate,
+            "red_flag_recall": self.red_flag_recall,
+            "min_red_flag_recall": self.min_red_flag_recall,
+        }
 
 
 @dataclass(frozen=True, slots=True)
@@ -36,7 +55,11 @@ class GovernanceProvenance:
     policy_actions: int
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "total_actions": self.total_actions,
+            "safety_actions": self.safety_actions,
+            "policy_actions": self.policy_actions,
+        }
 
 
 @dataclass(frozen=True, slots=True)
@@ -48,7 +71,13 @@ class TriggerCoverage:
     sample_cases: list[str]
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "id": self.id,
+            "label": self.label,
+            "severity": self.severity,
+            "n_cases": self.n_cases,
+            "sample_cases": list(self.sample_cases),
+        }
 
 
 @dataclass(frozen=True, slots=True)
@@ -61,7 +90,14 @@ class OpsAgentStats:
     p95_latency_ms: float | None
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "agent": self.agent,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_latency_ms": self.avg_latency_ms,
+            "p50_latency_ms": self.p50_latency_ms,
+            "p95_latency_ms": self.p95_latency_ms,
+        }
 
 
 @dataclass(frozen=True, slots=True)
@@ -75,9 +111,15 @@ class OpsSloSummary:
     agents: list[OpsAgentStats]
 
     def to_dict(self) -> dict[str, Any]:
-        payload = asdict(self)
-        payload["agents"] = [agent.to_dict() for agent in self.agents]
-        return payload
+        return {
+            "n_cases": self.n_cases,
+            "n_cases_with_workflow": self.n_cases_with_workflow,
+            "cases_with_errors": self.cases_with_errors,
+            "total_avg_latency_ms": self.total_avg_latency_ms,
+            "total_p50_latency_ms": self.total_p50_latency_ms,
+            "total_p95_latency_ms": self.total_p95_latency_ms,
+            "agents": [agent.to_dict() for agent in self.agents],
+        }
 
 
 def _percentile_nearest_rank(values: list[float], p: float) -> float | None:
@@ -124,7 +166,7 @@ def compute_ops_slo(per_case: list[dict[str, Any]]) -> OpsSloSummary:
     cases_with_errors = 0
 
     for row in per_case or []:
-        cf = dict(row.get("clinicaflow") or {})
+        cf = row.get("clinicaflow") or _EMPTY
         workflow = cf.get("workflow") or []
         if not isinstance(workflow, list) or not workflow:
             continue
@@ -194,56 +236,68 @@ def compute_gate(summary: VignetteBenchmarkSummary, *, min_red_flag_recall: floa
     )
 
 
+def _action_source(raw: Any) -> str:
+    # Pipeline output is already canonical; only normalize hand-edited payloads.
+    if raw in _ACTION_SOURCES:
+        return raw
+    return str(raw or "").strip().upper()
+
+
+def _split_actions(cf: dict[str, Any]) -> tuple[list[str], frozenset[str]]:
+    """Return stripped recommended actions and the set of safety-added actions."""
+
+    rec = cf.get("recommended_next_actions") or []
+    if not isinstance(rec, list) or not rec:
+        return [], frozenset()
+    texts = [text for text in map(str.strip, map(str, rec)) if text]
+    safety = cf.get("actions_added_by_safety") or []
+    if not isinstance(safety, list):
+        return texts, frozenset()
+    return texts, frozenset(x for x in map(str.strip, map(str, safety)) if x)
+
+
 def compute_action_provenance(per_case: list[dict[str, Any]]) -> GovernanceProvenance:
+    if not per_case:
+        return GovernanceProvenance(total_actions=0, safety_actions=0, policy_actions=0)
+
     total = 0
     safety = 0
     policy = 0
 
     for row in per_case or []:
-        cf = dict(row.get("clinicaflow") or {})
+        cf = row.get("clinicaflow") or _EMPTY
         prov = cf.get("action_provenance")
         if isinstance(prov, list) and prov:
-            for item in prov:
-                if not isinstance(item, dict):
-                    continue
-                src = str(item.get("source") or "").strip().upper()
-                if src not in {"SAFETY", "POLICY"}:
-                    continue
-                total += 1
-                if src == "SAFETY":
-                    safety += 1
-                else:
-                    policy += 1
+            # Normalize sources in one pass, then let `list.count` do the tallying in C.
+            sources = [_action_source(item.get("source")) for item in prov if isinstance(item, dict)]
+            n_safety = sources.count("SAFETY")
+            n_policy = sources.count("POLICY")
+            total += n_safety + n_policy
+            safety += n_safety
+            policy += n_policy
             continue
 
         # Fallback for older payloads: compare safety action list to recommended actions.
-        rec_actions = cf.get("recommended_next_actions") or []
-        safety_actions = cf.get("actions_added_by_safety") or []
-        if not isinstance(rec_actions, list) or not rec_actions:
-            continue
-
-        safety_set = {str(x).strip() for x in safety_actions if str(x).strip()} if isinstance(safety_actions, list) else set()
-        for action in rec_actions:
-            text = str(action).strip()
-            if not text:
-                continue
-            total += 1
-            if text in safety_set:
-                safety += 1
-            else:
-                policy += 1
+        texts, safety_set = _split_actions(cf)
+        n_safety = sum(text in safety_set for text in texts)
+        total += len(texts)
+        safety += n_safety
+        policy += len(texts) - n_safety
 
     return GovernanceProvenance(total_actions=total, safety_actions=safety, policy_actions=policy)
 
 
 def compute_trigger_coverage(per_case: list[dict[str, Any]], *, top_k: int = 20) -> list[TriggerCoverage]:
+    if not per_case:
+        return []
+
     index: dict[str, TriggerCoverage] = {}
-    counts: dict[str, int] = {}
-    samples: dict[str, list[str]] = {}
+    counts: Counter[str] = Counter()
+    samples: defaultdict[str, list[str]] = defaultdict(list)
 
     for row in per_case or []:
         case_id = str(row.get("id") or "").strip()
-        cf = dict(row.get("clinicaflow") or {})
+        cf = row.get("clinicaflow") or _EMPTY
         triggers = cf.get("safety_triggers") or []
         if not isinstance(triggers, list) or not triggers:
             continue
@@ -257,9 +311,9 @@ def compute_trigger_coverage(per_case: list[dict[str, Any]], *, top_k: int = 20)
                 continue
             seen.add(trig_id)
 
-            counts[trig_id] = counts.get(trig_id, 0) + 1
-            if case_id and len(samples.get(trig_id, [])) < 3:
-                samples.setdefault(trig_id, []).append(case_id)
+            counts[trig_id] += 1
+            if case_id and len(samples[trig_id]) < 3:
+                samples[trig_id].append(case_id)
 
             if trig_id not in index:
                 index[trig_id] = TriggerCoverage(
@@ -270,9 +324,10 @@ def compute_trigger_coverage(per_case: list[dict[str, Any]], *, top_k: int = 20)
                     sample_cases=[],
                 )
 
-    ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    # Only the top-k are needed: a bounded heap avoids sorting every distinct trigger.
+    ranked = heapq.nsmallest(max(0, int(top_k)), counts.items(), key=lambda kv: (-kv[1], kv[0]))
     out: list[TriggerCoverage] = []
-    for trig_id, n_cases in ranked[: max(0, int(top_k))]:
+    for trig_id, n_cases in ranked:
         base = index.get(trig_id)
         if not base:
             continue
@@ -296,8 +351,9 @@ def to_governance_markdown(
     provenance: GovernanceProvenance,
     triggers: list[TriggerCoverage],
     ops: OpsSloSummary | None = None,
+    generated_at: str | None = None,
 ) -> str:
-    generated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    generated_at = generated_at or utc_now_iso()
 
     def pct(v: float) -> str:
         return f"{float(v):.1f}%"
@@ -307,76 +363,68 @@ def to_governance_markdown(
             return "—"
         return f"{(100.0 * float(n) / float(d)):.1f}%"
 
-    lines: list[str] = []
-    lines.append("# ClinicaFlow — Safety governance report (synthetic)")
-    lines.append("")
-    lines.append("- DISCLAIMER: Decision support only. Not a diagnosis. No PHI.")
-    lines.append(f"- vignette_set: `{set_name}`")
-    lines.append(f"- generated_at: `{generated_at}`")
-    lines.append("")
-
-    lines.append("## Safety gate")
-    lines.append("")
-    lines.append(f"- gate_status: `{'PASS' if gate.ok else 'FAIL'}`")
-    lines.append(f"- under-triage (ClinicaFlow): `{pct(gate.under_triage_rate)}`")
-    lines.append(f"- red-flag recall (ClinicaFlow): `{pct(gate.red_flag_recall)}` (threshold ≥ {pct(gate.min_red_flag_recall)})")
-    lines.append(f"- over-triage (ClinicaFlow): `{pct(gate.over_triage_rate)}`")
-    lines.append("")
-
-    lines.append("## Benchmark summary")
-    lines.append("")
-    lines.append(summary.to_markdown_table())
-    lines.append("")
-
-    lines.append("## Action provenance")
-    lines.append("")
-    lines.append(f"- total_actions: `{provenance.total_actions}`")
-    lines.append(f"- safety_actions: `{provenance.safety_actions}` ({pct2(provenance.safety_actions, provenance.total_actions)})")
-    lines.append(f"- policy_actions: `{provenance.policy_actions}` ({pct2(provenance.policy_actions, provenance.total_actions)})")
-    lines.append("")
-
-    lines.append("## Ops SLO (benchmark run)")
-    lines.append("")
+    out = io.StringIO()
+    w = out.write
+    w(
+        "# ClinicaFlow — Safety governance report (synthetic)\n\n"
+        "- DISCLAIMER: Decision support only. Not a diagnosis. No PHI.\n"
+        f"- vignette_set: `{set_name}`\n"
+        f"- generated_at: `{generated_at}`\n\n"
+    )
+
+    w(
+        "## Safety gate\n\n"
+        f"- gate_status: `{'PASS' if gate.ok else 'FAIL'}`\n"
+        f"- under-triage (ClinicaFlow): `{pct(gate.under_triage_rate)}`\n"
+        f"- red-flag recall (ClinicaFlow): `{pct(gate.red_flag_recall)}` (threshold ≥ {pct(gate.min_red_flag_recall)})\n"
+        f"- over-triage (ClinicaFlow): `{pct(gate.over_triage_rate)}`\n\n"
+    )
+
+    w(f"## Benchmark summary\n\n{summary.to_markdown_table()}\n\n")
+
+    w(
+        "## Action provenance\n\n"
+        f"- total_actions: `{provenance.total_actions}`\n"
+        f"- safety_actions: `{provenance.safety_actions}` ({pct2(provenance.safety_actions, provenance.total_actions)})\n"
+        f"- policy_actions: `{provenance.policy_actions}` ({pct2(provenance.policy_actions, provenance.total_actions)})\n\n"
+    )
+
+    w("## Ops SLO (benchmark run)\n\n")
     if not ops or ops.n_cases_with_workflow <= 0:
-        lines.append("- (no per-case workflow traces available)")
-        lines.append("")
+        w("- (no per-case workflow traces available)\n\n")
     else:
-        lines.append(f"- cases_with_workflow: `{ops.n_cases_with_workflow}/{ops.n_cases}`")
-        lines.append(f"- cases_with_agent_errors: `{ops.cases_with_errors}/{ops.n_cases_with_workflow}`")
+        w(
+            f"- cases_with_workflow: `{ops.n_cases_with_workflow}/{ops.n_cases}`\n"
+            f"- cases_with_agent_errors: `{ops.cases_with_errors}/{ops.n_cases_with_workflow}`\n"
+        )
         if ops.total_p95_latency_ms is not None:
-            lines.append(f"- end_to_end_latency_p95_ms: `{ops.total_p95_latency_ms:.1f}`")
+            w(f"- end_to_end_latency_p95_ms: `{ops.total_p95_latency_ms:.1f}`\n")
         if ops.total_p50_latency_ms is not None:
-            lines.append(f"- end_to_end_latency_p50_ms: `{ops.total_p50_latency_ms:.1f}`")
-        lines.append("")
+            w(f"- end_to_end_latency_p50_ms: `{ops.total_p50_latency_ms:.1f}`\n")
 
-        lines.append("| Agent | Calls | Errors | Avg ms | p50 ms | p95 ms |")
-        lines.append("|---|---:|---:|---:|---:|---:|")
+        w("\n| Agent | Calls | Errors | Avg ms | p50 ms | p95 ms |\n|---|---:|---:|---:|---:|---:|\n")
         for agent in ops.agents:
             avg = f"{agent.avg_latency_ms:.1f}" if agent.avg_latency_ms is not None else "—"
             p50 = f"{agent.p50_latency_ms:.1f}" if agent.p50_latency_ms is not None else "—"
             p95 = f"{agent.p95_latency_ms:.1f}" if agent.p95_latency_ms is not None else "—"
-            lines.append(f"| `{agent.agent}` | `{agent.calls}` | `{agent.errors}` | `{avg}` | `{p50}` | `{p95}` |")
-        lines.append("")
+            w(f"| `{agent.agent}` | `{agent.calls}` | `{agent.errors}` | `{avg}` | `{p50}` | `{p95}` |\n")
+        w("\n")
 
-    lines.append("## Top safety triggers (case coverage)")
-    lines.append("")
+    w("## Top safety triggers (case coverage)\n\n")
     if not triggers:
-        lines.append("- (no safety triggers in benchmark output)")
+        w("- (no safety triggers in benchmark output)\n")
     else:
-        lines.append("| Trigger | Severity | Cases | Samples |")
-        lines.append("|---|---:|---:|---|")
+        w("| Trigger | Severity | Cases | Samples |\n|---|---:|---:|---|\n")
         for item in triggers:
             samples = ", ".join(item.sample_cases[:3])
-            lines.append(f"| `{item.label}` | `{item.severity}` | `{item.n_cases}` | `{samples}` |")
-    lines.append("")
+            w(f"| `{item.label}` | `{item.severity}` | `{item.n_cases}` | `{samples}` |\n")
+    w("\n")
 
-    lines.append("## Under-triage cases (should be empty)")
-    lines.append("")
+    w("## Under-triage cases (should be empty)\n\n")
     if gate.under_triage_rate == 0.0:
-        lines.append("- PASS — no under-triage cases detected.")
-        lines.append("")
+        w("- PASS — no under-triage cases detected.\n\n")
 
-    return "\n".join(lines).strip() + "\n"
+    return out.getvalue().strip() + "\n"
 
 
 def _format_safety_triggers(triggers: Any) -> list[str]:
@@ -404,24 +452,14 @@ def _format_actions_with_provenance(cf: dict[str, Any]) -> list[str]:
             if not isinstance(item, dict):
                 continue
             text = str(item.get("text") or "").strip()
-            src = str(item.get("source") or "").strip().upper()
-            if not text or src not in {"SAFETY", "POLICY"}:
+            src = _action_source(item.get("source"))
+            if not text or src not in _ACTION_SOURCES:
                 continue
             out.append(f"- [{src}] {text}")
         return out
 
-    rec = cf.get("recommended_next_actions") or []
-    safety = cf.get("actions_added_by_safety") or []
-    if not isinstance(rec, list) or not rec:
-        return []
-    safety_set = {str(x).strip() for x in safety if str(x).strip()} if isinstance(safety, list) else set()
-    out = []
-    for action in rec:
-        text = str(action).strip()
-        if not text:
-            continue
-        out.append(f"- [{'SAFETY' if text in safety_set else 'POLICY'}] {text}")
-    return out
+    texts, safety_set = _split_actions(cf)
+    return [f"- [{'SAFETY' if text in safety_set else 'POLICY'}] {text}" for text in texts]
 
 
 def _format_workflow(cf: dict[str, Any]) -> str:
@@ -445,6 +483,47 @@ def _format_workflow(cf: dict[str, Any]) -> str:
     return " • ".join(parts)
 
 
+def _risk_tier(row: dict[str, Any], key: str) -> str:
+    raw = (row.get(key) or _EMPTY).get("risk_tier")
+    # Benchmark rows carry canonical lowercase tiers; only normalize anything else.
+    if raw in _RISK_TIERS:
+        return raw
+    return str(raw or "").strip().lower()
+
+
+def _md_anchor(heading: str) -> str:
+    """GitHub-style anchor slug for a markdown heading."""
+
+    return re.sub(r"[^\w\- ]", "", heading.strip().lower()).replace(" ", "-")
+
+
+class _MarkdownSink:
+    """Forward markdown writes to `fh`, ending the document with exactly one newline.
+
+    Trailing newlines are held back until more text arrives, so streamed output
+    matches the `text.strip() + "\\n"` normalization used for in-memory reports.
+    """
+
+    __slots__ = ("_fh", "_pending")
+
+    def __init__(self, fh: TextIO) -> None:
+        self._fh = fh
+        self._pending = ""
+
+    def write(self, text: str) -> None:
+        body = text.rstrip("\n")
+        if not body:
+            self._pending += text
+            return
+        if self._pending:
+            self._fh.write(self._pending)
+        self._fh.write(body)
+        self._pending = text[len(body) :]
+
+    def finish(self) -> None:
+        self._fh.write("\n")
+
+
 def to_failure_packet_markdown(
     *,
     set_name: str,
@@ -453,13 +532,42 @@ def to_failure_packet_markdown(
     summary: VignetteBenchmarkSummary,
     gate: GovernanceGate,
     limit: int = 25,
+    generated_at: str | None = None,
 ) -> str:
-    generated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    buf = io.StringIO()
+    write_failure_packet_markdown(
+        buf,
+        set_name=set_name,
+        rows=rows,
+        per_case=per_case,
+        summary=summary,
+        gate=gate,
+        limit=limit,
+        generated_at=generated_at,
+    )
+    return buf.getvalue()
+
+
+def write_failure_packet_markdown(
+    fh: TextIO,
+    *,
+    set_name: str,
+    rows: list[dict[str, Any]],
+    per_case: list[dict[str, Any]],
+    summary: VignetteBenchmarkSummary,
+    gate: GovernanceGate,
+    limit: int = 25,
+    generated_at: str | None = None,
+) -> None:
+    """Stream the failure packet to `fh` (same content as `to_failure_packet_markdown`)."""
 
-    index = {str(r.get("id") or "").strip(): r for r in rows if str(r.get("id") or "").strip()}
+    generated_at = generated_at or utc_now_iso()
 
-    def tier(row: dict[str, Any], key: str) -> str:
-        return str(((row.get(key) or {}).get("risk_tier") or "")).strip().lower()
+    index: dict[str, dict[str, Any]] = {}
+    for r in rows:
+        rid = str(r.get("id") or "").strip()
+        if rid:
+            index[rid] = r
 
     def categories(row: dict[str, Any], key: str) -> str:
         cats = ((row.get(key) or {}).get("categories") or [])
@@ -467,41 +575,48 @@ def to_failure_packet_markdown(
             return ", ".join(str(x) for x in cats if str(x).strip())
         return str(cats)
 
-    def section(title: str, selected: list[dict[str, Any]]) -> list[str]:
-        lines: list[str] = []
-        lines.append(f"## {title}")
-        lines.append("")
+    sink = _MarkdownSink(fh)
+    w = sink.write
+    # Under/over-triage cases are also tier mismatches; render each case in full
+    # the first time it appears and link back to it afterwards. Keyed by row
+    # identity, since ids may be blank or repeated across distinct rows.
+    rendered: set[int] = set()
+
+    def section(title: str, selected: list[tuple[str, str, dict[str, Any]]]) -> None:
+        w(f"## {title}\n\n")
         if not selected:
-            lines.append("- (none)")
-            lines.append("")
-            return lines
+            w("- (none)\n\n")
+            return
 
-        for item in selected[: max(0, int(limit))]:
+        for gold_tier, pred_tier, item in selected[: max(0, int(limit))]:
             case_id = str(item.get("id") or "").strip()
-            gold_tier = tier(item, "gold")
-            pred_tier = tier(item, "clinicaflow")
-            cf = dict(item.get("clinicaflow") or {})
+            if case_id and id(item) in rendered:
+                w(f"- [{case_id}](#{_md_anchor(case_id)}) (shown above)\n\n")
+                continue
+            rendered.add(id(item))
+            cf = item.get("clinicaflow") or _EMPTY
 
-            lines.append(f"### {case_id}")
-            lines.append("")
-            lines.append(f"- gold: tier=`{gold_tier}` categories=`{categories(item, 'gold') or '(none)'}`")
-            lines.append(f"- pred: tier=`{pred_tier}` categories=`{categories(item, 'clinicaflow') or '(none)'}`")
+            w(
+                f"### {case_id}\n\n"
+                f"- gold: tier=`{gold_tier}` categories=`{categories(item, 'gold') or '(none)'}`\n"
+                f"- pred: tier=`{pred_tier}` categories=`{categories(item, 'clinicaflow') or '(none)'}`\n"
+            )
 
             rationale = str(cf.get("risk_tier_rationale") or "").strip()
             if rationale:
-                lines.append(f"- rationale: {rationale}")
+                w(f"- rationale: {rationale}\n")
 
             missing = cf.get("missing_fields") or []
             if isinstance(missing, list) and missing:
-                lines.append(f"- missing_fields: `{', '.join(str(x) for x in missing if str(x).strip())}`")
+                w(f"- missing_fields: `{', '.join(str(x) for x in missing if str(x).strip())}`\n")
 
             policy_sha = str(cf.get("policy_pack_sha256") or "").strip()
             if policy_sha:
-                lines.append(f"- policy_pack_sha256: `{policy_sha[:12]}…`")
+                w(f"- policy_pack_sha256: `{policy_sha[:12]}…`\n")
 
             rules_ver = str(cf.get("safety_rules_version") or "").strip()
             if rules_ver:
-                lines.append(f"- safety_rules_version: `{rules_ver}`")
+                w(f"- safety_rules_version: `{rules_ver}`\n")
 
             risk_scores = cf.get("risk_scores") or {}
             if isinstance(risk_scores, dict) and risk_scores:
@@ -513,86 +628,76 @@ def to_failure_packet_markdown(
                 if isinstance(risk_scores.get("qsofa"), (int, float)):
                     bits.append(f"qSOFA={risk_scores.get('qsofa')}{' (≥2)' if risk_scores.get('qsofa_high_risk') else ''}")
                 if bits:
-                    lines.append(f"- risk_scores: `{' • '.join(bits)}`")
+                    w(f"- risk_scores: `{' • '.join(bits)}`\n")
 
-            lines.append("")
+            w("\n")
             trig_lines = _format_safety_triggers(cf.get("safety_triggers"))
             if trig_lines:
-                lines.append("Safety triggers:")
-                lines.extend(trig_lines[:10])
+                w("Safety triggers:\n")
+                w("".join(f"{line}\n" for line in trig_lines[:10]))
                 if len(trig_lines) > 10:
-                    lines.append(f"- … ({len(trig_lines) - 10} more)")
-                lines.append("")
+                    w(f"- … ({len(trig_lines) - 10} more)\n")
+                w("\n")
 
             action_lines = _format_actions_with_provenance(cf)
             if action_lines:
-                lines.append("Recommended next actions (tagged):")
-                lines.extend(action_lines[:10])
+                w("Recommended next actions (tagged):\n")
+                w("".join(f"{line}\n" for line in action_lines[:10]))
                 if len(action_lines) > 10:
-                    lines.append(f"- … ({len(action_lines) - 10} more)")
-                lines.append("")
+                    w(f"- … ({len(action_lines) - 10} more)\n")
+                w("\n")
 
             wf = _format_workflow(cf)
             if wf:
-                lines.append(f"- workflow: `{wf}`")
-                lines.append("")
+                w(f"- workflow: `{wf}`\n\n")
 
             source = index.get(case_id) or {}
             intake = source.get("input")
             labels = source.get("labels")
             if isinstance(labels, dict) and labels:
-                lines.append("Gold labels:")
-                lines.append("```json")
-                lines.append(json.dumps(labels, indent=2, ensure_ascii=False))
-                lines.append("```")
-                lines.append("")
+                w(f"Gold labels:\n```json\n{dumps_vignette_json(labels)}\n```\n\n")
 
             if isinstance(intake, dict) and intake:
-                lines.append("Intake:")
-                lines.append("```json")
-                lines.append(json.dumps(intake, indent=2, ensure_ascii=False))
-                lines.append("```")
-                lines.append("")
+                w(f"Intake:\n```json\n{dumps_vignette_json(intake)}\n```\n\n")
 
         if len(selected) > max(0, int(limit)):
-            lines.append(f"- Note: truncated to first {int(limit)} cases.")
-            lines.append("")
+            w(f"- Note: truncated to first {int(limit)} cases.\n\n")
 
-        return lines
-
-    under = []
-    mismatch = []
-    over = []
+    # Tiers are computed once per row and carried alongside it into each bucket.
+    under: list[tuple[str, str, dict[str, Any]]] = []
+    mismatch: list[tuple[str, str, dict[str, Any]]] = []
+    over: list[tuple[str, str, dict[str, Any]]] = []
     for row in per_case or []:
-        gold_tier = tier(row, "gold")
-        pred_tier = tier(row, "clinicaflow")
-        if not gold_tier or not pred_tier:
+        gold_tier = _risk_tier(row, "gold")
+        pred_tier = _risk_tier(row, "clinicaflow")
+        if not gold_tier or not pred_tier or gold_tier == pred_tier:
             continue
-        if gold_tier in {"urgent", "critical"} and pred_tier == "routine":
-            under.append(row)
-        if gold_tier != pred_tier:
-            mismatch.append(row)
-        if gold_tier == "routine" and pred_tier in {"urgent", "critical"}:
-            over.append(row)
-
-    lines: list[str] = []
-    lines.append("# ClinicaFlow — Vignette failure analysis packet (synthetic)")
-    lines.append("")
-    lines.append("- DISCLAIMER: Decision support only. Not a diagnosis. No PHI.")
-    lines.append(f"- vignette_set: `{set_name}`")
-    lines.append(f"- generated_at: `{generated_at}`")
-    lines.append(f"- gate_status: `{'PASS' if gate.ok else 'FAIL'}` (under-triage={gate.under_triage_rate:.1f}%, recall={gate.red_flag_recall:.1f}%)")
-    lines.append("")
-    lines.append("## Summary")
-    lines.append("")
-    lines.append(summary.to_markdown_table())
-    lines.append("")
+        entry = (gold_tier, pred_tier, row)
+        mismatch.append(entry)
+        if pred_tier == "routine" and gold_tier in _URGENT_OR_CRITICAL:
+            under.append(entry)
+        elif gold_tier == "routine" and pred_tier in _URGENT_OR_CRITICAL:
+            over.append(entry)
+
+    w(
+        "# ClinicaFlow — Vignette failure analysis packet (synthetic)\n\n"
+        "- DISCLAIMER: Decision support only. Not a diagnosis. No PHI.\n"
+        f"- vignette_set: `{set_name}`\n"
+        f"- generated_at: `{generated_at}`\n"
+        f"- gate_status: `{'PASS' if gate.ok else 'FAIL'}` (under-triage={gate.under_triage_rate:.1f}%, recall={gate.red_flag_recall:.1f}%)\n\n"
+        f"## Summary\n\n{summary.to_markdown_table()}\n\n"
+    )
 
-    lines.extend(section("Under-triage (gold urgent/critical → predicted routine)", under))
-    lines.extend(section("Tier mismatches (gold ≠ pred)", mismatch))
-    lines.extend(section("Over-triage (gold routine → predicted urgent/critical)", over))
+    if not mismatch:
+        # Under/over-triage are subsets of the mismatches, so there is nothing to break down.
+        w("## Failures\n\n- PASS — every case matches its gold risk tier (no under-triage, mismatches, or over-triage).\n")
+        sink.finish()
+        return
 
-    return "\n".join(lines).strip() + "\n"
+    section("Under-triage (gold urgent/critical → predicted routine)", under)
+    section("Tier mismatches (gold ≠ pred)", mismatch)
+    section("Over-triage (gold routine → predicted urgent/critical)", over)
+    sink.finish()
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -614,8 +719,8 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
-def main() -> None:
-    args = build_parser().parse_args()
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
 
     if args.path:
         rows = load_vignettes(args.path)
@@ -627,6 +732,8 @@ def main() -> None:
         set_name = args.set
 
     summary, per_case = run_benchmark_rows(rows)
+    # One timestamp for every artifact produced by this run.
+    generated_at = utc_now_iso()
     gate = compute_gate(summary, min_red_flag_recall=float(args.min_recall))
     provenance = compute_action_provenance(per_case)
     triggers = compute_trigger_coverage(per_case, top_k=20)
@@ -639,34 +746,38 @@ def main() -> None:
         provenance=provenance,
         triggers=triggers,
         ops=ops,
+        generated_at=generated_at,
     )
 
     if args.out:
         args.out.parent.mkdir(parents=True, exist_ok=True)
         args.out.write_text(report_md, encoding="utf-8")
 
+    # The raw payload and failure packet scale with per_case; stream them to disk
+    # instead of materializing the whole document first.
     if args.bench_out:
         args.bench_out.parent.mkdir(parents=True, exist_ok=True)
-        args.bench_out.write_text(
-            json.dumps(
-                {"set": set_name, "summary": summary.to_dict(), "gate": gate.to_dict(), "ops": ops.to_dict(), "per_case": per_case},
+        with args.bench_out.open("w", encoding="utf-8") as fh:
+            json.dump(
+                {"set": set_name, "generated_at": generated_at, "summary": summary.to_dict(), "gate": gate.to_dict(), "ops": ops.to_dict(), "per_case": per_case},
+                fh,
                 indent=2,
                 ensure_ascii=False,
-            ),
-            encoding="utf-8",
-        )
+            )
 
     if args.failure_out:
-        md = to_failure_packet_markdown(
-            set_name=set_name,
-            rows=rows,
-            per_case=per_case,
-            summary=summary,
-            gate=gate,
-            limit=int(args.max_failures),
-        )
         args.failure_out.parent.mkdir(parents=True, exist_ok=True)
-        args.failure_out.write_text(md, encoding="utf-8")
+        with args.failure_out.open("w", encoding="utf-8") as fh:
+            write_failure_packet_markdown(
+                fh,
+                set_name=set_name,
+                rows=rows,
+                per_case=per_case,
+                summary=summary,
+                gate=gate,
+                limit=int(args.max_failures),
+                generated_at=generated_at,
+            )
 
     if not args.quiet:
         print(report_md)
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import argparse
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
-from clinicaflow.benchmarks.vignettes import load_default_vignette_paths, load_vignettes
-from clinicaflow.models import PatientIntake
-from clinicaflow.pipeline import ClinicaFlowPipeline
+from clinicaflow.benchmarks.vignettes import dumps_vignette_json, load_default_vignette_paths, load_vignettes
+from clinicaflow.models import PatientIntake, TriageResult
+from clinicaflow.pipeline import ClinicaFlowPipeline, get_pipeline
+
+_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -26,6 +29,12 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument("--limit", type=int, default=30, help="Limit number of cases (default: 30)")
     parser.add_argument("--include-gold", action="store_true", help="Include gold labels in the packet")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Cases to run through the pipeline concurrently (default: 1; raise for slow remote backends).",
+    )
     return parser
 
 
@@ -35,8 +44,24 @@ def build_review_packet_markdown(
     set_name: str,
     include_gold: bool,
     pipeline: ClinicaFlowPipeline,
+    workers: int = 1,
 ) -> str:
     rows = rows or []
+
+    def run_case(row: dict[str, Any]) -> TriageResult:
+        case_id = str(row.get("id", "")).strip()
+        intake = PatientIntake.from_mapping(row.get("input") or {})
+        return pipeline.run(intake, request_id=f"review-{case_id}" if case_id else None)
+
+    # Pipeline runs are independent; with remote reasoning backends they are
+    # dominated by network latency, so overlap them when asked to.
+    n_workers = max(1, min(32, int(workers), len(rows)))
+    if n_workers > 1:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(run_case, rows))
+    else:
+        results = [run_case(row) for row in rows]
+
     lines: list[str] = []
     lines.append("# ClinicaFlow — Clinician Review Packet (No PHI)")
     lines.append("")
@@ -57,28 +82,25 @@ def build_review_packet_markdown(
     lines.append("## Cases")
     lines.append("")
 
-    for row in rows:
+    for row, result in zip(rows, results):
         case_id = str(row.get("id", "")).strip()
-        case_input = dict(row.get("input") or {})
-        labels = dict(row.get("labels") or {})
-
-        intake = PatientIntake.from_mapping(case_input)
-        req_id = f"review-{case_id}" if case_id else None
-        result = pipeline.run(intake, request_id=req_id)
+        # Read-only views: from_mapping already copies what the intake keeps.
+        case_input = row.get("input") or {}
+        labels = row.get("labels") or {}
 
         lines.append(f"### {case_id}")
         lines.append("")
         lines.append("**Intake (vignette):**")
         lines.append("")
         lines.append("```json")
-        lines.append(json.dumps(case_input, indent=2, ensure_ascii=False))
+        lines.append(dumps_vignette_json(case_input))
         lines.append("```")
         lines.append("")
         if include_gold:
             lines.append("**Gold label (for regression):**")
             lines.append("")
             lines.append("```json")
-            lines.append(json.dumps(labels, indent=2, ensure_ascii=False))
+            lines.append(dumps_vignette_json(labels))
             lines.append("```")
             lines.append("")
 
@@ -94,7 +116,7 @@ def build_review_packet_markdown(
             "uncertainty_reasons": result.uncertainty_reasons,
         }
         lines.append("```json")
-        lines.append(json.dumps(preview, indent=2, ensure_ascii=False))
+        lines.append(_JSON_ENCODER.encode(preview))
         lines.append("```")
         lines.append("")
         lines.append("**Reviewer feedback (free text):**")
@@ -109,8 +131,8 @@ def build_review_packet_markdown(
     return "\n".join(lines).strip() + "\n"
 
 
-def main() -> None:
-    args = build_parser().parse_args()
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
     if args.path:
         rows = load_vignettes(args.path)
         set_name = "custom"
@@ -121,7 +143,7 @@ def main() -> None:
             rows.extend(load_vignettes(p))
     rows = rows[: max(0, args.limit)]
 
-    pipeline = ClinicaFlowPipeline()
+    pipeline = get_pipeline()
 
     args.out.parent.mkdir(parents=True, exist_ok=True)
     md = build_review_packet_markdown(
@@ -129,6 +151,7 @@ def main() -> None:
         set_name=set_name,
         include_gold=bool(args.include_gold),
         pipeline=pipeline,
+        workers=int(args.workers),
     )
     args.out.write_text(md, encoding="utf-8")
 
@@ -8,6 +8,9 @@ from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any
 
+# Read-only fallback for missing nested review objects (never mutated).
+_EMPTY: dict[str, Any] = {}
+
 
 @dataclass(frozen=True, slots=True)
 class ReviewSummary:
@@ -22,20 +25,25 @@ class ReviewSummary:
         return asdict(self)
 
     def to_markdown(self) -> str:
-        lines: list[str] = []
-        lines.append("## Clinician review (qualitative; no PHI)")
-        lines.append("")
-        lines.append(f"- Reviews: **{self.n_reviews}** (cases: **{self.n_cases}**)")
-        if self.reviewer_roles:
-            lines.append(f"- Reviewer roles (as entered): {', '.join(self.reviewer_roles)}")
-        if self.safety_counts:
-            parts = [f"{k}={v}" for k, v in sorted(self.safety_counts.items(), key=lambda kv: (-kv[1], kv[0]))]
-            lines.append(f"- Risk-tier safety: {', '.join(parts)}")
-        if self.avg_actionability is not None:
-            lines.append(f"- Avg actionability: **{self.avg_actionability:.2f}/5**")
-        if self.avg_handoff is not None:
-            lines.append(f"- Avg handoff quality: **{self.avg_handoff:.2f}/5**")
-        return "\n".join(lines).strip() + "\n"
+        # Optional rows render as "" when absent, so the whole block is one template.
+        roles_line = f"- Reviewer roles (as entered): {', '.join(self.reviewer_roles)}\n" if self.reviewer_roles else ""
+        safety_line = (
+            "- Risk-tier safety: "
+            + ", ".join(f"{k}={v}" for k, v in self.safety_counts.items())
+            + "\n"
+            if self.safety_counts
+            else ""
+        )
+        actionability_line = (
+            f"- Avg actionability: **{self.avg_actionability:.2f}/5**\n" if self.avg_actionability is not None else ""
+        )
+        handoff_line = f"- Avg handoff quality: **{self.avg_handoff:.2f}/5**\n" if self.avg_handoff is not None else ""
+        return (
+            "## Clinician review (qualitative; no PHI)\n"
+            "\n"
+            f"- Reviews: **{self.n_reviews}** (cases: **{self.n_cases}**)\n"
+            f"{roles_line}{safety_line}{actionability_line}{handoff_line}"
+        )
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -55,40 +63,16 @@ def load_reviews(path: Path) -> list[dict[str, Any]]:
 
 
 def summarize_reviews(reviews: list[dict[str, Any]]) -> tuple[ReviewSummary, list[str]]:
-    safety = Counter()
-    actionability: list[float] = []
-    handoff: list[float] = []
-    roles: set[str] = set()
-    case_ids: set[str] = set()
-    quotes: list[str] = []
-
-    for r in reviews:
-        case_id = str(r.get("case_id") or "").strip()
-        if case_id:
-            case_ids.add(case_id)
-
-        reviewer = dict(r.get("reviewer") or {})
-        role = str(reviewer.get("role") or "").strip()
-        if role:
-            roles.add(role)
-
-        ratings = dict(r.get("ratings") or {})
-        safety_raw = str(ratings.get("risk_tier_safety") or "").strip().lower()
-        if safety_raw:
-            safety[safety_raw] += 1
-
-        a = ratings.get("actionability")
-        if isinstance(a, (int, float)):
-            actionability.append(float(a))
-
-        h = ratings.get("handoff_quality")
-        if isinstance(h, (int, float)):
-            handoff.append(float(h))
+    # Each field is gathered by a comprehension/constructor over the reviews so the
+    # counting and set-building loops run in C rather than as per-item statements.
+    ratings = [r.get("ratings") or _EMPTY for r in reviews]
 
-        notes = dict(r.get("notes") or {})
-        fb = str(notes.get("feedback") or "").strip()
-        if fb:
-            quotes.append(fb)
+    case_ids = {x for x in (str(r.get("case_id") or "").strip() for r in reviews) if x}
+    roles = {x for x in (str((r.get("reviewer") or _EMPTY).get("role") or "").strip() for r in reviews) if x}
+    safety = Counter(x for x in (str(rt.get("risk_tier_safety") or "").strip().lower() for rt in ratings) if x)
+    actionability = [float(x) for x in (rt.get("actionability") for rt in ratings) if isinstance(x, (int, float))]
+    handoff = [float(x) for x in (rt.get("handoff_quality") for rt in ratings) if isinstance(x, (int, float))]
+    quotes = [x for x in (str((r.get("notes") or _EMPTY).get("feedback") or "").strip() for r in reviews) if x]
 
     def mean_or_none(values: list[float]) -> float | None:
         return round(statistics.mean(values), 2) if values else None
@@ -96,7 +80,8 @@ def summarize_reviews(reviews: list[dict[str, Any]]) -> tuple[ReviewSummary, lis
     summary = ReviewSummary(
         n_reviews=len(reviews),
         n_cases=len(case_ids),
-        safety_counts=dict(safety),
+        # Stored most-common first (ties by label) so renderers iterate it as-is.
+        safety_counts=dict(sorted(safety.items(), key=lambda kv: (-kv[1], kv[0]))),
         avg_actionability=mean_or_none(actionability),
         avg_handoff=mean_or_none(handoff),
         reviewer_roles=sorted(roles),
@@ -127,7 +112,7 @@ def render_by_set(groups: dict[str, list[dict[str, Any]]]) -> str:
         lines.append("")
         lines.append(f"- Reviews: **{summary.n_reviews}** (cases: **{summary.n_cases}**)")
         if summary.safety_counts:
-            parts = [f"{k}={v}" for k, v in sorted(summary.safety_counts.items(), key=lambda kv: (-kv[1], kv[0]))]
+            parts = [f"{k}={v}" for k, v in summary.safety_counts.items()]
             lines.append(f"- Risk-tier safety: {', '.join(parts)}")
         if summary.avg_actionability is not None:
             lines.append(f"- Avg actionability: **{summary.avg_actionability:.2f}/5**")
@@ -151,8 +136,8 @@ def render_quotes(quotes: list[str], *, limit: int) -> str:
     return "\n".join(lines).strip() + "\n"
 
 
-def main() -> None:
-    args = build_parser().parse_args()
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
     reviews = load_reviews(args.in_path)
     summary, quotes = summarize_reviews(reviews)
 
@@ -2,13 +2,29 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import random
+import re
 import statistics
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass
+from itertools import compress
 from pathlib import Path
 
 from clinicaflow.models import PatientIntake
-from clinicaflow.pipeline import ClinicaFlowPipeline
+from clinicaflow.pipeline import get_pipeline
+
+
+def _pct(value: float) -> str:
+    return f"{value:.1f}%"
+
+
+def _minutes(value: float) -> str:
+    return f"{value:.2f} min"
+
+
+def _score(value: float) -> str:
+    return f"{value:.2f}/5"
 
 
 @dataclass(frozen=True, slots=True)
@@ -29,35 +45,25 @@ class BenchmarkSummary:
         return asdict(self)
 
     def to_markdown_table(self) -> str:
-        def pct(value: float) -> str:
-            return f"{value:.1f}%"
-
-        def minutes(value: float) -> str:
-            return f"{value:.2f} min"
-
-        def score(value: float) -> str:
-            return f"{value:.2f}/5"
-
         delta_red = self.red_flag_recall_clinicaflow - self.red_flag_recall_baseline
         delta_unsafe = self.unsafe_rate_clinicaflow - self.unsafe_rate_baseline
         delta_time_pct = (
             100.0
             * (self.median_writeup_time_min_clinicaflow - self.median_writeup_time_min_baseline)
-            / self.median_writeup_time_min_baseline
+            / (self.median_writeup_time_min_baseline or 1.0)
         )
         delta_completeness = self.handoff_completeness_clinicaflow - self.handoff_completeness_baseline
         delta_usefulness = self.usefulness_clinicaflow - self.usefulness_baseline
 
-        lines = [
-            "| Metric | Baseline | ClinicaFlow | Delta |",
-            "|---|---:|---:|---:|",
-            f"| Red-flag recall | `{pct(self.red_flag_recall_baseline)}` | `{pct(self.red_flag_recall_clinicaflow)}` | `{delta_red:+.1f} pp` |",
-            f"| Unsafe recommendation rate | `{pct(self.unsafe_rate_baseline)}` | `{pct(self.unsafe_rate_clinicaflow)}` | `{delta_unsafe:+.1f} pp` |",
-            f"| Median triage write-up time (proxy) | `{minutes(self.median_writeup_time_min_baseline)}` | `{minutes(self.median_writeup_time_min_clinicaflow)}` | `{delta_time_pct:+.1f}%` |",
-            f"| Handoff completeness (0-5 proxy) | `{score(self.handoff_completeness_baseline)}` | `{score(self.handoff_completeness_clinicaflow)}` | `{delta_completeness:+.2f}` |",
-            f"| Clinician usefulness (0-5 proxy) | `{score(self.usefulness_baseline)}` | `{score(self.usefulness_clinicaflow)}` | `{delta_usefulness:+.2f}` |",
-        ]
-        return "\n".join(lines)
+        return (
+            "| Metric | Baseline | ClinicaFlow | Delta |\n"
+            "|---|---:|---:|---:|\n"
+            f"| Red-flag recall | `{_pct(self.red_flag_recall_baseline)}` | `{_pct(self.red_flag_recall_clinicaflow)}` | `{delta_red:+.1f} pp` |\n"
+            f"| Unsafe recommendation rate | `{_pct(self.unsafe_rate_baseline)}` | `{_pct(self.unsafe_rate_clinicaflow)}` | `{delta_unsafe:+.1f} pp` |\n"
+            f"| Median triage write-up time (proxy) | `{_minutes(self.median_writeup_time_min_baseline)}` | `{_minutes(self.median_writeup_time_min_clinicaflow)}` | `{delta_time_pct:+.1f}%` |\n"
+            f"| Handoff completeness (0-5 proxy) | `{_score(self.handoff_completeness_baseline)}` | `{_score(self.handoff_completeness_clinicaflow)}` | `{delta_completeness:+.2f}` |\n"
+            f"| Clinician usefulness (0-5 proxy) | `{_score(self.usefulness_baseline)}` | `{_score(self.usefulness_clinicaflow)}` | `{delta_usefulness:+.2f}` |"
+        )
 
 
 SYMPTOM_TEMPLATES = [
@@ -102,6 +108,27 @@ TRUTH_SYMPTOM_MAP = {
     "weakness one side": "Possible stroke",
 }
 
+# One scan per case instead of a substring test per key. The lookahead lets
+# matches start at every position, so overlapping keys are all reported.
+_TRUTH_SYMPTOM_RE = re.compile("(?=(" + "|".join(map(re.escape, TRUTH_SYMPTOM_MAP)) + "))")
+
+_FLAG_LOW_SPO2 = "Low oxygen saturation (<92%)"
+_FLAG_HYPOTENSION = "Hypotension (SBP < 90)"
+_FLAG_TACHYCARDIA = "Severe tachycardia (HR > 130)"
+_FLAG_HIGH_FEVER = "High fever (>= 39.5°C)"
+
+# One bit per distinct truth flag, numbered in sorted-label order. A case's flags fold
+# into a single int: OR-ing rule hits dedupes for free and bit_count() is the flag count.
+_TRUTH_FLAG_NAMES: tuple[str, ...] = tuple(
+    sorted({*TRUTH_SYMPTOM_MAP.values(), _FLAG_LOW_SPO2, _FLAG_HYPOTENSION, _FLAG_TACHYCARDIA, _FLAG_HIGH_FEVER})
+)
+_TRUTH_FLAG_BIT = {name: 1 << i for i, name in enumerate(_TRUTH_FLAG_NAMES)}
+_TRUTH_SYMPTOM_BIT = {key: _TRUTH_FLAG_BIT[name] for key, name in TRUTH_SYMPTOM_MAP.items()}
+_BIT_LOW_SPO2 = _TRUTH_FLAG_BIT[_FLAG_LOW_SPO2]
+_BIT_HYPOTENSION = _TRUTH_FLAG_BIT[_FLAG_HYPOTENSION]
+_BIT_TACHYCARDIA = _TRUTH_FLAG_BIT[_FLAG_TACHYCARDIA]
+_BIT_HIGH_FEVER = _TRUTH_FLAG_BIT[_FLAG_HIGH_FEVER]
+
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
@@ -111,73 +138,107 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--n", type=int, default=220, help="Number of synthetic cases (default: 220)")
     parser.add_argument("--out", type=Path, help="Optional path to write JSON summary")
     parser.add_argument("--print-markdown", action="store_true", help="Print the markdown table")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=f"Worker processes for runs of at least {_PARALLEL_MIN_CASES} cases (default: 1 = serial)",
+    )
     return parser
 
 
-def synth_case(rng: random.Random) -> dict:
-    n_symptoms = rng.choice([1, 2, 2, 3])
-    chosen = rng.sample(SYMPTOM_TEMPLATES, n_symptoms)
-    chief_complaint = ", ".join(chosen)
+_N_SYMPTOM_CHOICES = (1, 2, 2, 3)
+_N_RISK_FACTOR_CHOICES = (0, 1, 1, 2)
 
-    history_factors = rng.sample(RISK_FACTORS, rng.choice([0, 1, 1, 2]))
-    history = "history of " + (", ".join(history_factors) if history_factors else "none")
 
-    heart_rate = int(max(48, min(165, rng.gauss(94, 20))))
-    systolic_bp = int(max(72, min(175, rng.gauss(117, 20))))
-    temperature_c = round(max(35.6, min(40.5, rng.gauss(37.5, 1.0))), 1)
-    spo2 = int(max(84, min(100, rng.gauss(96, 3))))
+def synth_case(rng: random.Random) -> dict:
+    return synth_cases(rng, 1)[0]
+
+
+def synth_cases(rng: random.Random, n_cases: int) -> list[dict]:
+    """Draw `n_cases` synthetic intakes.
+
+    The draw order per case is fixed so seeded runs reproduce the write-up
+    numbers exactly; only the per-call lookups are hoisted out of the loop.
+    """
+
+    choice = rng.choice
+    sample = rng.sample
+    gauss = rng.gauss
+    uniform = rng.random
+    randint = rng.randint
+
+    cases: list[dict] = []
+    append = cases.append
+    for _ in range(n_cases):
+        chosen = sample(SYMPTOM_TEMPLATES, choice(_N_SYMPTOM_CHOICES))
+        history_factors = sample(RISK_FACTORS, choice(_N_RISK_FACTOR_CHOICES))
+
+        heart_rate = int(max(48, min(165, gauss(94, 20))))
+        systolic_bp = int(max(72, min(175, gauss(117, 20))))
+        temperature_c = round(max(35.6, min(40.5, gauss(37.5, 1.0))), 1)
+        spo2 = int(max(84, min(100, gauss(96, 3))))
+
+        if uniform() < 0.10:
+            spo2 = randint(86, 91)
+        if uniform() < 0.07:
+            systolic_bp = randint(78, 89)
+        if uniform() < 0.09:
+            heart_rate = randint(132, 152)
+
+        append(
+            {
+                "chief_complaint": ", ".join(chosen),
+                "history": "history of " + (", ".join(history_factors) if history_factors else "none"),
+                "vitals": {
+                    "heart_rate": heart_rate,
+                    "systolic_bp": systolic_bp,
+                    "temperature_c": temperature_c,
+                    "spo2": spo2,
+                },
+            }
+        )
+    return cases
 
-    if rng.random() < 0.10:
-        spo2 = rng.randint(86, 91)
-    if rng.random() < 0.07:
-        systolic_bp = rng.randint(78, 89)
-    if rng.random() < 0.09:
-        heart_rate = rng.randint(132, 152)
 
-    return {
-        "chief_complaint": chief_complaint,
-        "history": history,
-        "vitals": {
-            "heart_rate": heart_rate,
-            "systolic_bp": systolic_bp,
-            "temperature_c": temperature_c,
-            "spo2": spo2,
-        },
-    }
+def _true_flag_mask(case: dict) -> int:
+    """Return the case's truth flags as a bitmask over `_TRUTH_FLAG_NAMES`."""
 
-
-def true_red_flags(case: dict) -> list[str]:
     text = f"{case['chief_complaint']} {case['history']}".lower()
-    flags: list[str] = []
-    for key, reason in TRUTH_SYMPTOM_MAP.items():
-        if key in text:
-            flags.append(reason)
+    mask = 0
+    for key in _TRUTH_SYMPTOM_RE.findall(text):
+        mask |= _TRUTH_SYMPTOM_BIT[key]
 
     vitals = case["vitals"]
-    if vitals["spo2"] < 92:
-        flags.append("Low oxygen saturation (<92%)")
-    if vitals["systolic_bp"] < 90:
-        flags.append("Hypotension (SBP < 90)")
-    if vitals["heart_rate"] > 130:
-        flags.append("Severe tachycardia (HR > 130)")
-    if vitals["temperature_c"] >= 39.5:
-        flags.append("High fever (>= 39.5°C)")
+    return (
+        mask
+        | (vitals["spo2"] < 92) * _BIT_LOW_SPO2
+        | (vitals["systolic_bp"] < 90) * _BIT_HYPOTENSION
+        | (vitals["heart_rate"] > 130) * _BIT_TACHYCARDIA
+        | (vitals["temperature_c"] >= 39.5) * _BIT_HIGH_FEVER
+    )
 
-    return sorted(set(flags))
 
+def true_red_flags(case: dict) -> list[str]:
+    # Bits are numbered in sorted-label order, so decoding the mask low-to-high yields
+    # the sorted, deduplicated label list directly.
+    mask = _true_flag_mask(case)
+    return [name for i, name in enumerate(_TRUTH_FLAG_NAMES) if mask >> i & 1]
 
-def true_risk_tier(case: dict) -> str:
-    flags = true_red_flags(case)
-    vitals = case["vitals"]
-    vital_concern = vitals["heart_rate"] >= 110 or vitals["temperature_c"] >= 38.5 or vitals["spo2"] < 95
 
-    if len(flags) >= 2:
+def _risk_tier_for(n_flags: int, vitals: dict) -> str:
+    if n_flags >= 2:
         return "critical"
-    if len(flags) >= 1 or vital_concern:
+    if n_flags >= 1 or vitals["heart_rate"] >= 110 or vitals["temperature_c"] >= 38.5 or vitals["spo2"] < 95:
         return "urgent"
     return "routine"
 
 
+def true_risk_tier(case: dict, *, flags: list[str] | None = None) -> str:
+    n_flags = _true_flag_mask(case).bit_count() if flags is None else len(flags)
+    return _risk_tier_for(n_flags, case["vitals"])
+
+
 def baseline_predict(case: dict) -> dict:
     """A vitals-first baseline intended to be plausible but non-agentic."""
     text = case["chief_complaint"].lower()
@@ -212,18 +273,7 @@ def baseline_predict(case: dict) -> dict:
 
 
 def completeness_score(*, risk_tier: str, red_flags: list[str], differential: list[str], actions: list[str], patient_summary: str) -> int:
-    score = 0
-    if risk_tier:
-        score += 1
-    if red_flags:
-        score += 1
-    if differential:
-        score += 1
-    if actions:
-        score += 1
-    if patient_summary:
-        score += 1
-    return score
+    return bool(risk_tier) + bool(red_flags) + bool(differential) + bool(actions) + bool(patient_summary)
 
 
 def usefulness_proxy(*, completeness: int, unsafe: bool) -> float:
@@ -233,63 +283,87 @@ def usefulness_proxy(*, completeness: int, unsafe: bool) -> float:
     return max(1.0, min(5.0, round(base, 2)))
 
 
-def run_benchmark(*, seed: int, n_cases: int) -> BenchmarkSummary:
-    rng = random.Random(seed)
-    pipeline = ClinicaFlowPipeline()
-
-    cases = [synth_case(rng) for _ in range(n_cases)]
+# Per-case work is well under a millisecond, so worker start-up only pays off on large runs.
+_PARALLEL_MIN_CASES = 2000
 
-    true_red_cases = 0
-    hit_red_baseline = 0
-    hit_red_clinicaflow = 0
 
-    unsafe_baseline = 0
-    unsafe_clinicaflow = 0
+def _score_case(case: dict) -> tuple[bool, bool, bool, bool, bool, int, int]:
+    """Score one synthetic case against baseline and ClinicaFlow.
 
-    completeness_baseline: list[int] = []
-    completeness_clinicaflow: list[int] = []
-    usefulness_baseline: list[float] = []
-    usefulness_clinicaflow: list[float] = []
+    Returns `(has_true_flags, baseline_hit, clinicaflow_hit, baseline_unsafe,
+    clinicaflow_unsafe, baseline_completeness, clinicaflow_completeness)`.
+    Top-level (and pipeline-free in its arguments) so it can run in worker processes.
+    """
 
-    for case in cases:
-        true_flags = true_red_flags(case)
-        true_risk = true_risk_tier(case)
+    # Only "any flag" and the flag count matter here, so skip building the label list.
+    true_flag_mask = _true_flag_mask(case)
+    true_risk = _risk_tier_for(true_flag_mask.bit_count(), case["vitals"])
 
-        baseline = baseline_predict(case)
-        cf = pipeline.run(PatientIntake.from_mapping(case))
+    baseline = baseline_predict(case)
+    cf = get_pipeline().run(PatientIntake.from_mapping(case))
 
-        if true_flags:
-            true_red_cases += 1
-            if baseline["red_flags"]:
-                hit_red_baseline += 1
-            if cf.red_flags:
-                hit_red_clinicaflow += 1
+    needs_escalation = true_risk != "routine"
+    baseline_completeness = completeness_score(
+        risk_tier=baseline["risk_tier"],
+        red_flags=baseline["red_flags"],
+        differential=baseline["differential"],
+        actions=baseline["actions"],
+        patient_summary=baseline["patient_summary"],
+    )
+    cf_completeness = completeness_score(
+        risk_tier=cf.risk_tier,
+        red_flags=cf.red_flags,
+        differential=cf.differential_considerations,
+        actions=cf.recommended_next_actions,
+        patient_summary=cf.patient_summary,
+    )
+    return (
+        bool(true_flag_mask),
+        bool(baseline["red_flags"]),
+        bool(cf.red_flags),
+        needs_escalation and baseline["risk_tier"] == "routine",
+        needs_escalation and cf.risk_tier == "routine",
+        baseline_completeness,
+        cf_completeness,
+    )
 
-        baseline_unsafe = true_risk in {"urgent", "critical"} and baseline["risk_tier"] == "routine"
-        cf_unsafe = true_risk in {"urgent", "critical"} and cf.risk_tier == "routine"
 
-        unsafe_baseline += int(baseline_unsafe)
-        unsafe_clinicaflow += int(cf_unsafe)
+def run_benchmark(*, seed: int, n_cases: int, workers: int = 1) -> BenchmarkSummary:
+    rng = random.Random(seed)
+    cases = synth_cases(rng, n_cases)
+
+    # Cases are independent; large runs can fan out over processes. Results come back
+    # in case order, so the summary is identical to a serial run.
+    n_workers = max(1, min(int(workers), os.cpu_count() or 1))
+    if n_workers > 1 and n_cases >= _PARALLEL_MIN_CASES:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            scores = list(pool.map(_score_case, cases, chunksize=max(1, n_cases // (4 * n_workers))))
+    else:
+        scores = [_score_case(case) for case in cases]
 
-        baseline_completeness = completeness_score(
-            risk_tier=baseline["risk_tier"],
-            red_flags=baseline["red_flags"],
-            differential=baseline["differential"],
-            actions=baseline["actions"],
-            patient_summary=baseline["patient_summary"],
-        )
-        cf_completeness = completeness_score(
-            risk_tier=cf.risk_tier,
-            red_flags=cf.red_flags,
-            differential=cf.differential_considerations,
-            actions=cf.recommended_next_actions,
-            patient_summary=cf.patient_summary,
+    # Transpose the per-case tuples into one column per metric and reduce each column
+    # in a single pass, rather than growing six accumulator lists inside a loop.
+    if scores:
+        has_flags, baseline_hit, cf_hit, baseline_unsafe, cf_unsafe, completeness_baseline, completeness_clinicaflow = (
+            zip(*scores)
         )
+    else:
+        has_flags = baseline_hit = cf_hit = baseline_unsafe = cf_unsafe = ()
+        completeness_baseline = completeness_clinicaflow = ()
+
+    true_red_cases = sum(has_flags)
+    hit_red_baseline = sum(compress(baseline_hit, has_flags))
+    hit_red_clinicaflow = sum(compress(cf_hit, has_flags))
+
+    unsafe_baseline = sum(baseline_unsafe)
+    unsafe_clinicaflow = sum(cf_unsafe)
 
-        completeness_baseline.append(baseline_completeness)
-        completeness_clinicaflow.append(cf_completeness)
-        usefulness_baseline.append(usefulness_proxy(completeness=baseline_completeness, unsafe=baseline_unsafe))
-        usefulness_clinicaflow.append(usefulness_proxy(completeness=cf_completeness, unsafe=cf_unsafe))
+    usefulness_baseline = [
+        usefulness_proxy(completeness=c, unsafe=u) for c, u in zip(completeness_baseline, baseline_unsafe)
+    ]
+    usefulness_clinicaflow = [
+        usefulness_proxy(completeness=c, unsafe=u) for c, u in zip(completeness_clinicaflow, cf_unsafe)
+    ]
 
     red_recall_baseline = 100.0 * hit_red_baseline / max(1, true_red_cases)
     red_recall_cf = 100.0 * hit_red_clinicaflow / max(1, true_red_cases)
@@ -318,9 +392,9 @@ def run_benchmark(*, seed: int, n_cases: int) -> BenchmarkSummary:
     )
 
 
-def main() -> None:
-    args = build_parser().parse_args()
-    summary = run_benchmark(seed=args.seed, n_cases=args.n)
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    summary = run_benchmark(seed=args.seed, n_cases=args.n, workers=args.workers)
 
     payload = summary.to_dict()
     if args.out:
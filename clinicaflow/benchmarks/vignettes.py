@@ -2,12 +2,18 @@ from __future__ import annotations
 
 import argparse
 import json
+import re
 from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 from clinicaflow.models import PatientIntake
-from clinicaflow.pipeline import ClinicaFlowPipeline
+from clinicaflow.pipeline import get_pipeline
+
+
+def _pct(v: float) -> str:
+    return f"{v:.1f}%"
 
 
 @dataclass(frozen=True, slots=True)
@@ -25,15 +31,12 @@ class VignetteBenchmarkSummary:
         return asdict(self)
 
     def to_markdown_table(self) -> str:
-        def pct(v: float) -> str:
-            return f"{v:.1f}%"
-
         lines = [
             "| Metric | Baseline | ClinicaFlow |",
             "|---|---:|---:|",
-            f"| Red-flag recall (category-level) | `{pct(self.red_flag_recall_baseline)}` | `{pct(self.red_flag_recall_clinicaflow)}` |",
-            f"| Under-triage rate (gold urgent/critical → predicted routine) | `{pct(self.under_triage_rate_baseline)}` | `{pct(self.under_triage_rate_clinicaflow)}` |",
-            f"| Over-triage rate (gold routine → predicted urgent/critical) | `{pct(self.over_triage_rate_baseline)}` | `{pct(self.over_triage_rate_clinicaflow)}` |",
+            f"| Red-flag recall (category-level) | `{_pct(self.red_flag_recall_baseline)}` | `{_pct(self.red_flag_recall_clinicaflow)}` |",
+            f"| Under-triage rate (gold urgent/critical → predicted routine) | `{_pct(self.under_triage_rate_baseline)}` | `{_pct(self.under_triage_rate_clinicaflow)}` |",
+            f"| Over-triage rate (gold routine → predicted urgent/critical) | `{_pct(self.over_triage_rate_baseline)}` | `{_pct(self.over_triage_rate_clinicaflow)}` |",
         ]
         return "\n".join(lines)
 
@@ -99,15 +102,30 @@ def load_default_vignette_paths(set_name: str) -> list[Path]:
 
 
 def load_vignettes(path: Path) -> list[dict[str, Any]]:
+    # Stream the JSONL file line by line; `json.loads` accepts UTF-8 bytes directly,
+    # so there is no whole-file decode or `splitlines` copy.
     rows: list[dict[str, Any]] = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        raw = line.strip()
-        if not raw:
-            continue
-        rows.append(json.loads(raw))
+    with path.open("rb") as fh:
+        for line in fh:
+            raw = line.strip()
+            if not raw:
+                continue
+            rows.append(json.loads(raw))
     return rows
 
 
+# Read-only fallback for rows without an input/labels mapping (never mutated).
+_EMPTY: dict[str, Any] = {}
+
+_VIGNETTE_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
+def dumps_vignette_json(obj: Any) -> str:
+    """Pretty-print a vignette mapping (`json.dumps(obj, indent=2, ensure_ascii=False)`)."""
+
+    return _VIGNETTE_JSON_ENCODER.encode(obj)
+
+
 def _category_set(categories: Any) -> set[str]:
     if not categories:
         return set()
@@ -116,39 +134,42 @@ def _category_set(categories: Any) -> set[str]:
     return {str(categories).strip()}
 
 
+_RED_FLAG_CATEGORY_PHRASES: dict[str, str] = {
+    "Potential acute coronary syndrome": "cardiopulmonary",
+    "Respiratory compromise risk": "cardiopulmonary",
+    "Possible stroke": "neurologic",
+    "Possible neurological or metabolic emergency": "neurologic",
+    "Possible intracranial pathology": "neurologic",
+    "Possible gastrointestinal bleed": "gi_bleed",
+    "Possible upper GI bleed": "gi_bleed",
+    "Possible obstetric emergency": "obstetric",
+    "Syncope requiring urgent evaluation": "syncope",
+    "Low oxygen saturation": "hypoxemia",
+    "Hypotension": "hemodynamic",
+    "Severe tachycardia": "hemodynamic",
+    "High fever": "sepsis",
+}
+# Lookahead alternation: every phrase occurrence is reported, even overlapping ones.
+_RED_FLAG_CATEGORY_RE = re.compile("(?=(" + "|".join(map(re.escape, _RED_FLAG_CATEGORY_PHRASES)) + "))")
+
+
+@lru_cache(maxsize=4096)
+def _categories_from_flag_text(text: str) -> frozenset[str]:
+    return frozenset(_RED_FLAG_CATEGORY_PHRASES[phrase] for phrase in _RED_FLAG_CATEGORY_RE.findall(text))
+
+
 def categories_from_red_flags(red_flags: list[str]) -> set[str]:
-    cats: set[str] = set()
-    for flag in red_flags:
-        f = str(flag or "")
-        if not f:
-            continue
-
-        if "Potential acute coronary syndrome" in f or "Respiratory compromise risk" in f:
-            cats.add("cardiopulmonary")
-        if "Possible stroke" in f or "Possible neurological or metabolic emergency" in f or "Possible intracranial pathology" in f:
-            cats.add("neurologic")
-        if "Possible gastrointestinal bleed" in f or "Possible upper GI bleed" in f:
-            cats.add("gi_bleed")
-        if "Possible obstetric emergency" in f:
-            cats.add("obstetric")
-        if "Syncope requiring urgent evaluation" in f:
-            cats.add("syncope")
-
-        if "Low oxygen saturation" in f:
-            cats.add("hypoxemia")
-        if "Hypotension" in f or "Severe tachycardia" in f:
-            cats.add("hemodynamic")
-        if "High fever" in f:
-            cats.add("sepsis")
-
-    return cats
+    # Phrases never span a newline, so one scan over the joined flags matches per-flag checks.
+    # Many cases emit the identical flag list, so the scan is memoized on the joined text.
+    text = "\n".join(str(flag or "") for flag in red_flags)
+    return set(_categories_from_flag_text(text))
 
 
 def baseline_predict(case: dict[str, Any]) -> tuple[str, set[str]]:
     """A simple vitals-first baseline that misses many synonym patterns."""
 
     text = f"{case.get('chief_complaint','')} {case.get('history','')}".lower()
-    vitals = dict(case.get("vitals", {}) or {})
+    vitals = case.get("vitals") or _EMPTY
 
     hr = _to_float(vitals.get("heart_rate"))
     sbp = _to_float(vitals.get("systolic_bp"))
@@ -156,26 +177,25 @@ def baseline_predict(case: dict[str, Any]) -> tuple[str, set[str]]:
     spo2 = _to_float(vitals.get("spo2"))
 
     cats: set[str] = set()
+    add = cats.add
 
     # Minimal keyword detection (intentionally limited).
     if "chest pain" in text or "shortness of breath" in text:
-        cats.add("cardiopulmonary")
+        add("cardiopulmonary")
     if "slurred speech" in text or "confusion" in text:
-        cats.add("neurologic")
+        add("neurologic")
     if "vomiting blood" in text:
-        cats.add("gi_bleed")
+        add("gi_bleed")
     if "fainting" in text:
-        cats.add("syncope")
+        add("syncope")
 
     # Vitals triggers (baseline is stronger here).
     if spo2 is not None and spo2 < 92:
-        cats.add("hypoxemia")
-    if sbp is not None and sbp < 90:
-        cats.add("hemodynamic")
-    if hr is not None and hr > 130:
-        cats.add("hemodynamic")
+        add("hypoxemia")
+    if (sbp is not None and sbp < 90) or (hr is not None and hr > 130):
+        add("hemodynamic")
     if temp is not None and temp >= 39.5:
-        cats.add("sepsis")
+        add("sepsis")
 
     vital_concern = (hr is not None and hr >= 110) or (temp is not None and temp >= 38.5) or (spo2 is not None and spo2 < 95)
 
@@ -190,7 +210,7 @@ def baseline_predict(case: dict[str, Any]) -> tuple[str, set[str]]:
 
 
 def run_benchmark_rows(rows: list[dict[str, Any]]) -> tuple[VignetteBenchmarkSummary, list[dict[str, Any]]]:
-    pipeline = ClinicaFlowPipeline()
+    pipeline = get_pipeline()
 
     gold_urgent_critical = 0
     baseline_under = 0
@@ -206,10 +226,13 @@ def run_benchmark_rows(rows: list[dict[str, Any]]) -> tuple[VignetteBenchmarkSum
 
     per_case: list[dict[str, Any]] = []
 
-    for row in rows:
+    # Intake construction is independent of the pipeline, so do it for the whole set first.
+    intakes = PatientIntake.from_mapping_many(row.get("input") or _EMPTY for row in rows)
+
+    for row, intake in zip(rows, intakes):
         case_id = str(row.get("id", "")).strip()
-        case_input = dict(row.get("input") or {})
-        labels = dict(row.get("labels") or {})
+        case_input = row.get("input") or _EMPTY
+        labels = row.get("labels") or _EMPTY
 
         gold_tier = str(labels.get("gold_risk_tier") or "").strip().lower()
         gold_cats = _category_set(labels.get("gold_red_flag_categories"))
@@ -217,7 +240,6 @@ def run_benchmark_rows(rows: list[dict[str, Any]]) -> tuple[VignetteBenchmarkSum
 
         baseline_tier, baseline_cats = baseline_predict(case_input)
 
-        intake = PatientIntake.from_mapping(case_input)
         cf = pipeline.run(intake)
         cf_tier = cf.risk_tier
         cf_cats = categories_from_red_flags(cf.red_flags)
@@ -247,20 +269,20 @@ def run_benchmark_rows(rows: list[dict[str, Any]]) -> tuple[VignetteBenchmarkSum
         # Red-flag recall (category-level).
         if gold_cats:
             gold_has_flags += 1
-            baseline_flag_hit += int(bool(baseline_cats & gold_cats))
-            cf_flag_hit += int(bool(cf_cats & gold_cats))
+            baseline_flag_hit += not baseline_cats.isdisjoint(gold_cats)
+            cf_flag_hit += not cf_cats.isdisjoint(gold_cats)
 
         # Under-triage.
         if gold_tier in {"urgent", "critical"}:
             gold_urgent_critical += 1
-            baseline_under += int(baseline_tier == "routine")
-            cf_under += int(cf_tier == "routine")
+            baseline_under += baseline_tier == "routine"
+            cf_under += cf_tier == "routine"
 
         # Over-triage.
         if gold_tier == "routine":
             gold_routine += 1
-            baseline_over += int(baseline_tier != "routine")
-            cf_over += int(cf_tier != "routine")
+            baseline_over += baseline_tier != "routine"
+            cf_over += cf_tier != "routine"
 
         per_case.append(
             {
@@ -312,8 +334,8 @@ def run_benchmark(path: Path) -> tuple[VignetteBenchmarkSummary, list[dict[str,
     return run_benchmark_rows(load_vignettes(path))
 
 
-def main() -> None:
-    args = build_parser().parse_args()
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
     if args.path:
         summary, per_case = run_benchmark(args.path)
     else:
@@ -328,7 +350,9 @@ def main() -> None:
 
     if args.cases_out:
         args.cases_out.parent.mkdir(parents=True, exist_ok=True)
-        args.cases_out.write_text(json.dumps(per_case, indent=2, ensure_ascii=False), encoding="utf-8")
+        # per_case scales with the vignette set; stream it instead of building the whole string first.
+        with args.cases_out.open("w", encoding="utf-8") as fh:
+            json.dump(per_case, fh, indent=2, ensure_ascii=False)
 
     if args.print_markdown:
         print(summary.to_markdown_table())
@@ -4,13 +4,67 @@ import argparse
 import json
 import os
 import sys
-from pathlib import Path
-
-from clinicaflow.models import PatientIntake
-from clinicaflow.pipeline import ClinicaFlowPipeline
-from clinicaflow.version import __version__
+from collections.abc import Callable
+from functools import lru_cache
+from importlib import import_module
+from typing import Any
+
+# Static on purpose: `clinicaflow --help` should not import the pipeline (or even
+# importlib.metadata for the version) just to print usage.
+_HELP_TEXT = """\
+usage: clinicaflow [triage] --input INPUT [--output OUTPUT] [--pretty] [--request-id REQUEST_ID]
+       clinicaflow <command> [options]
+
+Run ClinicaFlow triage pipeline on a JSON intake file.
+
+commands:
+  triage                Run triage on an intake JSON file (default command)
+  validate, check       Validate packaged resources (policy pack, vignettes)
+  serve, server         Run the demo HTTP server
+  fhir                  Export a minimal FHIR Bundle for a triage run (demo)
+  audit, bundle         Write an audit bundle for a triage run
+  doctor, diag          Print environment diagnostics
+  ping                  Ping configured inference backends (no PHI)
+  benchmark, bench      Run a benchmark: synthetic (default), vignettes, governance,
+                        review_packet, review_summary, ablation
+
+options:
+  -h, --help            Show this message and exit
+  --version             Show the version and exit
+
+Run `clinicaflow <command> --help` for command-specific options.
+"""
+
+
+def _load_json(path: str) -> Any:
+    # Unbuffered FileIO.readall() sizes a single read from fstat, with no BufferedReader
+    # or text layer in between. json.loads accepts the raw bytes (UTF-8/16/32 detected,
+    # BOM tolerated), so the file is not decoded into a separate str first.
+    # Intakes are parsed whole on purpose: PatientIntake.from_mapping needs the full
+    # mapping, and large files are dominated by one inline image data URL, which an
+    # incremental parser would still have to materialize as a single string.
+    with open(path, "rb", buffering=0) as fh:
+        return json.loads(fh.readall())
+
+
+def _dumps(obj: Any, *, pretty: bool) -> str:
+    return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False)
+
+
+def _write_json(obj: Any, path: str, *, pretty: bool) -> None:
+    with open(path, "w", encoding="utf-8", buffering=64 * 1024) as fh:
+        if pretty:
+            # Indented output always goes through the pure-Python encoder, so stream it
+            # instead of materializing the whole document first.
+            json.dump(obj, fh, indent=2, ensure_ascii=False)
+        else:
+            # Compact output is fastest via the one-shot C encoder.
+            fh.write(_dumps(obj, pretty=False))
 
 
+# parse_args() does not mutate the parser, so one instance serves every triage call
+# (e.g. tests or wrappers that invoke main() repeatedly).
+@lru_cache(maxsize=1)
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Run ClinicaFlow triage pipeline on a JSON intake file.")
     parser.add_argument("--input", required=True, help="Path to intake JSON file")
@@ -20,185 +74,207 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
-def main() -> None:
-    if len(sys.argv) > 1 and sys.argv[1] in {"validate", "check"}:
-        validate_parser = argparse.ArgumentParser(description="Validate packaged ClinicaFlow resources (policy pack, vignettes).")
-        validate_parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
-        args = validate_parser.parse_args(sys.argv[2:])
+def _run_validate(argv: list[str]) -> None:
+    validate_parser = argparse.ArgumentParser(description="Validate packaged ClinicaFlow resources (policy pack, vignettes).")
+    validate_parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
+    args = validate_parser.parse_args(argv)
 
-        from clinicaflow.validators import validate_all
+    from clinicaflow.validators import validate_all
 
-        report = validate_all().to_dict()
-        print(json.dumps(report, indent=2 if args.pretty else None, ensure_ascii=False))
-        raise SystemExit(0 if report.get("ok") else 2)
+    report = validate_all().to_dict()
+    print(_dumps(report, pretty=args.pretty))
+    raise SystemExit(0 if report.get("ok") else 2)
 
-    if len(sys.argv) > 1 and sys.argv[1] in {"serve", "server"}:
-        serve_parser = argparse.ArgumentParser(description="Run ClinicaFlow demo HTTP server.")
-        serve_parser.add_argument("--host", default="0.0.0.0")
-        serve_parser.add_argument("--port", type=int, default=8000)
-        args = serve_parser.parse_args(sys.argv[2:])
-        from clinicaflow.demo_server import run
 
-        run(host=args.host, port=args.port)
-        return
+def _run_serve(argv: list[str]) -> None:
+    serve_parser = argparse.ArgumentParser(description="Run ClinicaFlow demo HTTP server.")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    args = serve_parser.parse_args(argv)
+    from clinicaflow.demo_server import run
 
-    if len(sys.argv) > 1 and sys.argv[1] in {"fhir", "fhir_bundle", "fhir-bundle"}:
-        fhir_parser = argparse.ArgumentParser(description="Export a minimal FHIR Bundle for a triage run (demo).")
-        fhir_parser.add_argument("--input", required=True, help="Path to intake JSON file")
-        fhir_parser.add_argument("--output", help="Optional output JSON path")
-        fhir_parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
-        fhir_parser.add_argument("--request-id", help="Optional request ID for trace correlation")
-        fhir_parser.add_argument("--redact", action="store_true", help="Redact demographics/notes in export")
-        args = fhir_parser.parse_args(sys.argv[2:])
+    run(host=args.host, port=args.port)
 
-        input_path = Path(args.input)
-        payload = json.loads(input_path.read_text(encoding="utf-8"))
-        intake = PatientIntake.from_mapping(payload)
 
-        result = ClinicaFlowPipeline().run(intake, request_id=args.request_id)
+def _run_fhir(argv: list[str]) -> None:
+    fhir_parser = argparse.ArgumentParser(description="Export a minimal FHIR Bundle for a triage run (demo).")
+    fhir_parser.add_argument("--input", required=True, help="Path to intake JSON file")
+    fhir_parser.add_argument("--output", help="Optional output JSON path")
+    fhir_parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
+    fhir_parser.add_argument("--request-id", help="Optional request ID for trace correlation")
+    fhir_parser.add_argument("--redact", action="store_true", help="Redact demographics/notes in export")
+    args = fhir_parser.parse_args(argv)
 
-        from clinicaflow.fhir_export import build_fhir_bundle
+    from clinicaflow.fhir_export import build_fhir_bundle
+    from clinicaflow.models import PatientIntake
+    from clinicaflow.pipeline import get_pipeline
 
-        bundle = build_fhir_bundle(intake=intake, result=result, redact=args.redact)
+    payload = _load_json(args.input)
+    intake = PatientIntake.from_mapping(payload)
 
-        out_json = json.dumps(bundle, indent=2 if args.pretty else None, ensure_ascii=False)
-        if args.output:
-            Path(args.output).write_text(out_json, encoding="utf-8")
-        else:
-            print(out_json)
-        return
+    result = get_pipeline().run(intake, request_id=args.request_id)
 
-    if len(sys.argv) > 1 and sys.argv[1] in {"doctor", "diag"}:
-        from clinicaflow.diagnostics import collect_diagnostics
+    bundle = build_fhir_bundle(intake=intake, result=result, redact=args.redact)
 
-        print(json.dumps(collect_diagnostics(), indent=2, ensure_ascii=False))
-        return
+    if args.output:
+        _write_json(bundle, args.output, pretty=args.pretty)
+    else:
+        print(_dumps(bundle, pretty=args.pretty))
 
-    if len(sys.argv) > 1 and sys.argv[1] in {"audit", "bundle"}:
-        audit_parser = argparse.ArgumentParser(description="Write an audit bundle for a triage run.")
-        audit_parser.add_argument("--input", required=True, help="Path to intake JSON file")
-        audit_parser.add_argument("--out-dir", required=True, help="Output directory for the audit bundle")
-        audit_parser.add_argument("--request-id", help="Optional request ID for trace correlation")
-        audit_parser.add_argument("--redact", action="store_true", help="Redact demographics/notes/image descriptions")
-        args = audit_parser.parse_args(sys.argv[2:])
 
-        input_path = Path(args.input)
-        payload = json.loads(input_path.read_text(encoding="utf-8"))
-        intake = PatientIntake.from_mapping(payload)
+def _run_doctor(argv: list[str]) -> None:
+    from clinicaflow.diagnostics import collect_diagnostics
 
-        result = ClinicaFlowPipeline().run(intake, request_id=args.request_id)
+    print(_dumps(collect_diagnostics(), pretty=True))
 
-        from clinicaflow.audit import write_audit_bundle
 
-        out_path = write_audit_bundle(out_dir=args.out_dir, intake=intake, result=result, redact=args.redact)
-        print(
-            json.dumps(
-                {"out_dir": str(out_path), "run_id": result.run_id, "request_id": result.request_id},
-                indent=2,
-                ensure_ascii=False,
-            )
-        )
-        return
+def _run_audit(argv: list[str]) -> None:
+    audit_parser = argparse.ArgumentParser(description="Write an audit bundle for a triage run.")
+    audit_parser.add_argument("--input", required=True, help="Path to intake JSON file")
+    audit_parser.add_argument("--out-dir", required=True, help="Output directory for the audit bundle")
+    audit_parser.add_argument("--request-id", help="Optional request ID for trace correlation")
+    audit_parser.add_argument("--redact", action="store_true", help="Redact demographics/notes/image descriptions")
+    args = audit_parser.parse_args(argv)
+
+    from clinicaflow.audit import write_audit_bundle
+    from clinicaflow.models import PatientIntake
+    from clinicaflow.pipeline import get_pipeline
 
-    if len(sys.argv) > 1 and sys.argv[1] in {"ping"}:
-        ping_parser = argparse.ArgumentParser(description="Ping configured inference backends (no PHI).")
-        ping_parser.add_argument(
-            "--which",
-            choices=["reasoning", "communication", "all"],
-            default="reasoning",
-            help="Which backend(s) to ping (default: reasoning)",
-        )
-        ping_parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
-        args = ping_parser.parse_args(sys.argv[2:])
-
-        from clinicaflow.inference.ping import ping_inference_backend
-
-        which = str(args.which or "reasoning").strip().lower()
-        payload: dict[str, object] = {"ok": True, "which": which, "version": __version__}
-
-        ok = True
-        if which in {"reasoning", "all"}:
-            res = ping_inference_backend(env_prefix="CLINICAFLOW_REASONING")
-            payload["reasoning"] = res
-            ok = ok and bool(res.get("ok"))
-        if which in {"communication", "all"}:
-            res = ping_inference_backend(env_prefix="CLINICAFLOW_COMMUNICATION")
-            payload["communication"] = res
-            ok = ok and bool(res.get("ok"))
-
-        payload["ok"] = ok
-        print(json.dumps(payload, indent=2 if args.pretty else None, ensure_ascii=False))
-        raise SystemExit(0 if ok else 2)
-
-    if len(sys.argv) > 1 and sys.argv[1] in {"benchmark", "bench"}:
-        explicit_sub = len(sys.argv) > 2 and not sys.argv[2].startswith("-")
-        sub = sys.argv[2] if explicit_sub else ""
-
-        if explicit_sub and sub in {"synthetic", "proxy"}:
-            from clinicaflow.benchmarks.synthetic import main as bench_main
-
-            argv = sys.argv[3:]
-            module = "clinicaflow.benchmarks.synthetic"
-        elif explicit_sub and sub in {"vignettes", "vignette"}:
-            from clinicaflow.benchmarks.vignettes import main as bench_main
-
-            argv = sys.argv[3:]
-            module = "clinicaflow.benchmarks.vignettes"
-        elif explicit_sub and sub in {"governance", "gate"}:
-            from clinicaflow.benchmarks.governance import main as bench_main
-
-            argv = sys.argv[3:]
-            module = "clinicaflow.benchmarks.governance"
-        elif explicit_sub and sub in {"review_packet", "review-packet", "review"}:
-            from clinicaflow.benchmarks.review_packet import main as bench_main
-
-            argv = sys.argv[3:]
-            module = "clinicaflow.benchmarks.review_packet"
-        elif explicit_sub and sub in {"review_summary", "review-summary", "review_sum", "review-sum"}:
-            from clinicaflow.benchmarks.review_summary import main as bench_main
-
-            argv = sys.argv[3:]
-            module = "clinicaflow.benchmarks.review_summary"
-        elif explicit_sub and sub in {"ablation", "ablations"}:
-            from clinicaflow.benchmarks.ablation import main as bench_main
-
-            argv = sys.argv[3:]
-            module = "clinicaflow.benchmarks.ablation"
-        elif explicit_sub:
+    payload = _load_json(args.input)
+    intake = PatientIntake.from_mapping(payload)
+
+    result = get_pipeline().run(intake, request_id=args.request_id)
+
+    out_path = write_audit_bundle(out_dir=args.out_dir, intake=intake, result=result, redact=args.redact)
+    print(
+        _dumps({"out_dir": str(out_path), "run_id": result.run_id, "request_id": result.request_id}, pretty=True)
+    )
+
+
+def _run_ping(argv: list[str]) -> None:
+    ping_parser = argparse.ArgumentParser(description="Ping configured inference backends (no PHI).")
+    ping_parser.add_argument(
+        "--which",
+        choices=["reasoning", "communication", "all"],
+        default="reasoning",
+        help="Which backend(s) to ping (default: reasoning)",
+    )
+    ping_parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
+    args = ping_parser.parse_args(argv)
+
+    from clinicaflow.inference.ping import ping_inference_backend
+    from clinicaflow.version import __version__
+
+    which = str(args.which or "reasoning").strip().lower()
+    payload: dict[str, object] = {"ok": True, "which": which, "version": __version__}
+
+    ok = True
+    if which in {"reasoning", "all"}:
+        res = ping_inference_backend(env_prefix="CLINICAFLOW_REASONING")
+        payload["reasoning"] = res
+        ok = ok and bool(res.get("ok"))
+    if which in {"communication", "all"}:
+        res = ping_inference_backend(env_prefix="CLINICAFLOW_COMMUNICATION")
+        payload["communication"] = res
+        ok = ok and bool(res.get("ok"))
+
+    payload["ok"] = ok
+    print(_dumps(payload, pretty=args.pretty))
+    raise SystemExit(0 if ok else 2)
+
+
+# Benchmark name/alias -> module exposing `main()`; imported only when selected.
+_BENCHMARK_MODULES: dict[str, str] = {
+    "synthetic": "clinicaflow.benchmarks.synthetic",
+    "proxy": "clinicaflow.benchmarks.synthetic",
+    "vignettes": "clinicaflow.benchmarks.vignettes",
+    "vignette": "clinicaflow.benchmarks.vignettes",
+    "governance": "clinicaflow.benchmarks.governance",
+    "gate": "clinicaflow.benchmarks.governance",
+    "review_packet": "clinicaflow.benchmarks.review_packet",
+    "review-packet": "clinicaflow.benchmarks.review_packet",
+    "review": "clinicaflow.benchmarks.review_packet",
+    "review_summary": "clinicaflow.benchmarks.review_summary",
+    "review-summary": "clinicaflow.benchmarks.review_summary",
+    "review_sum": "clinicaflow.benchmarks.review_summary",
+    "review-sum": "clinicaflow.benchmarks.review_summary",
+    "ablation": "clinicaflow.benchmarks.ablation",
+    "ablations": "clinicaflow.benchmarks.ablation",
+}
+
+
+def _run_benchmark(argv: list[str]) -> None:
+    if argv and not argv[0].startswith("-"):
+        sub = argv[0]
+        module = _BENCHMARK_MODULES.get(sub)
+        if module is None:
             raise SystemExit(
                 f"Unknown benchmark subcommand: {sub} (expected: synthetic|vignettes|governance|review_packet|review_summary|ablation)"
             )
-        else:
-            from clinicaflow.benchmarks.synthetic import main as bench_main
+        bench_argv = argv[1:]
+    else:
+        module = "clinicaflow.benchmarks.synthetic"
+        bench_argv = argv
 
-            argv = sys.argv[2:]
-            module = "clinicaflow.benchmarks.synthetic"
+    import_module(module).main(bench_argv)
 
-        original_argv = sys.argv
-        try:
-            sys.argv = [module, *argv]
-            bench_main()
-        finally:
-            sys.argv = original_argv
-        return
 
-    triage_argv = sys.argv[2:] if len(sys.argv) > 1 and sys.argv[1] == "triage" else sys.argv[1:]
-    args = build_parser().parse_args(triage_argv)
+def _run_triage(argv: list[str]) -> None:
+    args = build_parser().parse_args(argv)
 
-    input_path = Path(args.input)
-    payload = json.loads(input_path.read_text(encoding="utf-8"))
+    # Imported here (and in the fhir/audit handlers) so other subcommands and --help
+    # skip loading the pipeline graph.
+    from clinicaflow.models import PatientIntake
+    from clinicaflow.pipeline import get_pipeline
+
+    payload = _load_json(args.input)
 
     intake = PatientIntake.from_mapping(payload)
-    result = ClinicaFlowPipeline().run(intake, request_id=args.request_id)
+    result = get_pipeline().run(intake, request_id=args.request_id)
     result_dict = result.to_dict()
 
     if args.output:
-        Path(args.output).write_text(
-            json.dumps(result_dict, indent=2 if args.pretty else None, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        _write_json(result_dict, args.output, pretty=args.pretty)
+    else:
+        print(_dumps(result_dict, pretty=args.pretty))
+
+
+# Subcommand name/alias -> handler taking the remaining argv. Anything else falls
+# through to triage, which keeps `clinicaflow --input case.json` working.
+_SUBCOMMANDS: dict[str, Callable[[list[str]], None]] = {
+    "triage": _run_triage,
+    "validate": _run_validate,
+    "check": _run_validate,
+    "serve": _run_serve,
+    "server": _run_serve,
+    "fhir": _run_fhir,
+    "fhir_bundle": _run_fhir,
+    "fhir-bundle": _run_fhir,
+    "doctor": _run_doctor,
+    "diag": _run_doctor,
+    "audit": _run_audit,
+    "bundle": _run_audit,
+    "ping": _run_ping,
+    "benchmark": _run_benchmark,
+    "bench": _run_benchmark,
+}
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] in {"-h", "--help"}:
+        sys.stdout.write(_HELP_TEXT)
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--version":
+        from clinicaflow.version import __version__
+
+        print(f"clinicaflow {__version__}")
+        return
+
+    handler = _SUBCOMMANDS.get(sys.argv[1]) if len(sys.argv) > 1 else None
+    if handler is None:
+        _run_triage(sys.argv[1:])
     else:
-        print(json.dumps(result_dict, indent=2 if args.pretty else None, ensure_ascii=False))
+        handler(sys.argv[2:])
 
 
 if __name__ == "__main__":
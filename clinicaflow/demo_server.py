@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 from collections import deque
+from contextlib import nullcontext
+from functools import lru_cache
+import gzip
 import hashlib
 import io
 import json
@@ -8,23 +11,30 @@ import logging
 import math
 import os
 import statistics
+import threading
 import time
 import uuid
 import zipfile
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from urllib.parse import parse_qs, unquote, urlparse
+from importlib import resources
+from urllib.parse import parse_qs, unquote, urlsplit
 
-from clinicaflow.auth import is_authorized
+from clinicaflow.auth import ApiKeyAuthenticator
 from clinicaflow.logging_config import configure_logging
-from clinicaflow.models import PatientIntake, TriageResult
+from clinicaflow.models import PatientIntake, TriageResult, utc_now_iso
 from clinicaflow.pipeline import ClinicaFlowPipeline
-from clinicaflow.rules import SAFETY_RULES_VERSION
+from clinicaflow.policy_pack import load_policy_pack_with_sha256
+from clinicaflow.rules import SAFETY_RULES_VERSION, safety_rules_catalog
 from clinicaflow.settings import Settings, load_settings_from_env
 from clinicaflow.version import __version__
 
 logger = logging.getLogger("clinicaflow.server")
 
+# json.dumps() with non-default options builds a fresh JSONEncoder per call; responses
+# reuse one (the C encoder path is the same).
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
 SAMPLE_INTAKE = {
     "chief_complaint": "Chest pain and shortness of breath for 20 minutes",
     "history": "Patient has diabetes and hypertension.",
@@ -40,6 +50,7 @@ SAMPLE_INTAKE = {
     "image_descriptions": ["Portable chest image: mild bilateral interstitial opacities"],
     "prior_notes": ["Prior episode of exertional chest tightness last week"],
 }
+SAMPLE_INTAKE_BYTES = _JSON_ENCODER.encode(SAMPLE_INTAKE).encode("utf-8")
 
 DEMO_HTML = """<!doctype html>
 <html lang="en">
@@ -361,6 +372,7 @@ DEMO_HTML = """<!doctype html>
   </body>
 </html>
 """
+DEMO_HTML_BYTES = DEMO_HTML.encode("utf-8")
 
 RESET_HTML = """<!doctype html>
 <html lang="en">
@@ -501,6 +513,7 @@ RESET_HTML = """<!doctype html>
   </body>
 </html>
 """
+RESET_HTML_BYTES = RESET_HTML.encode("utf-8")
 
 
 def _static_asset_fingerprint(web_assets: dict[str, tuple[bytes, str]]) -> str:
@@ -655,6 +668,58 @@ WEB_ASSETS_FINGERPRINT = _static_asset_fingerprint(WEB_ASSETS) if WEB_ASSETS els
 REQUIRED_WEB_ASSETS = {"index.html", "app.css", "app.js"}
 HAS_CONSOLE_UI = all(name in WEB_ASSETS for name in REQUIRED_WEB_ASSETS)
 
+# Bodies below this size are sent as-is; gzip framing would eat most of the saving.
+_GZIP_MIN_BYTES = 1024
+
+
+def _gzip_body(data: bytes) -> bytes | None:
+    """Return a gzip copy of `data`, or None when it is too small to be worth it."""
+
+    if len(data) < _GZIP_MIN_BYTES:
+        return None
+    # mtime=0 keeps the compressed bytes stable across restarts.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+# Static bodies are compressed once at import; requests only pick a variant.
+WEB_ASSETS_GZIP = {
+    name: gz for name, (data, _content_type) in WEB_ASSETS.items() if (gz := _gzip_body(data)) is not None
+}
+DEMO_HTML_GZIP = _gzip_body(DEMO_HTML_BYTES)
+
+
+def _strong_etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+
+
+# Bodies are fixed for the life of the process, so validators are computed once too.
+WEB_ASSETS_ETAG = {name: _strong_etag(data) for name, (data, _content_type) in WEB_ASSETS.items()}
+DEMO_HTML_ETAG = _strong_etag(DEMO_HTML_BYTES)
+
+# Policy pack digest + per-policy JSON, keyed by (path, mtime_ns, size) so an edited
+# pack is re-read on the next request.
+_POLICY_PACK_CACHE: dict[tuple[str, int, int], tuple[str, list[str]]] = {}
+
+
+def _load_policy_pack_json(pack_path: object) -> tuple[str, list[str]]:
+    try:
+        st = os.stat(pack_path)  # type: ignore[arg-type]
+    except (OSError, TypeError):
+        # Not a filesystem path (e.g. a zipped resource): read it every time.
+        key = None
+    else:
+        key = (os.fspath(pack_path), st.st_mtime_ns, st.st_size)  # type: ignore[arg-type]
+        cached = _POLICY_PACK_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    policies, pack_sha256 = load_policy_pack_with_sha256(pack_path)
+    entry = (pack_sha256, [_JSON_ENCODER.encode(p.to_dict()) for p in policies])
+    if key is not None:
+        _POLICY_PACK_CACHE[key] = entry
+    return entry
+
+
 VIGNETTE_CACHE: dict[str, list[dict]] = {}
 
 
@@ -675,6 +740,44 @@ def _load_vignettes(set_name: str = "standard") -> list[dict]:
     return VIGNETTE_CACHE[key]
 
 
+# Derived per-set views of VIGNETTE_CACHE (which is never invalidated either).
+VIGNETTE_INDEX_CACHE: dict[str, dict[str, dict]] = {}
+VIGNETTE_LIST_CACHE: dict[str, bytes] = {}
+
+
+def _find_vignette(set_name: str, vid: str) -> dict | None:
+    index = VIGNETTE_INDEX_CACHE.get(set_name)
+    if index is None:
+        index = {}
+        for row in _load_vignettes(set_name):
+            # First row wins on duplicate ids, as with the linear scan this replaces.
+            index.setdefault(str(row.get("id", "")).strip(), row)
+        VIGNETTE_INDEX_CACHE[set_name] = index
+    return index.get(vid)
+
+
+def _vignette_list_json_bytes(set_name: str) -> bytes:
+    cached = VIGNETTE_LIST_CACHE.get(set_name)
+    if cached is not None:
+        return cached
+
+    payload = {
+        "set": set_name,
+        "vignettes": [
+            {
+                "id": str(row.get("id", "")),
+                "chief_complaint": str((row.get("input") or {}).get("chief_complaint", "")),
+                "source_type": str((row.get("source") or {}).get("type") or "") if isinstance(row.get("source"), dict) else "",
+                "source_url": str((row.get("source") or {}).get("url") or "") if isinstance(row.get("source"), dict) else "",
+            }
+            for row in _load_vignettes(set_name)
+        ],
+    }
+    data = _JSON_ENCODER.encode(payload).encode("utf-8")
+    VIGNETTE_LIST_CACHE[set_name] = data
+    return data
+
+
 def _new_stats() -> dict:
     agents = [
         "intake_structuring",
@@ -874,19 +977,21 @@ def _build_metrics_payload(server: object) -> dict[str, object]:
     start = getattr(server, "start_time", None)
 
     uptime_s = int(time.time() - float(start or time.time()))
-    count = int((stats or {}).get("triage_latency_ms_count") or 0) if isinstance(stats, dict) else 0
-    total = float((stats or {}).get("triage_latency_ms_sum") or 0.0) if isinstance(stats, dict) else 0.0
-    avg = round(total / count, 2) if count else 0.0
-
-    payload: dict[str, object] = {
-        "uptime_s": uptime_s,
-        "version": __version__,
-        "metrics_window_max_n": int(getattr(server, "metrics_window", 0) or 0),
-        "triage_latency_ms_avg": avg,
-    }
-    if isinstance(stats, dict):
-        payload.update(stats)
-    payload.update(_compute_recent_metrics(server))
+    with getattr(server, "stats_lock", None) or nullcontext():
+        count = int((stats or {}).get("triage_latency_ms_count") or 0) if isinstance(stats, dict) else 0
+        total = float((stats or {}).get("triage_latency_ms_sum") or 0.0) if isinstance(stats, dict) else 0.0
+        avg = round(total / count, 2) if count else 0.0
+
+        payload: dict[str, object] = {
+            "uptime_s": uptime_s,
+            "version": __version__,
+            "metrics_window_max_n": int(getattr(server, "metrics_window", 0) or 0),
+            "triage_latency_ms_avg": avg,
+        }
+        if isinstance(stats, dict):
+            # Copy the nested counters so the payload is not mutated by later requests.
+            payload.update({k: dict(v) if isinstance(v, dict) else v for k, v in stats.items()})
+        payload.update(_compute_recent_metrics(server))
     return payload
 
 
@@ -902,7 +1007,11 @@ class ClinicaFlowHTTPServer(ThreadingHTTPServer):
         super().__init__(server_address, handler_cls)
         self.pipeline = pipeline
         self.settings = settings
+        self.cors_allow_origin = settings.cors_allow_origin or "*"
+        self.authenticator = ApiKeyAuthenticator(settings.api_key)
         self.start_time = time.time()
+        # Handler threads update stats/recent together; /metrics reads them under the same lock.
+        self.stats_lock = threading.Lock()
         self.stats = _new_stats()
         self.metrics_window = _metrics_window_size()
         self.recent = _new_recent_metrics(self.metrics_window)
@@ -910,6 +1019,17 @@ class ClinicaFlowHTTPServer(ThreadingHTTPServer):
 
 class ClinicaFlowHandler(BaseHTTPRequestHandler):
     server_version = "ClinicaFlowHTTP/1.0"
+    # HTTP/1.1 keeps connections alive between requests (the UI polls several
+    # endpoints); every buffered response carries Content-Length for that.
+    protocol_version = "HTTP/1.1"
+    # Drop idle keep-alive sockets instead of parking a thread on them forever.
+    timeout = 30
+    # Buffer wfile so the header block and body leave in one send (the base
+    # class flushes after each request, and the NDJSON stream flushes per event),
+    # and set TCP_NODELAY so a trailing small segment is never held back by
+    # Nagle waiting on the client's delayed ACK (~40 ms per keep-alive request).
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
 
     def log_message(self, fmt: str, *args: object) -> None:  # noqa: N802
         # Suppress BaseHTTPRequestHandler's default access logs; we emit structured logs instead.
@@ -946,10 +1066,13 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
         content_type: str = "application/json; charset=utf-8",
         request_id: str | None = None,
         extra_headers: dict[str, str] | None = None,
+        content_length: int | None = None,
     ) -> None:
         self._last_status_code = int(code)
         self.send_response(code)
         self.send_header("Content-Type", content_type)
+        if content_length is not None:
+            self.send_header("Content-Length", str(content_length))
         # Light hardening; safe defaults for a local demo.
         self.send_header("X-Content-Type-Options", "nosniff")
         self.send_header("X-Frame-Options", "DENY")
@@ -965,9 +1088,9 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
             self.send_header("Content-Security-Policy", self._content_security_policy(ui=ui))
         if request_id:
             self.send_header("X-Request-ID", request_id)
-        allow_origin = getattr(self.server, "settings", None)
-        origin = allow_origin.cors_allow_origin if allow_origin else "*"
-        self.send_header("Access-Control-Allow-Origin", origin)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.send_header("Access-Control-Allow-Origin", getattr(self.server, "cors_allow_origin", "*"))
         self.send_header("Access-Control-Allow-Headers", "Content-Type, X-Request-ID, Authorization, X-API-Key")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Expose-Headers", "X-Request-ID, Content-Disposition")
@@ -984,10 +1107,36 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
         request_id: str | None = None,
         extra_headers: dict[str, str] | None = None,
     ) -> None:
-        self._set_headers(code, request_id=request_id, extra_headers=extra_headers)
+        data = _JSON_ENCODER.encode(payload).encode("utf-8")
+        self._set_headers(code, request_id=request_id, extra_headers=extra_headers, content_length=len(data))
         if getattr(self, "_head_only", False):
             return
-        self.wfile.write(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        self.wfile.write(data)
+
+    def _accepts_gzip(self) -> bool:
+        for part in str(self.headers.get("Accept-Encoding") or "").split(","):
+            coding, _, params = part.partition(";")
+            if coding.strip().lower() not in {"gzip", "x-gzip"}:
+                continue
+            key, _, value = params.partition("=")
+            if key.strip().lower() != "q":
+                return True
+            try:
+                return float(value) > 0
+            except ValueError:
+                return False
+        return False
+
+    def _etag_matches(self, etag: str) -> bool:
+        raw = self.headers.get("If-None-Match")
+        if not raw:
+            return False
+        # If-None-Match uses the weak comparison: a W/ prefix is ignored.
+        for tag in raw.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == etag:
+                return True
+        return False
 
     def _write_bytes(
         self,
@@ -997,8 +1146,34 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
         content_type: str = "application/octet-stream",
         request_id: str | None = None,
         extra_headers: dict[str, str] | None = None,
+        gzip_data: bytes | None = None,
+        etag: str | None = None,
     ) -> None:
-        self._set_headers(code, content_type=content_type, request_id=request_id, extra_headers=extra_headers)
+        if gzip_data is not None:
+            extra_headers = {**(extra_headers or {}), "Vary": "Accept-Encoding"}
+            if self._accepts_gzip():
+                data = gzip_data
+                extra_headers["Content-Encoding"] = "gzip"
+                if etag is not None:
+                    # Each encoding of a resource needs its own strong validator.
+                    etag = etag[:-1] + '-gzip"'
+        if etag is not None:
+            extra_headers = {**(extra_headers or {}), "ETag": etag}
+            if code == HTTPStatus.OK and self._etag_matches(etag):
+                self._set_headers(
+                    HTTPStatus.NOT_MODIFIED,
+                    content_type=content_type,
+                    request_id=request_id,
+                    extra_headers=extra_headers,
+                )
+                return
+        self._set_headers(
+            code,
+            content_type=content_type,
+            request_id=request_id,
+            extra_headers=extra_headers,
+            content_length=len(data),
+        )
         if getattr(self, "_head_only", False):
             return
         self.wfile.write(data)
@@ -1020,27 +1195,35 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
         started = time.perf_counter()
         status_code = HTTPStatus.INTERNAL_SERVER_ERROR
         try:
-            self.server.stats["requests_total"] += 1
-            parsed = urlparse(self.path)
+            _bump_stat(self.server, "requests_total")
+            parsed = urlsplit(self.path)
             path = parsed.path
-            query = parse_qs(parsed.query)
+            query = parse_qs(parsed.query) if parsed.query else {}
 
             if path in {"/", "/demo"}:
                 reset_raw = str(query.get("reset", [""])[0]).strip().lower()
                 if reset_raw in {"1", "true", "yes", "y", "on"}:
-                    data, content_type = (RESET_HTML.encode("utf-8"), "text/html; charset=utf-8")
+                    data, content_type = (RESET_HTML_BYTES, "text/html; charset=utf-8")
                     ui = "reset"
+                    gzip_data = None
+                    etag = None
                 elif HAS_CONSOLE_UI:
                     data, content_type = WEB_ASSETS["index.html"]
                     ui = "console"
+                    gzip_data = WEB_ASSETS_GZIP.get("index.html")
+                    etag = WEB_ASSETS_ETAG["index.html"]
                 else:
-                    data, content_type = (DEMO_HTML.encode("utf-8"), "text/html; charset=utf-8")
+                    data, content_type = (DEMO_HTML_BYTES, "text/html; charset=utf-8")
                     ui = "legacy"
+                    gzip_data = DEMO_HTML_GZIP
+                    etag = DEMO_HTML_ETAG
                 self._write_bytes(
                     data,
                     content_type=content_type,
                     request_id=request_id,
                     extra_headers={"Cache-Control": "no-store", "X-ClinicaFlow-UI": ui},
+                    gzip_data=gzip_data,
+                    etag=etag,
                 )
                 status_code = HTTPStatus.OK
                 return
@@ -1062,6 +1245,8 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     content_type=content_type,
                     request_id=request_id,
                     extra_headers={"Cache-Control": cache_control, "X-ClinicaFlow-Static-Version": WEB_ASSETS_FINGERPRINT},
+                    gzip_data=WEB_ASSETS_GZIP.get(name),
+                    etag=WEB_ASSETS_ETAG[name],
                 )
                 status_code = HTTPStatus.OK
                 return
@@ -1087,7 +1272,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 # Deep ping: runs a tiny inference call (no PHI) to verify the
                 # configured backend can actually serve requests. This can be
                 # slower than `/doctor` (which is mostly a config/connectivity check).
-                if self.server.settings.api_key and not is_authorized(headers=self.headers, expected_api_key=self.server.settings.api_key):
+                if self.server.authenticator.enabled and not self.server.authenticator.check(self.headers):
                     self._write_json(
                         {"error": {"code": "unauthorized"}},
                         code=HTTPStatus.UNAUTHORIZED,
@@ -1126,10 +1311,6 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 return
 
             if path == "/policy_pack":
-                from importlib.resources import files
-
-                from clinicaflow.policy_pack import load_policy_pack, policy_pack_sha256
-
                 limit_raw = str(query.get("limit", ["0"])[0]).strip()
                 try:
                     limit = int(limit_raw or "0")
@@ -1141,27 +1322,27 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     pack_path: object = self.server.settings.policy_pack_path
                 else:
                     source = "package:clinicaflow.resources/policy_pack.json"
-                    pack_path = files("clinicaflow.resources").joinpath("policy_pack.json")
+                    pack_path = resources.files("clinicaflow.resources").joinpath("policy_pack.json")
 
-                policies = load_policy_pack(pack_path)
-                n_total = len(policies)
+                pack_sha256, policy_json = _load_policy_pack_json(pack_path)
+                n_total = len(policy_json)
                 if limit > 0:
-                    policies = policies[:limit]
+                    policy_json = policy_json[:limit]
 
-                payload = {
-                    "source": source,
-                    "sha256": policy_pack_sha256(pack_path),
-                    "n_policies": n_total,
-                    "policies": [p.to_dict() for p in policies],
-                }
-                self._write_json(payload, request_id=request_id)
+                # Frame the envelope by hand around the pre-encoded policies instead of
+                # building a list of policy dicts and encoding the whole payload at once.
+                head = _JSON_ENCODER.encode({"source": source, "sha256": pack_sha256, "n_policies": n_total})
+                body = "".join((head[:-1], ', "policies": [', ", ".join(policy_json), "]}"))
+                self._write_bytes(body.encode("utf-8"), content_type="application/json; charset=utf-8", request_id=request_id)
                 status_code = HTTPStatus.OK
                 return
 
             if path == "/safety_rules":
-                from clinicaflow.rules import safety_rules_catalog
-
-                self._write_json(safety_rules_catalog(), request_id=request_id)
+                self._write_bytes(
+                    _safety_rules_json_bytes(),
+                    content_type="application/json; charset=utf-8",
+                    request_id=request_id,
+                )
                 status_code = HTTPStatus.OK
                 return
 
@@ -1171,9 +1352,8 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 accept = (self.headers.get("Accept") or "").lower()
                 wants_prometheus = fmt in {"prometheus", "prom"} or "text/plain" in accept
                 if wants_prometheus:
-                    metrics = _format_prometheus_metrics(payload)
                     self._write_bytes(
-                        metrics.encode("utf-8"),
+                        _format_prometheus_metrics(payload),
                         content_type="text/plain; version=0.0.4; charset=utf-8",
                         request_id=request_id,
                     )
@@ -1183,31 +1363,22 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 return
 
             if path == "/openapi.json":
-                self._write_json(_openapi_spec(), request_id=request_id)
+                self._write_bytes(_openapi_json_bytes(), content_type="application/json; charset=utf-8", request_id=request_id)
                 status_code = HTTPStatus.OK
                 return
 
             if path == "/example":
-                self._write_json(SAMPLE_INTAKE, request_id=request_id)
+                self._write_bytes(SAMPLE_INTAKE_BYTES, content_type="application/json; charset=utf-8", request_id=request_id)
                 status_code = HTTPStatus.OK
                 return
 
             if path == "/vignettes":
                 set_name = _normalize_vignette_set(str(query.get("set", ["standard"])[0]))
-                rows = _load_vignettes(set_name)
-                payload = {
-                    "set": set_name,
-                    "vignettes": [
-                        {
-                            "id": str(row.get("id", "")),
-                            "chief_complaint": str((row.get("input") or {}).get("chief_complaint", "")),
-                            "source_type": str((row.get("source") or {}).get("type") or "") if isinstance(row.get("source"), dict) else "",
-                            "source_url": str((row.get("source") or {}).get("url") or "") if isinstance(row.get("source"), dict) else "",
-                        }
-                        for row in rows
-                    ]
-                }
-                self._write_json(payload, request_id=request_id)
+                self._write_bytes(
+                    _vignette_list_json_bytes(set_name),
+                    content_type="application/json; charset=utf-8",
+                    request_id=request_id,
+                )
                 status_code = HTTPStatus.OK
                 return
 
@@ -1219,8 +1390,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     return
 
                 set_name = _normalize_vignette_set(str(query.get("set", ["standard"])[0]))
-                rows = _load_vignettes(set_name)
-                row = next((r for r in rows if str(r.get("id", "")).strip() == vid), None)
+                row = _find_vignette(set_name, vid)
                 if not row:
                     self._write_json({"error": {"code": "not_found"}}, code=HTTPStatus.NOT_FOUND, request_id=request_id)
                     status_code = HTTPStatus.NOT_FOUND
@@ -1323,7 +1493,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 extra={
                     "event": "http_request",
                     "method": getattr(self, "command", "GET"),
-                    "path": urlparse(self.path).path,
+                    "path": urlsplit(self.path).path,
                     "status_code": status_code_i,
                     "latency_ms": latency_ms,
                     "request_id": request_id,
@@ -1334,18 +1504,22 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
         request_id = self._get_request_id()
         started = time.perf_counter()
         status_code = HTTPStatus.INTERNAL_SERVER_ERROR
+        # Rejections before the body is read would leave it in the socket; only
+        # keep the connection alive once the body has been consumed.
+        keep_alive = not self.close_connection
+        self.close_connection = True
         try:
-            self.server.stats["requests_total"] += 1
-            parsed = urlparse(self.path)
+            _bump_stat(self.server, "requests_total")
+            parsed = urlsplit(self.path)
             path = parsed.path
-            query = parse_qs(parsed.query)
+            query = parse_qs(parsed.query) if parsed.query else {}
 
             if path not in {"/triage", "/triage_stream", "/audit_bundle", "/judge_pack", "/fhir_bundle"}:
                 self._write_json({"error": {"code": "not_found"}}, code=HTTPStatus.NOT_FOUND, request_id=request_id)
                 status_code = HTTPStatus.NOT_FOUND
                 return
 
-            if not is_authorized(headers=self.headers, expected_api_key=self.server.settings.api_key):
+            if not self.server.authenticator.check(self.headers):
                 self._write_json(
                     {"error": {"code": "unauthorized"}},
                     code=HTTPStatus.UNAUTHORIZED,
@@ -1384,17 +1558,18 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 return
 
             raw = self.rfile.read(length)
+            self.close_connection = not keep_alive
             try:
                 payload = json.loads(raw.decode("utf-8"))
             except json.JSONDecodeError as exc:
                 if path in {"/triage", "/triage_stream"}:
-                    self.server.stats["triage_errors_total"] += 1
+                    _bump_stat(self.server, "triage_errors_total")
                 elif path == "/audit_bundle":
-                    self.server.stats["audit_bundle_errors_total"] += 1
+                    _bump_stat(self.server, "audit_bundle_errors_total")
                 elif path == "/judge_pack":
-                    self.server.stats["judge_pack_errors_total"] += 1
+                    _bump_stat(self.server, "judge_pack_errors_total")
                 else:
-                    self.server.stats["fhir_bundle_errors_total"] += 1
+                    _bump_stat(self.server, "fhir_bundle_errors_total")
                 self._write_json(
                     {"error": {"code": "bad_json", "message": str(exc)}},
                     code=HTTPStatus.BAD_REQUEST,
@@ -1405,13 +1580,13 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
 
             if not isinstance(payload, dict):
                 if path in {"/triage", "/triage_stream"}:
-                    self.server.stats["triage_errors_total"] += 1
+                    _bump_stat(self.server, "triage_errors_total")
                 elif path == "/audit_bundle":
-                    self.server.stats["audit_bundle_errors_total"] += 1
+                    _bump_stat(self.server, "audit_bundle_errors_total")
                 elif path == "/judge_pack":
-                    self.server.stats["judge_pack_errors_total"] += 1
+                    _bump_stat(self.server, "judge_pack_errors_total")
                 else:
-                    self.server.stats["fhir_bundle_errors_total"] += 1
+                    _bump_stat(self.server, "fhir_bundle_errors_total")
                 self._write_json(
                     {"error": {"code": "invalid_payload", "message": "Expected a JSON object"}},
                     code=HTTPStatus.UNPROCESSABLE_ENTITY,
@@ -1424,13 +1599,13 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 intake_payload, result_payload, checklist, case_meta = _unwrap_intake_payload(payload)
             except ValueError as exc:
                 if path in {"/triage", "/triage_stream"}:
-                    self.server.stats["triage_errors_total"] += 1
+                    _bump_stat(self.server, "triage_errors_total")
                 elif path == "/audit_bundle":
-                    self.server.stats["audit_bundle_errors_total"] += 1
+                    _bump_stat(self.server, "audit_bundle_errors_total")
                 elif path == "/judge_pack":
-                    self.server.stats["judge_pack_errors_total"] += 1
+                    _bump_stat(self.server, "judge_pack_errors_total")
                 else:
-                    self.server.stats["fhir_bundle_errors_total"] += 1
+                    _bump_stat(self.server, "fhir_bundle_errors_total")
                 self._write_json(
                     {"error": {"code": "invalid_payload", "message": str(exc)[:200]}},
                     code=HTTPStatus.UNPROCESSABLE_ENTITY,
@@ -1447,9 +1622,11 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     existing_result.request_id = request_id
 
             if path == "/triage_stream":
-                self.server.stats["triage_requests_total"] += 1
+                _bump_stat(self.server, "triage_requests_total")
                 triage_started = time.perf_counter()
 
+                # NDJSON has no Content-Length; the end of the stream is the connection close.
+                self.close_connection = True
                 self._set_headers(
                     HTTPStatus.OK,
                     content_type="application/x-ndjson; charset=utf-8",
@@ -1465,7 +1642,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     return
 
                 def emit(event: dict) -> None:
-                    self.wfile.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                    self.wfile.write(_JSON_ENCODER.encode(event).encode("utf-8") + b"\n")
                     try:
                         self.wfile.flush()
                     except Exception:  # noqa: BLE001
@@ -1479,8 +1656,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     status_code = HTTPStatus.OK
                     return
                 except Exception as exc:  # noqa: BLE001
-                    self.server.stats["triage_errors_total"] += 1
-                    _record_recent_triage(self.server, ok=False)
+                    _record_triage_error(self.server)
                     logger.exception("triage_stream_error", extra={"event": "triage_stream_error", "request_id": request_id})
                     msg = str(exc) if self.server.settings.debug else ""
                     try:
@@ -1494,67 +1670,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 result["server_latency_ms"] = round((time.perf_counter() - triage_started) * 1000, 2)
                 emit({"type": "final", "result": result})
 
-                self.server.stats["triage_success_total"] += 1
-                risk_tier = str(result.get("risk_tier") or "")
-                if risk_tier in self.server.stats["triage_risk_tier_total"]:
-                    self.server.stats["triage_risk_tier_total"][risk_tier] += 1
-
-                backend = _extract_reasoning_backend(result)
-                if backend in self.server.stats["triage_reasoning_backend_total"]:
-                    self.server.stats["triage_reasoning_backend_total"][backend] += 1
-
-                comm_backend = _extract_communication_backend(result)
-                if comm_backend in self.server.stats["triage_communication_backend_total"]:
-                    self.server.stats["triage_communication_backend_total"][comm_backend] += 1
-
-                evidence_backend = _extract_evidence_backend(result)
-                if evidence_backend:
-                    self.server.stats["triage_evidence_backend_total"][evidence_backend] = (
-                        int(self.server.stats["triage_evidence_backend_total"].get(evidence_backend) or 0) + 1
-                    )
-
-                latency = float(result.get("total_latency_ms") or 0.0)
-                self.server.stats["triage_latency_ms_sum"] += latency
-                self.server.stats["triage_latency_ms_count"] += 1
-
-                trace_rows = result.get("trace") or []
-                if isinstance(trace_rows, list):
-                    for step in trace_rows:
-                        if not isinstance(step, dict):
-                            continue
-                        agent = str(step.get("agent") or "").strip()
-                        if not agent:
-                            continue
-
-                        if agent not in self.server.stats["triage_agent_latency_ms_sum"]:
-                            self.server.stats["triage_agent_latency_ms_sum"][agent] = 0.0
-                            self.server.stats["triage_agent_latency_ms_count"][agent] = 0
-                            self.server.stats["triage_agent_errors_total"][agent] = 0
-
-                        latency_ms = step.get("latency_ms")
-                        if isinstance(latency_ms, (int, float)):
-                            self.server.stats["triage_agent_latency_ms_sum"][agent] += float(latency_ms)
-                            self.server.stats["triage_agent_latency_ms_count"][agent] += 1
-
-                        err = step.get("error")
-                        if isinstance(err, str) and err.strip():
-                            self.server.stats["triage_agent_errors_total"][agent] += 1
-                        else:
-                            out = step.get("output") or {}
-                            derived = ""
-                            if isinstance(out, dict) and agent == "multimodal_reasoning":
-                                derived = str(out.get("reasoning_backend_error") or "").strip()
-                            elif isinstance(out, dict) and agent == "communication":
-                                derived = str(out.get("communication_backend_error") or "").strip()
-                            if derived:
-                                self.server.stats["triage_agent_errors_total"][agent] += 1
-
-                _record_recent_triage(
-                    self.server,
-                    ok=True,
-                    latency_ms=latency,
-                    trace_rows=trace_rows if isinstance(trace_rows, list) else None,
-                )
+                backend, comm_backend, evidence_backend = _record_triage_success(self.server, result)
 
                 logger.info(
                     "triage_stream_complete",
@@ -1574,76 +1690,12 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 return
 
             if path == "/triage":
-                self.server.stats["triage_requests_total"] += 1
+                _bump_stat(self.server, "triage_requests_total")
                 triage_started = time.perf_counter()
                 result = self.server.pipeline.run(intake, request_id=request_id).to_dict()
                 result["server_latency_ms"] = round((time.perf_counter() - triage_started) * 1000, 2)
 
-                self.server.stats["triage_success_total"] += 1
-                risk_tier = str(result.get("risk_tier") or "")
-                if risk_tier in self.server.stats["triage_risk_tier_total"]:
-                    self.server.stats["triage_risk_tier_total"][risk_tier] += 1
-
-                backend = _extract_reasoning_backend(result)
-                if backend in self.server.stats["triage_reasoning_backend_total"]:
-                    self.server.stats["triage_reasoning_backend_total"][backend] += 1
-
-                comm_backend = _extract_communication_backend(result)
-                if comm_backend in self.server.stats["triage_communication_backend_total"]:
-                    self.server.stats["triage_communication_backend_total"][comm_backend] += 1
-
-                evidence_backend = _extract_evidence_backend(result)
-                if evidence_backend:
-                    self.server.stats["triage_evidence_backend_total"][evidence_backend] = (
-                        int(self.server.stats["triage_evidence_backend_total"].get(evidence_backend) or 0) + 1
-                    )
-
-                latency = float(result.get("total_latency_ms") or 0.0)
-                self.server.stats["triage_latency_ms_sum"] += latency
-                self.server.stats["triage_latency_ms_count"] += 1
-
-                # Per-agent latency/error metrics (production-style observability).
-                trace_rows = result.get("trace") or []
-                if isinstance(trace_rows, list):
-                    for step in trace_rows:
-                        if not isinstance(step, dict):
-                            continue
-                        agent = str(step.get("agent") or "").strip()
-                        if not agent:
-                            continue
-
-                        if agent not in self.server.stats["triage_agent_latency_ms_sum"]:
-                            self.server.stats["triage_agent_latency_ms_sum"][agent] = 0.0
-                            self.server.stats["triage_agent_latency_ms_count"][agent] = 0
-                            self.server.stats["triage_agent_errors_total"][agent] = 0
-
-                        latency_ms = step.get("latency_ms")
-                        if isinstance(latency_ms, (int, float)):
-                            self.server.stats["triage_agent_latency_ms_sum"][agent] += float(latency_ms)
-                            self.server.stats["triage_agent_latency_ms_count"][agent] += 1
-
-                        err = step.get("error")
-                        if isinstance(err, str) and err.strip():
-                            self.server.stats["triage_agent_errors_total"][agent] += 1
-                        else:
-                            # Some agent failures are recorded in output fields rather than the trace-level
-                            # `error` field (e.g., external inference fallback). Count these as errors so
-                            # ops dashboards reflect backend instability.
-                            out = step.get("output") or {}
-                            derived = ""
-                            if isinstance(out, dict) and agent == "multimodal_reasoning":
-                                derived = str(out.get("reasoning_backend_error") or "").strip()
-                            elif isinstance(out, dict) and agent == "communication":
-                                derived = str(out.get("communication_backend_error") or "").strip()
-                            if derived:
-                                self.server.stats["triage_agent_errors_total"][agent] += 1
-
-                _record_recent_triage(
-                    self.server,
-                    ok=True,
-                    latency_ms=latency,
-                    trace_rows=trace_rows if isinstance(trace_rows, list) else None,
-                )
+                backend, comm_backend, evidence_backend = _record_triage_success(self.server, result)
 
                 logger.info(
                     "triage_complete",
@@ -1664,14 +1716,14 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 return
 
             if path == "/audit_bundle":
-                self.server.stats["audit_bundle_requests_total"] += 1
+                _bump_stat(self.server, "audit_bundle_requests_total")
                 redact = str(query.get("redact", ["1"])[0]).strip().lower() in {"1", "true", "yes"}
 
-                from clinicaflow.audit import build_audit_bundle_files
+                from clinicaflow.audit import build_audit_bundle_zip
 
                 result_obj = existing_result or self.server.pipeline.run(intake, request_id=request_id)
                 bundle_request_id = result_obj.request_id or request_id
-                files = build_audit_bundle_files(
+                zip_bytes = build_audit_bundle_zip(
                     intake=intake,
                     result=result_obj,
                     redact=redact,
@@ -1679,15 +1731,10 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     case_meta=case_meta,
                 )
 
-                buf = io.BytesIO()
-                with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                    for name, data in files.items():
-                        zf.writestr(name, data)
-
-                self.server.stats["audit_bundle_success_total"] += 1
+                _bump_stat(self.server, "audit_bundle_success_total")
                 filename = f'clinicaflow_audit_{"redacted" if redact else "full"}_{bundle_request_id}.zip'
                 self._write_bytes(
-                    buf.getvalue(),
+                    zip_bytes,
                     content_type="application/zip",
                     request_id=bundle_request_id,
                     extra_headers={"Content-Disposition": f'attachment; filename="{filename}"'},
@@ -1696,7 +1743,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 return
 
             if path == "/judge_pack":
-                self.server.stats["judge_pack_requests_total"] += 1
+                _bump_stat(self.server, "judge_pack_requests_total")
                 set_name = _normalize_vignette_set(str(query.get("set", ["mega"])[0]))
                 redact = str(query.get("redact", ["1"])[0]).strip().lower() in {"1", "true", "yes"}
                 include_synthetic = str(query.get("include_synthetic", ["1"])[0]).strip().lower() in {"1", "true", "yes"}
@@ -1770,25 +1817,19 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 metrics_payload = _build_metrics_payload(self.server)
                 files["system/metrics.json"] = json.dumps(metrics_payload, indent=2, ensure_ascii=False).encode("utf-8")
 
-                from clinicaflow.rules import safety_rules_catalog
-
                 files["resources/safety_rules.json"] = json.dumps(safety_rules_catalog(), indent=2, ensure_ascii=False).encode("utf-8")
 
-                from importlib.resources import files as pkg_files
-
-                from clinicaflow.policy_pack import load_policy_pack, policy_pack_sha256
-
                 if self.server.settings.policy_pack_path:
                     policy_source = self.server.settings.policy_pack_path
                     policy_path: object = self.server.settings.policy_pack_path
                 else:
                     policy_source = "package:clinicaflow.resources/policy_pack.json"
-                    policy_path = pkg_files("clinicaflow.resources").joinpath("policy_pack.json")
+                    policy_path = resources.files("clinicaflow.resources").joinpath("policy_pack.json")
 
-                policies = load_policy_pack(policy_path)
+                policies, policy_sha256 = load_policy_pack_with_sha256(policy_path)
                 policy_payload = {
                     "source": str(policy_source),
-                    "sha256": policy_pack_sha256(policy_path),
+                    "sha256": policy_sha256,
                     "n_policies": len(policies),
                     "policies": [p.to_dict() for p in policies],
                 }
@@ -1811,6 +1852,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     to_governance_markdown,
                 )
 
+                generated_at = utc_now_iso()
                 gate = compute_gate(summary, min_red_flag_recall=99.9)
                 provenance = compute_action_provenance(per_case)
                 triggers = compute_trigger_coverage(per_case, top_k=20)
@@ -1822,6 +1864,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     provenance=provenance,
                     triggers=triggers,
                     ops=ops,
+                    generated_at=generated_at,
                 ).encode("utf-8")
                 files[f"governance/failure_packet_{set_name}.md"] = to_failure_packet_markdown(
                     set_name=set_name,
@@ -1830,6 +1873,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     summary=summary,
                     gate=gate,
                     limit=25,
+                    generated_at=generated_at,
                 ).encode("utf-8")
 
                 if include_synthetic:
@@ -1860,7 +1904,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                     for name, data in files.items():
                         zf.writestr(name, data)
 
-                self.server.stats["judge_pack_success_total"] += 1
+                _bump_stat(self.server, "judge_pack_success_total")
                 filename = f"clinicaflow_judge_pack_{pack_request_id}.zip"
                 self._write_bytes(
                     buf.getvalue(),
@@ -1871,7 +1915,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 status_code = HTTPStatus.OK
                 return
 
-            self.server.stats["fhir_bundle_requests_total"] += 1
+            _bump_stat(self.server, "fhir_bundle_requests_total")
             redact = str(query.get("redact", ["1"])[0]).strip().lower() in {"1", "true", "yes"}
             result_obj = existing_result or self.server.pipeline.run(intake, request_id=request_id)
             bundle_request_id = result_obj.request_id or request_id
@@ -1879,19 +1923,18 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
             from clinicaflow.fhir_export import build_fhir_bundle
 
             bundle = build_fhir_bundle(intake=intake, result=result_obj, redact=redact, checklist=checklist)
-            self.server.stats["fhir_bundle_success_total"] += 1
+            _bump_stat(self.server, "fhir_bundle_success_total")
             self._write_json(bundle, request_id=bundle_request_id)
             status_code = HTTPStatus.OK
         except Exception as exc:  # noqa: BLE001
-            if urlparse(self.path).path in {"/triage", "/triage_stream"}:
-                self.server.stats["triage_errors_total"] += 1
-                _record_recent_triage(self.server, ok=False)
-            elif urlparse(self.path).path == "/audit_bundle":
-                self.server.stats["audit_bundle_errors_total"] += 1
-            elif urlparse(self.path).path == "/judge_pack":
-                self.server.stats["judge_pack_errors_total"] += 1
+            if urlsplit(self.path).path in {"/triage", "/triage_stream"}:
+                _record_triage_error(self.server)
+            elif urlsplit(self.path).path == "/audit_bundle":
+                _bump_stat(self.server, "audit_bundle_errors_total")
+            elif urlsplit(self.path).path == "/judge_pack":
+                _bump_stat(self.server, "judge_pack_errors_total")
             else:
-                self.server.stats["fhir_bundle_errors_total"] += 1
+                _bump_stat(self.server, "fhir_bundle_errors_total")
             logger.exception("post_error", extra={"event": "post_error", "request_id": request_id})
             error_payload = {"error": {"code": "bad_request"}}
             if self.server.settings.debug:
@@ -1906,7 +1949,7 @@ class ClinicaFlowHandler(BaseHTTPRequestHandler):
                 extra={
                     "event": "http_request",
                     "method": "POST",
-                    "path": urlparse(self.path).path,
+                    "path": urlsplit(self.path).path,
                     "status_code": status_code_i,
                     "latency_ms": latency_ms,
                     "request_id": request_id,
@@ -1943,6 +1986,17 @@ def _normalize_vignette_set(value: str) -> str:
     return "standard"
 
 
+@lru_cache(maxsize=1)
+def _openapi_json_bytes() -> bytes:
+    # The spec only depends on module constants, so one encoding serves the process.
+    return _JSON_ENCODER.encode(_openapi_spec()).encode("utf-8")
+
+
+@lru_cache(maxsize=1)
+def _safety_rules_json_bytes() -> bytes:
+    return _JSON_ENCODER.encode(safety_rules_catalog()).encode("utf-8")
+
+
 def _openapi_spec() -> dict:
     intake_example = SAMPLE_INTAKE
     triage_example = {
@@ -2186,6 +2240,93 @@ def _openapi_spec() -> dict:
     }
 
 
+def _bump_stat(server: ClinicaFlowHTTPServer, key: str) -> None:
+    with server.stats_lock:
+        server.stats[key] += 1
+
+
+def _record_triage_error(server: ClinicaFlowHTTPServer) -> None:
+    with server.stats_lock:
+        server.stats["triage_errors_total"] += 1
+        _record_recent_triage(server, ok=False)
+
+
+def _record_triage_success(server: ClinicaFlowHTTPServer, result: dict) -> tuple[str, str, str]:
+    """Account a completed triage in the cumulative and rolling-window metrics.
+
+    Returns the (reasoning, communication, evidence) backends for the caller's log line.
+    """
+
+    with server.stats_lock:
+        server.stats["triage_success_total"] += 1
+        risk_tier = str(result.get("risk_tier") or "")
+        if risk_tier in server.stats["triage_risk_tier_total"]:
+            server.stats["triage_risk_tier_total"][risk_tier] += 1
+
+        backend = _extract_reasoning_backend(result)
+        if backend in server.stats["triage_reasoning_backend_total"]:
+            server.stats["triage_reasoning_backend_total"][backend] += 1
+
+        comm_backend = _extract_communication_backend(result)
+        if comm_backend in server.stats["triage_communication_backend_total"]:
+            server.stats["triage_communication_backend_total"][comm_backend] += 1
+
+        evidence_backend = _extract_evidence_backend(result)
+        if evidence_backend:
+            server.stats["triage_evidence_backend_total"][evidence_backend] = (
+                int(server.stats["triage_evidence_backend_total"].get(evidence_backend) or 0) + 1
+            )
+
+        latency = float(result.get("total_latency_ms") or 0.0)
+        server.stats["triage_latency_ms_sum"] += latency
+        server.stats["triage_latency_ms_count"] += 1
+
+        # Per-agent latency/error metrics (production-style observability).
+        trace_rows = result.get("trace") or []
+        if isinstance(trace_rows, list):
+            for step in trace_rows:
+                if not isinstance(step, dict):
+                    continue
+                agent = str(step.get("agent") or "").strip()
+                if not agent:
+                    continue
+
+                if agent not in server.stats["triage_agent_latency_ms_sum"]:
+                    server.stats["triage_agent_latency_ms_sum"][agent] = 0.0
+                    server.stats["triage_agent_latency_ms_count"][agent] = 0
+                    server.stats["triage_agent_errors_total"][agent] = 0
+
+                latency_ms = step.get("latency_ms")
+                if isinstance(latency_ms, (int, float)):
+                    server.stats["triage_agent_latency_ms_sum"][agent] += float(latency_ms)
+                    server.stats["triage_agent_latency_ms_count"][agent] += 1
+
+                err = step.get("error")
+                if isinstance(err, str) and err.strip():
+                    server.stats["triage_agent_errors_total"][agent] += 1
+                else:
+                    # Some agent failures are recorded in output fields rather than the trace-level
+                    # `error` field (e.g., external inference fallback). Count these as errors so
+                    # ops dashboards reflect backend instability.
+                    out = step.get("output") or {}
+                    derived = ""
+                    if isinstance(out, dict) and agent == "multimodal_reasoning":
+                        derived = str(out.get("reasoning_backend_error") or "").strip()
+                    elif isinstance(out, dict) and agent == "communication":
+                        derived = str(out.get("communication_backend_error") or "").strip()
+                    if derived:
+                        server.stats["triage_agent_errors_total"][agent] += 1
+
+        _record_recent_triage(
+            server,
+            ok=True,
+            latency_ms=latency,
+            trace_rows=trace_rows if isinstance(trace_rows, list) else None,
+        )
+
+    return backend, comm_backend, evidence_backend
+
+
 def _extract_reasoning_backend(result_payload: dict) -> str:
     try:
         for step in result_payload.get("trace", []):
@@ -2224,80 +2365,85 @@ def _extract_evidence_backend(result_payload: dict) -> str:
     return "local"
 
 
-def _format_prometheus_metrics(payload: dict) -> str:
-    lines: list[str] = []
+# (metric name, payload key) for the unlabelled series, in exposition order.
+_PROM_SCALAR_METRICS: tuple[tuple[str, str], ...] = (
+    # Top-level counters
+    ("clinicaflow_requests_total", "requests_total"),
+    ("clinicaflow_triage_requests_total", "triage_requests_total"),
+    ("clinicaflow_triage_success_total", "triage_success_total"),
+    ("clinicaflow_triage_errors_total", "triage_errors_total"),
+    ("clinicaflow_audit_bundle_requests_total", "audit_bundle_requests_total"),
+    ("clinicaflow_audit_bundle_success_total", "audit_bundle_success_total"),
+    ("clinicaflow_audit_bundle_errors_total", "audit_bundle_errors_total"),
+    ("clinicaflow_judge_pack_requests_total", "judge_pack_requests_total"),
+    ("clinicaflow_judge_pack_success_total", "judge_pack_success_total"),
+    ("clinicaflow_judge_pack_errors_total", "judge_pack_errors_total"),
+    ("clinicaflow_fhir_bundle_requests_total", "fhir_bundle_requests_total"),
+    ("clinicaflow_fhir_bundle_success_total", "fhir_bundle_success_total"),
+    ("clinicaflow_fhir_bundle_errors_total", "fhir_bundle_errors_total"),
+    ("clinicaflow_triage_latency_ms_avg", "triage_latency_ms_avg"),
+    ("clinicaflow_triage_latency_ms_avg_window", "triage_latency_ms_avg_window"),
+    ("clinicaflow_triage_latency_ms_p50", "triage_latency_ms_p50"),
+    ("clinicaflow_triage_latency_ms_p95", "triage_latency_ms_p95"),
+    ("clinicaflow_triage_latency_ms_window_n", "triage_latency_ms_window_n"),
+    ("clinicaflow_triage_recent_error_rate", "triage_recent_error_rate"),
+    ("clinicaflow_triage_recent_window_n", "triage_recent_window_n"),
+)
+
+# (metric name, payload key, label name) for the nested breakdowns.
+_PROM_LABELLED_METRICS: tuple[tuple[str, str, str], ...] = (
+    ("clinicaflow_triage_risk_tier_total", "triage_risk_tier_total", "tier"),
+    ("clinicaflow_triage_reasoning_backend_total", "triage_reasoning_backend_total", "backend"),
+    ("clinicaflow_triage_communication_backend_total", "triage_communication_backend_total", "backend"),
+    ("clinicaflow_triage_evidence_backend_total", "triage_evidence_backend_total", "backend"),
+    ("clinicaflow_triage_agent_latency_ms_sum", "triage_agent_latency_ms_sum", "agent"),
+    ("clinicaflow_triage_agent_latency_ms_count", "triage_agent_latency_ms_count", "agent"),
+    ("clinicaflow_triage_agent_errors_total", "triage_agent_errors_total", "agent"),
+    ("clinicaflow_triage_agent_latency_ms_avg_window", "triage_agent_latency_ms_avg_window", "agent"),
+    ("clinicaflow_triage_agent_latency_ms_p50", "triage_agent_latency_ms_p50", "agent"),
+    ("clinicaflow_triage_agent_latency_ms_p95", "triage_agent_latency_ms_p95", "agent"),
+    ("clinicaflow_triage_agent_latency_ms_window_n", "triage_agent_latency_ms_window_n", "agent"),
+)
+
+
+def _prom_value(value: object) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
 
-    def esc(value: str) -> str:
-        return str(value).replace("\\", "\\\\").replace('"', '\\"')
 
-    def metric(name: str, value: object, labels: dict[str, str] | None = None) -> None:
-        if value is None:
-            return
-        try:
-            v = float(value)
-        except (TypeError, ValueError):
-            return
-        if labels:
-            label_s = ",".join(f'{k}="{esc(vv)}"' for k, vv in labels.items())
-            lines.append(f"{name}{{{label_s}}} {v}")
-        else:
-            lines.append(f"{name} {v}")
+def _prom_escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
 
-    metric("clinicaflow_uptime_seconds", payload.get("uptime_s"))
+
+def _format_prometheus_metrics(payload: dict) -> bytes:
+    """Render the metrics payload in the Prometheus text exposition format (UTF-8)."""
+
+    lines: list[str] = []
+    append = lines.append
+
+    uptime = _prom_value(payload.get("uptime_s"))
+    if uptime is not None:
+        append(f"clinicaflow_uptime_seconds {uptime}")
     version = str(payload.get("version") or "").strip()
     if version:
-        metric("clinicaflow_version_info", 1, {"version": version})
+        append(f'clinicaflow_version_info{{version="{_prom_escape(version)}"}} 1.0')
 
-    # Top-level counters
-    metric("clinicaflow_requests_total", payload.get("requests_total"))
-    metric("clinicaflow_triage_requests_total", payload.get("triage_requests_total"))
-    metric("clinicaflow_triage_success_total", payload.get("triage_success_total"))
-    metric("clinicaflow_triage_errors_total", payload.get("triage_errors_total"))
-    metric("clinicaflow_audit_bundle_requests_total", payload.get("audit_bundle_requests_total"))
-    metric("clinicaflow_audit_bundle_success_total", payload.get("audit_bundle_success_total"))
-    metric("clinicaflow_audit_bundle_errors_total", payload.get("audit_bundle_errors_total"))
-    metric("clinicaflow_judge_pack_requests_total", payload.get("judge_pack_requests_total"))
-    metric("clinicaflow_judge_pack_success_total", payload.get("judge_pack_success_total"))
-    metric("clinicaflow_judge_pack_errors_total", payload.get("judge_pack_errors_total"))
-    metric("clinicaflow_fhir_bundle_requests_total", payload.get("fhir_bundle_requests_total"))
-    metric("clinicaflow_fhir_bundle_success_total", payload.get("fhir_bundle_success_total"))
-    metric("clinicaflow_fhir_bundle_errors_total", payload.get("fhir_bundle_errors_total"))
-
-    metric("clinicaflow_triage_latency_ms_avg", payload.get("triage_latency_ms_avg"))
-    metric("clinicaflow_triage_latency_ms_avg_window", payload.get("triage_latency_ms_avg_window"))
-    metric("clinicaflow_triage_latency_ms_p50", payload.get("triage_latency_ms_p50"))
-    metric("clinicaflow_triage_latency_ms_p95", payload.get("triage_latency_ms_p95"))
-    metric("clinicaflow_triage_latency_ms_window_n", payload.get("triage_latency_ms_window_n"))
-    metric("clinicaflow_triage_recent_error_rate", payload.get("triage_recent_error_rate"))
-    metric("clinicaflow_triage_recent_window_n", payload.get("triage_recent_window_n"))
-
-    # Nested breakdowns
-    for tier, count in dict(payload.get("triage_risk_tier_total") or {}).items():
-        metric("clinicaflow_triage_risk_tier_total", count, {"tier": str(tier)})
-    for backend, count in dict(payload.get("triage_reasoning_backend_total") or {}).items():
-        metric("clinicaflow_triage_reasoning_backend_total", count, {"backend": str(backend)})
-    for backend, count in dict(payload.get("triage_communication_backend_total") or {}).items():
-        metric("clinicaflow_triage_communication_backend_total", count, {"backend": str(backend)})
-    for backend, count in dict(payload.get("triage_evidence_backend_total") or {}).items():
-        metric("clinicaflow_triage_evidence_backend_total", count, {"backend": str(backend)})
-
-    for agent, total in dict(payload.get("triage_agent_latency_ms_sum") or {}).items():
-        metric("clinicaflow_triage_agent_latency_ms_sum", total, {"agent": str(agent)})
-    for agent, count in dict(payload.get("triage_agent_latency_ms_count") or {}).items():
-        metric("clinicaflow_triage_agent_latency_ms_count", count, {"agent": str(agent)})
-    for agent, count in dict(payload.get("triage_agent_errors_total") or {}).items():
-        metric("clinicaflow_triage_agent_errors_total", count, {"agent": str(agent)})
-
-    for agent, value in dict(payload.get("triage_agent_latency_ms_avg_window") or {}).items():
-        metric("clinicaflow_triage_agent_latency_ms_avg_window", value, {"agent": str(agent)})
-    for agent, value in dict(payload.get("triage_agent_latency_ms_p50") or {}).items():
-        metric("clinicaflow_triage_agent_latency_ms_p50", value, {"agent": str(agent)})
-    for agent, value in dict(payload.get("triage_agent_latency_ms_p95") or {}).items():
-        metric("clinicaflow_triage_agent_latency_ms_p95", value, {"agent": str(agent)})
-    for agent, value in dict(payload.get("triage_agent_latency_ms_window_n") or {}).items():
-        metric("clinicaflow_triage_agent_latency_ms_window_n", value, {"agent": str(agent)})
-
-    return "\n".join(lines).strip() + "\n"
+    for name, key in _PROM_SCALAR_METRICS:
+        v = _prom_value(payload.get(key))
+        if v is not None:
+            append(f"{name} {v}")
+
+    for name, key, label in _PROM_LABELLED_METRICS:
+        for label_value, raw in dict(payload.get(key) or {}).items():
+            v = _prom_value(raw)
+            if v is not None:
+                append(f'{name}{{{label}="{_prom_escape(label_value)}"}} {v}')
+
+    return ("\n".join(lines) + "\n").encode("utf-8")
 
 
 def make_server(
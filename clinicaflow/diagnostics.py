@@ -8,7 +8,7 @@ import urllib.request
 import xml.etree.ElementTree as ET
 from typing import Any
 
-from clinicaflow.policy_pack import load_policy_pack, policy_pack_sha256
+from clinicaflow.policy_pack import load_policy_pack_with_sha256
 from clinicaflow.settings import load_settings_from_env
 from clinicaflow.version import __version__
 from clinicaflow.inference.openai_compatible import circuit_breaker_status
@@ -27,33 +27,52 @@ def resolve_policy_pack_path() -> tuple[object, str]:
     return policy_path, "package:clinicaflow.resources/policy_pack.json"
 
 
+# (suffix, default) for the per-backend env vars read by `collect_diagnostics`.
+_BACKEND_ENV_DEFAULTS: tuple[tuple[str, str], ...] = (
+    ("backend", "deterministic"),
+    ("base_url", ""),
+    ("base_urls", ""),
+    ("model", ""),
+    ("timeout_s", ""),
+    ("max_retries", ""),
+)
+
+
+def _backend_env(prefix: str) -> dict[str, str]:
+    """Return the stripped `<prefix>_<SUFFIX>` settings for one inference backend."""
+
+    environ = os.environ
+    return {key: environ.get(f"{prefix}_{key.upper()}", default).strip() for key, default in _BACKEND_ENV_DEFAULTS}
+
+
 def collect_diagnostics() -> dict[str, Any]:
     """Collect safe runtime diagnostics (no secrets)."""
     settings = load_settings_from_env()
     policy_path, policy_source = resolve_policy_pack_path()
 
     try:
-        policy_sha256 = policy_pack_sha256(policy_path)
-        n_policies = len(load_policy_pack(policy_path))
+        policies, policy_sha256 = load_policy_pack_with_sha256(policy_path)
+        n_policies = len(policies)
     except Exception:  # noqa: BLE001
         policy_sha256 = ""
         n_policies = 0
 
-    reasoning_backend = os.environ.get("CLINICAFLOW_REASONING_BACKEND", "deterministic").strip()
-    reasoning_base_url = os.environ.get("CLINICAFLOW_REASONING_BASE_URL", "").strip()
+    reasoning_env = _backend_env("CLINICAFLOW_REASONING")
+    reasoning_backend = reasoning_env["backend"]
+    reasoning_base_url = reasoning_env["base_url"]
     if not reasoning_base_url:
-        raw_urls = os.environ.get("CLINICAFLOW_REASONING_BASE_URLS", "").strip()
+        raw_urls = reasoning_env["base_urls"]
         if raw_urls:
             reasoning_base_url = raw_urls.split(",", 1)[0].split("|", 1)[0].strip()
-    reasoning_model = os.environ.get("CLINICAFLOW_REASONING_MODEL", "").strip()
+    reasoning_model = reasoning_env["model"]
     if reasoning_backend.strip().lower() == "gradio_space" and not reasoning_model:
         reasoning_model = os.environ.get("CLINICAFLOW_REASONING_GRADIO_API_NAME", "chat").strip() or "chat"
     if reasoning_backend.strip().lower() == "hf_inference" and not reasoning_base_url:
         from clinicaflow.inference.hf_inference import DEFAULT_HF_ROUTER_BASE_URL
 
         reasoning_base_url = DEFAULT_HF_ROUTER_BASE_URL
-    reasoning_timeout_s = os.environ.get("CLINICAFLOW_REASONING_TIMEOUT_S", "").strip()
-    reasoning_max_retries = os.environ.get("CLINICAFLOW_REASONING_MAX_RETRIES", "").strip()
+    reasoning_timeout_s = reasoning_env["timeout_s"]
+    reasoning_max_retries = reasoning_env["max_retries"]
     reasoning_api_key = os.environ.get("CLINICAFLOW_REASONING_API_KEY")
 
     connectivity = _check_reasoning_connectivity(
@@ -64,22 +83,23 @@ def collect_diagnostics() -> dict[str, Any]:
         api_key=reasoning_api_key,
     )
 
-    comm_backend = os.environ.get("CLINICAFLOW_COMMUNICATION_BACKEND", "deterministic").strip()
-    comm_base_url = os.environ.get("CLINICAFLOW_COMMUNICATION_BASE_URL", "").strip()
+    comm_env = _backend_env("CLINICAFLOW_COMMUNICATION")
+    comm_backend = comm_env["backend"]
+    comm_base_url = comm_env["base_url"]
     if not comm_base_url:
-        raw_urls = os.environ.get("CLINICAFLOW_COMMUNICATION_BASE_URLS", "").strip()
+        raw_urls = comm_env["base_urls"]
         if raw_urls:
             comm_base_url = raw_urls.split(",", 1)[0].split("|", 1)[0].strip()
     comm_base_url = comm_base_url or reasoning_base_url
-    comm_model = os.environ.get("CLINICAFLOW_COMMUNICATION_MODEL", "").strip() or reasoning_model
+    comm_model = comm_env["model"] or reasoning_model
     if comm_backend.strip().lower() == "gradio_space" and not comm_model:
         comm_model = os.environ.get("CLINICAFLOW_COMMUNICATION_GRADIO_API_NAME", "chat").strip() or "chat"
     if comm_backend.strip().lower() == "hf_inference" and not comm_base_url:
         from clinicaflow.inference.hf_inference import DEFAULT_HF_ROUTER_BASE_URL
 
         comm_base_url = DEFAULT_HF_ROUTER_BASE_URL
-    comm_timeout_s = os.environ.get("CLINICAFLOW_COMMUNICATION_TIMEOUT_S", "").strip() or reasoning_timeout_s
-    comm_max_retries = os.environ.get("CLINICAFLOW_COMMUNICATION_MAX_RETRIES", "").strip() or reasoning_max_retries
+    comm_timeout_s = comm_env["timeout_s"] or reasoning_timeout_s
+    comm_max_retries = comm_env["max_retries"] or reasoning_max_retries
     comm_api_key = os.environ.get("CLINICAFLOW_COMMUNICATION_API_KEY")
     if comm_api_key is None:
         comm_api_key = reasoning_api_key
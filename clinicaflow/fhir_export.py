@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import asdict
-from datetime import datetime, timezone
 from typing import Any
 
-from clinicaflow.models import PatientIntake, TriageResult, Vitals
+from clinicaflow.models import PatientIntake, TriageResult, Vitals, utc_now_iso
 from clinicaflow.privacy import scrub_phi
 
 
@@ -23,7 +22,7 @@ def build_fhir_bundle(
     - If `redact=True`, demographics and free-text notes are omitted.
     """
 
-    created_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    created_at = utc_now_iso()
     intake_payload = asdict(intake)
 
     if redact:
@@ -112,7 +111,7 @@ def _vitals_observations(vitals: Vitals, *, patient_ref: str, request_id: str) -
 
 
 def _clinical_impression(*, result: TriageResult, patient_ref: str, actions: list[dict[str, Any]]) -> dict[str, Any]:
-    done = sum(1 for x in actions if x.get("checked"))
+    done = sum(x["checked"] for x in actions)
     total = len(actions)
     action_lines = []
     if total:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import time
+from collections.abc import Iterable
 from dataclasses import asdict, dataclass, field
-from datetime import datetime, timezone
 from typing import Any
 from uuid import uuid4
 
@@ -67,6 +68,13 @@ class PatientIntake:
             prior_notes=[str(x) for x in payload.get("prior_notes", [])],
         )
 
+    @classmethod
+    def from_mapping_many(cls, payloads: Iterable[dict[str, Any]]) -> list["PatientIntake"]:
+        """Build intakes for a whole dataset up front (e.g., before a benchmark loop)."""
+
+        from_mapping = cls.from_mapping
+        return [from_mapping(payload) for payload in payloads]
+
     def combined_text(self) -> str:
         sections = [self.chief_complaint, self.history, *self.prior_notes, *self.image_descriptions]
         return "\n".join(part.strip() for part in sections if part and part.strip())
@@ -151,9 +159,9 @@ class TriageResult:
         )
 
     def to_dict(self) -> dict[str, Any]:
-        payload = asdict(self)
-        payload["trace"] = [asdict(step) for step in self.trace]
-        return payload
+        # `asdict` already recurses into the trace steps; converting them again
+        # would deep-copy the largest part of the result twice.
+        return asdict(self)
 
 
 def new_run_id() -> str:
@@ -161,7 +169,8 @@ def new_run_id() -> str:
 
 
 def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    # Same text as `datetime.now(timezone.utc).replace(microsecond=0).isoformat()`, without the datetime objects.
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
 
 
 def _to_float(value: Any) -> float | None:
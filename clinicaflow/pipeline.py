@@ -12,6 +12,7 @@ from clinicaflow.agents import (
     IntakeStructuringAgent,
     MultimodalClinicalReasoningAgent,
     SafetyEscalationAgent,
+    _default_policies,
 )
 from clinicaflow.models import AgentTrace, PatientIntake, StructuredIntake, TriageResult, new_run_id, utc_now_iso
 from clinicaflow.rules import SAFETY_RULES_VERSION
@@ -28,6 +29,11 @@ class ClinicaFlowPipeline:
         self.safety_escalation = SafetyEscalationAgent()
         self.communication = CommunicationAgent()
 
+    def warmup(self) -> None:
+        """Populate lazily-loaded shared state (the policy pack) ahead of the first run."""
+
+        _default_policies()
+
     def run(
         self,
         intake: PatientIntake,
@@ -272,3 +278,21 @@ class ClinicaFlowPipeline:
             uncertainty_reasons=safety_payload["uncertainty_reasons"],
             trace=trace,
         )
+
+
+_CACHED_PIPELINE: ClinicaFlowPipeline | None = None
+
+
+def get_pipeline() -> ClinicaFlowPipeline:
+    """Return a process-wide, warmed-up pipeline.
+
+    Agents keep no per-run state, so benchmarks and CLI commands can share one
+    instance instead of constructing their own.
+    """
+
+    global _CACHED_PIPELINE  # noqa: PLW0603
+    if _CACHED_PIPELINE is None:
+        pipeline = ClinicaFlowPipeline()
+        pipeline.warmup()
+        _CACHED_PIPELINE = pipeline
+    return _CACHED_PIPELINE
@@ -22,7 +22,21 @@ class PolicySnippet:
 
 
 def load_policy_pack(path: Any) -> list[PolicySnippet]:
-    payload = json.loads(_read_text(path))
+    return _parse_policy_pack(json.loads(_read_text(path)))
+
+
+def load_policy_pack_with_sha256(path: Any) -> tuple[list[PolicySnippet], str]:
+    """Load the policy pack and its digest from a single read of the file.
+
+    Equivalent to `(load_policy_pack(path), policy_pack_sha256(path))`, which
+    every caller that reports the digest used to do back to back.
+    """
+
+    raw = _read_bytes(path)
+    return _parse_policy_pack(json.loads(raw.decode("utf-8"))), hashlib.sha256(raw).hexdigest()
+
+
+def _parse_policy_pack(payload: dict[str, Any]) -> list[PolicySnippet]:
     snippets = []
     for item in payload.get("policies", []):
         snippets.append(
@@ -39,6 +53,11 @@ def load_policy_pack(path: Any) -> list[PolicySnippet]:
 
 def policy_pack_sha256(path: Any) -> str:
     """Stable digest for governance/audit logs."""
+    if isinstance(path, (str, Path)) and hasattr(hashlib, "file_digest"):
+        # Python 3.11+: hash straight from the file descriptor, without first copying
+        # the whole pack into a bytes object.
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
     return hashlib.sha256(_read_bytes(path)).hexdigest()
 
 
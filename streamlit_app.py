@@ -1,16 +1,14 @@
 from __future__ import annotations
 
 import base64
-import io
 import json
 import os
-import zipfile
 from dataclasses import asdict
 from typing import Any
 
 import streamlit as st
 
-from clinicaflow.audit import build_audit_bundle_files
+from clinicaflow.audit import build_audit_bundle_zip
 from clinicaflow.benchmarks.vignettes import (
     categories_from_red_flags,
     load_default_vignette_paths,
@@ -74,14 +72,6 @@ def _to_data_url(mime: str, data: bytes) -> str:
     return f"data:{mime};base64,{b64}"
 
 
-def _zip_bytes(files: dict[str, bytes]) -> bytes:
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for name, data in files.items():
-            zf.writestr(name, data)
-    return buf.getvalue()
-
-
 @st.cache_resource(show_spinner=False)
 def _pipeline() -> ClinicaFlowPipeline:
     return ClinicaFlowPipeline()
@@ -249,7 +239,7 @@ def _render_audit_downloads(intake: PatientIntake, result: Any) -> None:
     st.subheader("Audit downloads")
     cols = st.columns(2)
     with cols[0]:
-        files = build_audit_bundle_files(
+        zip_bytes = build_audit_bundle_zip(
             intake=intake,
             result=result,
             redact=True,
@@ -257,13 +247,13 @@ def _render_audit_downloads(intake: PatientIntake, result: Any) -> None:
         )
         st.download_button(
             "Download redacted audit bundle (zip)",
-            data=_zip_bytes(files),
+            data=zip_bytes,
             file_name=f"clinicaflow_audit_redacted_{getattr(result, 'run_id', 'run')}.zip",
             mime="application/zip",
             use_container_width=True,
         )
     with cols[1]:
-        files = build_audit_bundle_files(
+        zip_bytes = build_audit_bundle_zip(
             intake=intake,
             result=result,
             redact=False,
@@ -271,7 +261,7 @@ def _render_audit_downloads(intake: PatientIntake, result: Any) -> None:
         )
         st.download_button(
             "Download full audit bundle (zip)",
-            data=_zip_bytes(files),
+            data=zip_bytes,
             file_name=f"clinicaflow_audit_full_{getattr(result, 'run_id', 'run')}.zip",
             mime="application/zip",
             use_container_width=True,
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
 import tempfile
 import unittest
+import zipfile
 from pathlib import Path
 
-from clinicaflow.audit import write_audit_bundle
+from clinicaflow.audit import build_audit_bundle_files, build_audit_bundle_zip, write_audit_bundle
 from clinicaflow.models import PatientIntake
 from clinicaflow.pipeline import ClinicaFlowPipeline
 
@@ -51,6 +54,9 @@ class AuditBundleTests(unittest.TestCase):
             self.assertIn("triage_result.json", hashes)
             self.assertIn("doctor.json", hashes)
             self.assertIn("fhir_bundle.json", hashes)
+            for name, digest in hashes.items():
+                data = (out_dir / name).read_bytes()
+                self.assertEqual(digest, hashlib.sha256(data).hexdigest())
 
             fhir = json.loads((out_dir / "fhir_bundle.json").read_text(encoding="utf-8"))
             self.assertEqual(fhir.get("resourceType"), "Bundle")
@@ -105,6 +111,29 @@ class AuditBundleTests(unittest.TestCase):
             text = (payload[0] or {}).get("contentString") if payload else ""
             self.assertEqual(text, "Redacted (no PHI). Decision support only.")
 
+    def test_build_audit_bundle_zip_matches_files(self) -> None:
+        intake = PatientIntake.from_mapping(
+            {
+                "chief_complaint": "Fever and cough",
+                "vitals": {"heart_rate": 104, "temperature_c": 38.6},
+                "image_data_urls": ["data:image/png;base64,iVBORw0KGgo="],
+            }
+        )
+        result = ClinicaFlowPipeline().run(intake, request_id="req-audit-zip")
+        case_meta = {"vignette": {"id": "v1", "set": "standard"}}
+
+        files = build_audit_bundle_files(intake=intake, result=result, case_meta=case_meta)
+        zip_bytes = build_audit_bundle_zip(intake=intake, result=result, case_meta=case_meta)
+
+        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+            self.assertEqual(zf.namelist(), list(files))
+            manifest = json.loads(zf.read("manifest.json").decode("utf-8"))
+            hashes = manifest["file_hashes_sha256"]
+            self.assertEqual(set(hashes), set(files) - {"manifest.json"})
+            for name, digest in hashes.items():
+                self.assertEqual(digest, hashlib.sha256(zf.read(name)).hexdigest())
+                self.assertEqual(zf.read(name), files[name])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import unittest
+from email.message import Message
 
-from clinicaflow.auth import is_authorized
+from clinicaflow.auth import ApiKeyAuthenticator, is_authorized
 
 
 class AuthTests(unittest.TestCase):
@@ -19,10 +20,38 @@ class AuthTests(unittest.TestCase):
         self.assertTrue(is_authorized(headers=headers, expected_api_key="secret123"))
         self.assertFalse(is_authorized(headers=headers, expected_api_key="other"))
 
+    def test_header_names_are_case_insensitive(self) -> None:
+        self.assertTrue(is_authorized(headers={"authorization": "Bearer secret123"}, expected_api_key="secret123"))
+        self.assertTrue(is_authorized(headers={"x-api-key": "secret123"}, expected_api_key="secret123"))
+        self.assertTrue(is_authorized(headers={"X-API-KEY": "secret123"}, expected_api_key="secret123"))
+
+    def test_duplicated_header_uses_first_occurrence(self) -> None:
+        headers = Message()
+        headers["X-API-Key"] = "secret123"
+        headers["X-API-Key"] = "wrong"
+        self.assertTrue(is_authorized(headers=headers, expected_api_key="secret123"))
+
+        headers = Message()
+        headers["X-API-Key"] = "wrong"
+        headers["x-api-key"] = "secret123"
+        self.assertFalse(is_authorized(headers=headers, expected_api_key="secret123"))
+
     def test_wrong_scheme_rejected(self) -> None:
         headers = {"Authorization": "Basic secret123"}
         self.assertFalse(is_authorized(headers=headers, expected_api_key="secret123"))
 
+    def test_token_length_mismatch_rejected(self) -> None:
+        for token in ("s", "secret12", "secret1234", "secret123" * 4):
+            self.assertFalse(is_authorized(headers={"X-API-Key": token}, expected_api_key="secret123"))
+
+    def test_authenticator_reuses_expected_key(self) -> None:
+        auth = ApiKeyAuthenticator("secret123")
+        self.assertTrue(auth.enabled)
+        self.assertTrue(auth.check({"Authorization": "Bearer secret123"}))
+        self.assertTrue(auth.check({"X-API-Key": "secret123"}))
+        self.assertFalse(auth.check({"X-API-Key": "secret12"}))
+        self.assertFalse(ApiKeyAuthenticator("").enabled)
+
 
 if __name__ == "__main__":
     unittest.main()
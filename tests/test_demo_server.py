@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import gzip
+import http.client
 import json
 import io
+import os
 import socket
+import tempfile
 import threading
 import urllib.error
 import urllib.request
@@ -197,6 +201,43 @@ class DemoServerTests(unittest.TestCase):
         finally:
             _stop_server(server, thread)
 
+    def test_policy_pack_endpoint_picks_up_edited_pack(self) -> None:
+        def pack(*ids: str) -> str:
+            return json.dumps({"policies": [{"policy_id": i, "title": i, "triggers": [], "recommended_actions": []} for i in ids]})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pack_path = os.path.join(tmp, "pack.json")
+            with open(pack_path, "w", encoding="utf-8") as fh:
+                fh.write(pack("p1"))
+            settings = Settings(
+                debug=False,
+                log_level="INFO",
+                json_logs=False,
+                max_request_bytes=262144,
+                policy_top_k=2,
+                policy_pack_path=pack_path,
+                cors_allow_origin="*",
+                api_key="",
+            )
+            server, thread, base_url = _start_server(settings=settings)
+            try:
+                _, _, raw = _http("GET", base_url + "/policy_pack")
+                first = json.loads(raw.decode("utf-8"))
+                self.assertEqual([p["policy_id"] for p in first["policies"]], ["p1"])
+
+                with open(pack_path, "w", encoding="utf-8") as fh:
+                    fh.write(pack("p1", "p2"))
+                st = os.stat(pack_path)
+                os.utime(pack_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+                _, _, raw = _http("GET", base_url + "/policy_pack?limit=1")
+                second = json.loads(raw.decode("utf-8"))
+                self.assertEqual(second["n_policies"], 2)
+                self.assertEqual([p["policy_id"] for p in second["policies"]], ["p1"])
+                self.assertNotEqual(second["sha256"], first["sha256"])
+            finally:
+                _stop_server(server, thread)
+
     def test_safety_rules_endpoint(self) -> None:
         settings = Settings(
             debug=False,
@@ -343,6 +384,103 @@ class DemoServerTests(unittest.TestCase):
         finally:
             _stop_server(server, thread)
 
+    def test_static_assets_served_gzipped_when_accepted(self) -> None:
+        settings = Settings(
+            debug=False,
+            log_level="INFO",
+            json_logs=False,
+            max_request_bytes=262144,
+            policy_top_k=2,
+            policy_pack_path="",
+            cors_allow_origin="*",
+            api_key="",
+        )
+        server, thread, base_url = _start_server(settings=settings)
+        try:
+            status, headers, plain = _http("GET", base_url + "/static/app.js")
+            self.assertEqual(status, 200)
+            self.assertIsNone(headers.get("Content-Encoding"))
+            self.assertEqual(headers.get("Content-Length"), str(len(plain)))
+
+            status, headers, raw = _http("GET", base_url + "/static/app.js", headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(status, 200)
+            self.assertEqual(headers.get("Content-Encoding"), "gzip")
+            self.assertEqual(headers.get("Vary"), "Accept-Encoding")
+            self.assertEqual(headers.get("Content-Length"), str(len(raw)))
+            self.assertEqual(gzip.decompress(raw), plain)
+
+            status, headers, _ = _http("GET", base_url + "/static/app.js", headers={"Accept-Encoding": "gzip;q=0"})
+            self.assertEqual(status, 200)
+            self.assertIsNone(headers.get("Content-Encoding"))
+        finally:
+            _stop_server(server, thread)
+
+    def test_static_assets_revalidate_with_etag(self) -> None:
+        settings = Settings(
+            debug=False,
+            log_level="INFO",
+            json_logs=False,
+            max_request_bytes=262144,
+            policy_top_k=2,
+            policy_pack_path="",
+            cors_allow_origin="*",
+            api_key="",
+        )
+        server, thread, base_url = _start_server(settings=settings)
+        try:
+            status, headers, _ = _http("GET", base_url + "/static/app.css")
+            self.assertEqual(status, 200)
+            etag = headers.get("ETag") or ""
+            self.assertTrue(etag.startswith('"'))
+
+            status, headers, raw = _http("GET", base_url + "/static/app.css", headers={"If-None-Match": etag})
+            self.assertEqual(status, 304)
+            self.assertEqual(headers.get("ETag"), etag)
+            self.assertEqual(raw, b"")
+
+            # The gzip representation carries a different validator.
+            status, headers, _ = _http(
+                "GET",
+                base_url + "/static/app.css",
+                headers={"If-None-Match": etag, "Accept-Encoding": "gzip"},
+            )
+            self.assertEqual(status, 200)
+            self.assertNotEqual(headers.get("ETag"), etag)
+        finally:
+            _stop_server(server, thread)
+
+    def test_connection_is_reused_across_requests(self) -> None:
+        settings = Settings(
+            debug=False,
+            log_level="INFO",
+            json_logs=False,
+            max_request_bytes=262144,
+            policy_top_k=2,
+            policy_pack_path="",
+            cors_allow_origin="*",
+            api_key="",
+        )
+        server, thread, _ = _start_server(settings=settings)
+        conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+        try:
+            for path in ("/health", "/example", "/openapi.json"):
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                body = resp.read()
+                self.assertEqual(resp.status, 200)
+                self.assertEqual(resp.getheader("Content-Length"), str(len(body)))
+                self.assertFalse(resp.will_close)
+
+            # A rejected POST leaves its body unread, so the server must close.
+            conn.request("POST", "/triage", body=b"{}", headers={"Content-Type": "text/plain"})
+            resp = conn.getresponse()
+            resp.read()
+            self.assertEqual(resp.status, 415)
+            self.assertTrue(resp.will_close)
+        finally:
+            conn.close()
+            _stop_server(server, thread)
+
     def test_triage_happy_path(self) -> None:
         settings = Settings(
             debug=False,
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import copy
+import unittest
+
+from clinicaflow.benchmarks.governance import (
+    compute_action_provenance,
+    compute_gate,
+    compute_trigger_coverage,
+    to_failure_packet_markdown,
+)
+from clinicaflow.benchmarks.vignettes import load_default_vignette_path, load_vignettes, run_benchmark_rows
+
+
+class GovernanceTests(unittest.TestCase):
+    def test_failure_packet_renders_each_case_once(self) -> None:
+        rows = load_vignettes(load_default_vignette_path())
+        summary, per_case = run_benchmark_rows(rows)
+
+        target = next(row for row in per_case if row["gold"]["risk_tier"] in {"urgent", "critical"})
+        target["clinicaflow"]["risk_tier"] = "routine"
+        case_id = target["id"]
+
+        md = to_failure_packet_markdown(
+            set_name="standard",
+            rows=rows,
+            per_case=per_case,
+            summary=summary,
+            gate=compute_gate(summary, min_red_flag_recall=99.9),
+        )
+
+        self.assertEqual(md.count(f"### {case_id}\n"), 1)
+        self.assertIn(f"- [{case_id}](#{case_id.lower()}) (shown above)", md)
+        self.assertLess(md.index(f"### {case_id}\n"), md.index("## Tier mismatches"))
+
+    def test_failure_packet_renders_distinct_rows_sharing_an_id(self) -> None:
+        rows = load_vignettes(load_default_vignette_path())
+        summary, per_case = run_benchmark_rows(rows)
+
+        target = next(row for row in per_case if row["gold"]["risk_tier"] in {"urgent", "critical"})
+        target["clinicaflow"]["risk_tier"] = "routine"
+        twin = copy.deepcopy(target)
+        twin["clinicaflow"]["risk_tier_rationale"] = "twin row"
+        case_id = target["id"]
+
+        md = to_failure_packet_markdown(
+            set_name="standard",
+            rows=rows,
+            per_case=[target, twin],
+            summary=summary,
+            gate=compute_gate(summary, min_red_flag_recall=99.9),
+        )
+
+        self.assertEqual(md.count(f"### {case_id}\n"), 2)
+        self.assertIn("- rationale: twin row", md)
+
+    def test_failure_packet_collapses_when_all_cases_match(self) -> None:
+        rows = load_vignettes(load_default_vignette_path())
+        summary, per_case = run_benchmark_rows(rows)
+        matching = [row for row in per_case if row["gold"]["risk_tier"] == row["clinicaflow"]["risk_tier"]]
+
+        md = to_failure_packet_markdown(
+            set_name="standard",
+            rows=rows,
+            per_case=matching,
+            summary=summary,
+            gate=compute_gate(summary, min_red_flag_recall=99.9),
+        )
+
+        self.assertIn("## Failures\n\n- PASS", md)
+        self.assertNotIn("## Tier mismatches", md)
+        self.assertTrue(md.endswith(").\n"))
+
+    def test_empty_per_case(self) -> None:
+        self.assertEqual(compute_action_provenance([]).total_actions, 0)
+        self.assertEqual(compute_trigger_coverage([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import unittest
+from importlib.resources import files
 
 from clinicaflow.models import PatientIntake
 from clinicaflow.pipeline import ClinicaFlowPipeline
+from clinicaflow.policy_pack import load_policy_pack, load_policy_pack_with_sha256, policy_pack_sha256
 
 
 class PolicyPackTests(unittest.TestCase):
@@ -23,6 +25,14 @@ class PolicyPackTests(unittest.TestCase):
         self.assertTrue(citations)
         self.assertIn("TRIAGE-CHESTPAIN-001", {c.get("policy_id") for c in citations})
 
+    def test_single_read_loader_matches_separate_calls(self) -> None:
+        path = files("clinicaflow.resources").joinpath("policy_pack.json")
+
+        policies, sha256 = load_policy_pack_with_sha256(path)
+
+        self.assertEqual(policies, load_policy_pack(path))
+        self.assertEqual(sha256, policy_pack_sha256(path))
+
 
 if __name__ == "__main__":
     unittest.main()
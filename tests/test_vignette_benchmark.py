@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import json
+import os
+import tempfile
 import unittest
+from pathlib import Path
 
 from clinicaflow.benchmarks.vignettes import (
+    dumps_vignette_json,
     load_default_vignette_path,
     load_default_vignette_paths,
     load_vignettes,
@@ -101,6 +106,29 @@ class VignetteBenchmarkTests(unittest.TestCase):
         self.assertEqual(summary.over_triage_rate_baseline, 47.4)
         self.assertEqual(summary.over_triage_rate_clinicaflow, 0.0)
 
+    def test_load_vignettes_rereads_modified_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cases.jsonl"
+            path.write_text(json.dumps({"id": "a"}) + "\n", encoding="utf-8")
+            first = load_vignettes(path)
+            self.assertEqual([r["id"] for r in first], ["a"])
+
+            # Cached loads hand out independent lists and rows.
+            first.append({"id": "mutated"})
+            first[0]["id"] = "edited"
+            self.assertEqual([r["id"] for r in load_vignettes(path)], ["a"])
+
+            path.write_text(json.dumps({"id": "a"}) + "\n\n" + json.dumps({"id": "b"}) + "\n", encoding="utf-8")
+            st = path.stat()
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            self.assertEqual([r["id"] for r in load_vignettes(path)], ["a", "b"])
+
+    def test_dumps_vignette_json_matches_json_dumps(self) -> None:
+        labels = {"risk_tier": "urgent", "note": "caf\u00e9"}
+        self.assertEqual(dumps_vignette_json(labels), json.dumps(labels, indent=2, ensure_ascii=False))
+        labels["risk_tier"] = "critical"
+        self.assertIn("critical", dumps_vignette_json(labels))
+
 
 if __name__ == "__main__":
     unittest.main()